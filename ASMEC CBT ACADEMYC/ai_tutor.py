@@ -2,13 +2,13 @@ import json
 import random
 from typing import List, Dict, Optional
 from datetime import datetime
-import openai  # Para integración con GPT (opcional)
 
 class MathTutorAI:
     """Tutor AI inteligente para matemáticas"""
     
     def __init__(self, use_openai: bool = False):
         self.use_openai = use_openai
+        self.openai = None  # Se importa sólo si se usa (es pesado al arrancar)
         self.user_profiles = {}
         self.knowledge_base = self.load_knowledge_base()
         
@@ -18,7 +18,9 @@ class MathTutorAI:
     def setup_openai(self):
         """Configurar API de OpenAI"""
         try:
+            import openai  # Para integración con GPT (opcional)
             openai.api_key = "TU_API_KEY_AQUI"  # Cambiar por tu API key
+            self.openai = openai
         except:
             print("OpenAI no configurado, usando respuestas locales")
             self.use_openai = False
@@ -184,7 +186,7 @@ class MathTutorAI:
         try:
             prompt = self.create_help_prompt(topic, user_profile)
             
-            response = openai.ChatCompletion.create(
+            response = self.openai.ChatCompletion.create(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "Eres un tutor de matemáticas paciente y claro."},
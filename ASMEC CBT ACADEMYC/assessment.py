@@ -1,8 +1,21 @@
 import random
-from typing import List, Dict, Optional, Tuple
+import threading
+import uuid
+from typing import List, Dict, NamedTuple, Optional, Set, Tuple
 from datetime import datetime
 from enum import Enum
 
+import numpy as np
+
+from irt import (AbilityEstimator, DEFAULT_B_BY_LEVEL, ItemPool,
+                 ability_to_theta, performance_to_theta, prior_mean_for_ability,
+                 theta_to_ability)
+from exercise_batch import ExerciseBatch, ExerciseBatchGenerator, id_prefix, new_seed
+from exercise_templates import TEMPLATES, ExerciseTemplate
+from grading import AnswerKeys, grade
+from question_bank import JsonQuestionSource, QuestionBank
+from session_log import SessionLog
+
 class QuestionType(Enum):
     MULTIPLE_CHOICE = "multiple_choice"
     TRUE_FALSE = "true_false"
@@ -17,165 +30,222 @@ class Difficulty(Enum):
     EXPERT = 4
 
 class Question:
-    """Clase para preguntas de evaluación"""
+    """Pregunta del banco: inmutable y compartida por todos los exámenes
+    
+    Las respuestas de cada examen se guardan en los arreglos de la sesión
+    (AdaptiveTest.current_test), nunca en la pregunta.
+    """
+    
+    __slots__ = ('id', 'text', 'type', 'correct_answer', 'points',
+                 'difficulty', 'topic', 'options', 'hint')
     
     def __init__(self, id: str, text: str, question_type: QuestionType,
                  correct_answer: str, points: int, difficulty: Difficulty,
                  topic: str, options: List[str] = None, hint: str = None):
-        self.id = id
-        self.text = text
-        self.type = question_type
-        self.correct_answer = correct_answer
-        self.points = points
-        self.difficulty = difficulty
-        self.topic = topic
-        self.options = options or []
-        self.hint = hint
-        self.user_answer = None
-        self.time_spent = 0
-        self.correct = False
+        init = object.__setattr__
+        init(self, 'id', id)
+        init(self, 'text', text)
+        init(self, 'type', question_type)
+        init(self, 'correct_answer', correct_answer)
+        init(self, 'points', points)
+        init(self, 'difficulty', difficulty)
+        init(self, 'topic', topic)
+        init(self, 'options', tuple(options or ()))
+        init(self, 'hint', hint)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Question es inmutable: no se puede asignar '{name}'")
+    
+    def __reduce__(self):
+        # pickle y copy reconstruyen con el constructor (los pools de procesos la envían)
+        return (Question, (self.id, self.text, self.type, self.correct_answer, self.points,
+                           self.difficulty, self.topic, list(self.options), self.hint))
+    
+    @classmethod
+    def from_dict(cls, row: Dict) -> 'Question':
+        """Crear desde una fila de contenido (JSON o tabla questions)"""
+        return cls(
+            id=row['id'],
+            text=row['text'],
+            question_type=QuestionType(row['type']),
+            correct_answer=row['correct_answer'],
+            points=row.get('points', 10),
+            difficulty=Difficulty(row.get('difficulty', 1)),
+            topic=row.get('topic', ''),
+            options=row.get('options'),
+            hint=row.get('hint')
+        )
 
-class AssessmentEngine:
-    """Motor de evaluación adaptativa"""
+class ItemIndex:
+    """Índice del banco de preguntas por (tema, dificultad)
+
+    Las preguntas se agrupan una sola vez al cargar el banco; la búsqueda de
+    candidatas es un acceso a diccionario y la selección excluye las ya
+    administradas sin copiar ni filtrar la lista completa.
+    """
+    
+    # Intentos de muestreo antes de filtrar la lista (cubos casi agotados)
+    MAX_SAMPLE_ATTEMPTS = 32
+    
+    def __init__(self, question_bank: Dict[str, List[Question]]):
+        self.items: Dict[Tuple[str, Difficulty], List[Question]] = {}
+        for topic, questions in question_bank.items():
+            for question in questions:
+                self.items.setdefault((topic, question.difficulty), []).append(question)
+        self.topics = list(question_bank)
+    
+    def candidates(self, topic: str, difficulty: Difficulty) -> List[Question]:
+        """Preguntas de un tema y una dificultad"""
+        return self.items.get((topic, difficulty), [])
+    
+    @staticmethod
+    def difficulties_by_distance(difficulty: Difficulty) -> List[Difficulty]:
+        """Dificultades de la más cercana a la más lejana (a igual distancia, la mayor)"""
+        return sorted(
+            Difficulty,
+            key=lambda d: (abs(d.value - difficulty.value), -d.value)
+        )
     
-    def __init__(self):
-        self.question_bank = self.load_question_bank()
+    def pick(self, topic: str, difficulty: Difficulty,
+             administered: Set[str]) -> Optional[Question]:
+        """Pregunta aleatoria del cubo que no se haya administrado, o None"""
+        bucket = self.candidates(topic, difficulty)
+        if not bucket:
+            return None
+        
+        # Muestreo con rechazo mientras las administradas sean pocas frente
+        # al cubo (cada intento acierta con probabilidad > 1/2)
+        if len(bucket) > 2 * len(administered):
+            for _ in range(self.MAX_SAMPLE_ATTEMPTS):
+                question = random.choice(bucket)
+                if question.id not in administered:
+                    return question
+        
+        remaining = [q for q in bucket if q.id not in administered]
+        return random.choice(remaining) if remaining else None
+    
+    def select(self, topic: str, difficulty: Difficulty,
+               administered: Set[str]) -> Optional[Question]:
+        """Seleccionar la pregunta más cercana a la dificultad pedida, sin recursión
+        
+        Orden de búsqueda: el tema pedido por cercanía de dificultad, luego
+        los demás temas; si todo el banco ya se administró, se permite
+        repetir antes que terminar el examen.
+        """
+        difficulties = self.difficulties_by_distance(difficulty)
+        topics = [topic] + [t for t in self.topics if t != topic]
+        
+        for exclude in (administered, set()):
+            for candidate_topic in topics:
+                for candidate_difficulty in difficulties:
+                    question = self.pick(candidate_topic, candidate_difficulty, exclude)
+                    if question is not None:
+                        return question
+        
+        return None
+
+class BankView(NamedTuple):
+    """Banco construido en una versión: preguntas, índice, pool TRI y claves
+    
+    Cada examen guarda el suyo, así una recarga en caliente no cambia las
+    posiciones de los ítems que ya administró.
+    """
+    version: int
+    question_bank: Dict[str, List[Question]]
+    item_index: ItemIndex
+    irt_pool: ItemPool
+    question_by_id: Dict[str, Question]
+    # Formas canónicas de las respuestas esperadas (grading), por ítem
+    answer_keys: AnswerKeys
+
+class AssessmentEngine:
+    """Motor de evaluación adaptativa
+    
+    El banco de preguntas (content/questions o la tabla questions) se
+    comparte en todo el proceso y se carga por tema al usarse; el índice y
+    el pool TRI se construyen en el primer examen y de nuevo si el banco
+    cambia.
+    """
+    
+    # Banco y motor compartidos por todo el proceso
+    _shared_bank: Optional[QuestionBank] = None
+    _shared_engine: Optional['AssessmentEngine'] = None
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, item_parameters: Optional[Dict[str, Tuple[float, float, float]]] = None,
+                 bank: Optional[QuestionBank] = None):
+        self.bank = bank or self.shared_bank()
+        # item_parameters: calibración guardada (DatabaseManager.get_item_parameters)
+        self.item_parameters = item_parameters
+        self._view: Optional[BankView] = None
+        self._build_lock = threading.Lock()
         self.user_proficiency = {}
         self.adaptive_algorithms = AdaptiveAlgorithms()
     
-    def load_question_bank(self) -> Dict[str, List[Question]]:
-        """Cargar banco de preguntas"""
-        return {
-            'aritmetica': self.generate_arithmetic_questions(),
-            'algebra': self.generate_algebra_questions(),
-            'geometria': self.generate_geometry_questions(),
-            'calculo': self.generate_calculus_questions(),
-            'estadistica': self.generate_statistics_questions()
-        }
+    @classmethod
+    def shared_bank(cls) -> QuestionBank:
+        """Banco por defecto del proceso (content/questions), creado una vez"""
+        with cls._shared_lock:
+            if cls._shared_bank is None:
+                cls._shared_bank = QuestionBank(JsonQuestionSource(), Question.from_dict)
+            return cls._shared_bank
+    
+    @classmethod
+    def shared(cls) -> 'AssessmentEngine':
+        """Motor compartido: los exámenes sin motor propio no reconstruyen el banco"""
+        bank = cls.shared_bank()
+        with cls._shared_lock:
+            if cls._shared_engine is None:
+                cls._shared_engine = cls(bank=bank)
+            return cls._shared_engine
+    
+    def view(self) -> BankView:
+        """Versión vigente del banco; se reconstruye si el contenido cambió"""
+        self.bank.reload_if_changed()
+        view = self._view
+        if view is None or view.version != self.bank.version:
+            with self._build_lock:
+                if self._view is None or self._view.version != self.bank.version:
+                    self._view = self._build_view()
+                view = self._view
+        return view
+    
+    def _build_view(self) -> BankView:
+        """Construir índice, pool TRI y mapa por id del banco actual"""
+        version = self.bank.version
+        question_bank = self.load_question_bank()
+        return BankView(
+            version=version,
+            question_bank=question_bank,
+            item_index=ItemIndex(question_bank),
+            irt_pool=ItemPool.from_question_bank(question_bank, self.item_parameters),
+            question_by_id={
+                question.id: question
+                for questions in question_bank.values()
+                for question in questions
+            },
+            answer_keys=AnswerKeys()
+        )
+    
+    @property
+    def question_bank(self) -> Dict[str, List[Question]]:
+        return self.view().question_bank
+    
+    @property
+    def item_index(self) -> ItemIndex:
+        return self.view().item_index
+    
+    @property
+    def irt_pool(self) -> ItemPool:
+        return self.view().irt_pool
     
-    def generate_arithmetic_questions(self) -> List[Question]:
-        """Generar preguntas de aritmética"""
-        questions = []
-        
-        # Nivel fácil
-        questions.append(Question(
-            id="arith_001",
-            text="¿Cuál es el resultado de 15 + 27?",
-            question_type=QuestionType.MULTIPLE_CHOICE,
-            correct_answer="42",
-            points=10,
-            difficulty=Difficulty.EASY,
-            topic="suma",
-            options=["40", "41", "42", "43"]
-        ))
-        
-        questions.append(Question(
-            id="arith_002",
-            text="Calcula: 48 ÷ 6",
-            question_type=QuestionType.SHORT_ANSWER,
-            correct_answer="8",
-            points=10,
-            difficulty=Difficulty.EASY,
-            topic="division"
-        ))
-        
-        # Nivel medio
-        questions.append(Question(
-            id="arith_003",
-            text="Un producto cuesta $120. Si tiene un descuento del 15%, ¿cuál es el precio final?",
-            question_type=QuestionType.PROBLEM_SOLVING,
-            correct_answer="102",
-            points=20,
-            difficulty=Difficulty.MEDIUM,
-            topic="porcentajes",
-            hint="Calcula el 15% de 120 y réstalo del precio original"
-        ))
-        
-        # Nivel difícil
-        questions.append(Question(
-            id="arith_004",
-            text="Simplifica: (3/4) + (2/5) - (1/2)",
-            question_type=QuestionType.CALCULATION,
-            correct_answer="13/20",
-            points=30,
-            difficulty=Difficulty.HARD,
-            topic="fracciones"
-        ))
-        
-        return questions
-    
-    def generate_algebra_questions(self) -> List[Question]:
-        """Generar preguntas de álgebra"""
-        questions = []
-        
-        # Ecuaciones lineales
-        questions.append(Question(
-            id="alg_001",
-            text="Resuelve para x: 2x + 5 = 13",
-            question_type=QuestionType.SHORT_ANSWER,
-            correct_answer="4",
-            points=15,
-            difficulty=Difficulty.EASY,
-            topic="ecuaciones_lineales"
-        ))
-        
-        questions.append(Question(
-            id="alg_002",
-            text="Resuelve el sistema: x + y = 10, x - y = 2",
-            question_type=QuestionType.PROBLEM_SOLVING,
-            correct_answer="x=6, y=4",
-            points=25,
-            difficulty=Difficulty.MEDIUM,
-            topic="sistemas_ecuaciones",
-            hint="Usa el método de eliminación o sustitución"
-        ))
-        
-        # Factorización
-        questions.append(Question(
-            id="alg_003",
-            text="Factoriza completamente: x² - 5x + 6",
-            question_type=QuestionType.SHORT_ANSWER,
-            correct_answer="(x-2)(x-3)",
-            points=20,
-            difficulty=Difficulty.MEDIUM,
-            topic="factorizacion"
-        ))
-        
-        return questions
-    
-    def generate_geometry_questions(self) -> List[Question]:
-        """Generar preguntas de geometría"""
-        questions = []
-        
-        questions.append(Question(
-            id="geo_001",
-            text="El área de un rectángulo es 24 cm². Si el largo es 6 cm, ¿cuál es el ancho?",
-            question_type=QuestionType.PROBLEM_SOLVING,
-            correct_answer="4",
-            points=15,
-            difficulty=Difficulty.EASY,
-            topic="areas"
-        ))
-        
-        questions.append(Question(
-            id="geo_002",
-            text="En un triángulo rectángulo, los catetos miden 3 cm y 4 cm. ¿Cuánto mide la hipotenusa?",
-            question_type=QuestionType.SHORT_ANSWER,
-            correct_answer="5",
-            points=20,
-            difficulty=Difficulty.MEDIUM,
-            topic="teorema_pitagoras"
-        ))
-        
-        return questions
-    
-    def generate_calculus_questions(self) -> List[Question]:
-        """Generar preguntas de cálculo"""
-        return []  # Para implementar
-    
-    def generate_statistics_questions(self) -> List[Question]:
-        """Generar preguntas de estadística"""
-        return []  # Para implementar
+    @property
+    def question_by_id(self) -> Dict[str, Question]:
+        return self.view().question_by_id
+    
+    def load_question_bank(self) -> Dict[str, List[Question]]:
+        """Cargar banco de preguntas (todos los temas)"""
+        return self.bank.load_all()
     
     def get_recommended_lesson(self, user_id: int) -> Optional[Dict]:
         """Obtener lección recomendada basada en evaluación"""
@@ -258,65 +328,229 @@ class AssessmentEngine:
         return lesson_templates.get(topic, [])
 
 class AdaptiveTest:
-    """Sistema de exámenes adaptativos"""
-    
-    def __init__(self):
-        self.assessment_engine = AssessmentEngine()
+    """Sistema de exámenes adaptativos
+    
+    La habilidad se estima con TRI (EAP sobre una malla de cuadratura). La
+    política 'max_info' elige el ítem de máxima información de Fisher en la
+    habilidad estimada; 'difficulty' conserva la selección por nivel.
+    
+    Con `session_log`, cada pregunta presentada y cada respuesta se anexan
+    al registro de la sesión y resume_test() reconstruye el examen si la
+    app se cerró a mitad; finish_test() lo archiva en tests (con `db`).
+    """
+    
+    SELECTION_POLICIES = ('max_info', 'difficulty')
+    
+    # Preguntas por examen
+    MAX_QUESTIONS = 20
+    
+    def __init__(self, assessment_engine: Optional['AssessmentEngine'] = None,
+                 selection_policy: str = 'max_info',
+                 session_log: Optional[SessionLog] = None, db=None):
+        if selection_policy not in self.SELECTION_POLICIES:
+            raise ValueError(f"Política de selección no válida: {selection_policy}")
+        self.selection_policy = selection_policy
+        self.assessment_engine = assessment_engine or AssessmentEngine.shared()
+        self.session_log = session_log
+        # DatabaseManager donde finish_test archiva los exámenes terminados
+        self.db = db
         self.current_test = None
         self.test_history = []
     
-    def start_test(self, test_type: str, user_level: int = 1):
+    def start_test(self, test_type: str, user_level: int = 1,
+                   user_id: Optional[int] = None):
         """Iniciar examen adaptativo"""
-        self.current_test = {
-            'id': f"test_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+        now = datetime.now()
+        test_id = f"test_{now.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.current_test = self._new_session(test_id, test_type, user_level, user_id, now)
+        
+        # Generar primera pregunta
+        question = self.select_next_question()
+        
+        if self.session_log:
+            header = {'id': test_id, 'type': test_type, 'user_level': user_level,
+                      'user_id': user_id, 'start_time': now.isoformat(),
+                      'policy': self.selection_policy, 'bank_version': self.bank.version}
+            self.session_log.start(test_id, header, *self._question_record(question))
+    
+    def _new_session(self, test_id: str, test_type: str, user_level: int,
+                     user_id: Optional[int], start_time: datetime) -> Dict:
+        """Estado inicial de un examen, sin preguntas"""
+        size = self.MAX_QUESTIONS
+        return {
+            'id': test_id,
             'type': test_type,
             'user_level': user_level,
-            'questions': [],
+            'user_id': user_id,
+            # Versión del banco para todo el examen
+            'view': self.assessment_engine.view(),
+            # Respuestas de la sesión en arreglos preasignados; las preguntas
+            # se guardan como posición en el pool (se comparten, no se copian)
+            'items': np.full(size, -1, dtype=np.int32),
+            'correct': np.zeros(size, dtype=bool),
+            'time_spent': np.zeros(size, dtype=np.int32),
+            'answers': [None] * size,
+            'presented': 0,
             'current_question_index': 0,
-            'start_time': datetime.now(),
+            'start_time': start_time,
             'score': 0,
             'estimated_ability': user_level,
             'questions_answered': 0,
-            'current_difficulty': Difficulty.EASY
+            'current_difficulty': Difficulty.EASY,
+            # Estado TRI: posterior de la habilidad
+            'ability': AbilityEstimator(prior_mean=prior_mean_for_ability(user_level), capacity=size),
+            'theta': prior_mean_for_ability(user_level),
+            'theta_se': 1.0
         }
+    
+    @staticmethod
+    def _question_record(question: Optional[Question]) -> List[list]:
+        """Evento del registro para una pregunta presentada"""
+        return [['q', question.id]] if question is not None else []
+    
+    def resume_test(self, test_id: Optional[str] = None) -> bool:
+        """Reanudar un examen desde su registro (por defecto, el más reciente)
+        
+        Se reproducen los eventos sobre el banco actual: las respuestas
+        conservan la calificación que recibieron. Devuelve False si no hay
+        registro o alguna de sus preguntas ya no está en el banco.
+        """
+        if not self.session_log:
+            return False
+        if test_id is None:
+            pending = self.session_log.pending()
+            if not pending:
+                return False
+            test_id = pending[-1]
         
-        # Generar primera pregunta
-        first_question = self.select_next_question()
-        self.current_test['questions'].append(first_question)
+        try:
+            header, records = self.session_log.read(test_id)
+        except (OSError, ValueError):
+            return False
+        
+        self.current_test = test = self._new_session(
+            header['id'], header['type'], header['user_level'], header.get('user_id'),
+            datetime.fromisoformat(header['start_time'])
+        )
+        pool = self.bank.irt_pool
+        for record in records:
+            if record[0] == 'q':
+                position = pool.position.get(record[1])
+                if position is None or test['presented'] >= self.MAX_QUESTIONS:
+                    self.current_test = None
+                    return False
+                test['items'][test['presented']] = position
+                test['current_question_index'] = test['presented']
+                test['presented'] += 1
+                test['current_difficulty'] = self.question_at(test['current_question_index']).difficulty
+            elif record[0] == 'a':
+                _, answer, time_spent, is_correct = record
+                index = test['questions_answered']
+                question = self.question_at(index)
+                test['answers'][index] = answer
+                test['time_spent'][index] = time_spent
+                test['correct'][index] = is_correct
+                if is_correct:
+                    test['score'] += question.points
+                test['questions_answered'] += 1
+                self.update_ability_estimate(question, bool(is_correct))
+        return True
+    
+    def finish_test(self) -> Optional[Dict]:
+        """Terminar el examen: resultado, historial y archivo en tests (una escritura)"""
+        if not self.current_test:
+            return None
+        
+        test = self.current_test
+        answered = test['questions_answered']
+        result = {
+            'id': test['id'],
+            'user_id': test['user_id'],
+            'test_type': test['type'],
+            'score': self.calculate_final_score(test['score']),
+            'total_questions': answered,
+            'correct_answers': int(test['correct'][:answered].sum()),
+            'time_spent': int(test['time_spent'][:answered].sum()),
+            'taken_at': test['start_time'].isoformat(),
+            'weak_areas': self.get_weak_areas(),
+            'estimated_ability': test['estimated_ability'],
+            'theta': test['theta'],
+            'theta_se': test['theta_se']
+        }
+        self.test_history.append(result)
+        
+        if self.db is not None and test['user_id'] is not None:
+            self.db.save_test_results_many([result])
+        if self.session_log:
+            self.session_log.remove(test['id'])
+        self.current_test = None
+        return result
     
-    def select_next_question(self) -> Optional[Question]:
-        """Seleccionar siguiente pregunta adaptativamente"""
+    @property
+    def bank(self) -> BankView:
+        """Versión del banco con la que empezó el examen actual"""
+        return self.current_test['view']
+    
+    def question_at(self, index: int) -> Question:
+        """Pregunta presentada en la posición `index` del examen"""
+        pool = self.bank.irt_pool
+        item_id = pool.ids[self.current_test['items'][index]]
+        return self.bank.question_by_id[item_id]
+    
+    def current_question(self) -> Optional[Question]:
+        """Pregunta pendiente de respuesta, o None"""
         if not self.current_test:
             return None
+        index = self.current_test['current_question_index']
+        # Ya respondida: el examen terminó o no quedaban preguntas
+        if index >= self.current_test['presented'] or index < self.current_test['questions_answered']:
+            return None
+        return self.question_at(index)
+    
+    def administered_items(self) -> np.ndarray:
+        """Posiciones en el pool de las preguntas ya presentadas"""
+        return self.current_test['items'][:self.current_test['presented']]
+    
+    def select_next_question(self) -> Optional[Question]:
+        """Seleccionar la siguiente pregunta y agregarla al examen"""
+        if not self.current_test or self.current_test['presented'] >= self.MAX_QUESTIONS:
+            return None
         
-        current_ability = self.current_test['estimated_ability']
         current_difficulty = self.current_test['current_difficulty']
+        pool = self.bank.irt_pool
         
         # Seleccionar tema basado en distribución
         topic = self.select_topic()
         
-        # Filtrar preguntas por dificultad y tema
-        available_questions = [
-            q for q in self.assessment_engine.question_bank.get(topic, [])
-            if q.difficulty == current_difficulty
-        ]
-        
-        if not available_questions:
-            # Si no hay preguntas en esa dificultad, ajustar
-            if current_difficulty.value < Difficulty.EXPERT.value:
-                self.current_test['current_difficulty'] = Difficulty(
-                    current_difficulty.value + 1
-                )
-            else:
-                self.current_test['current_difficulty'] = Difficulty.EASY
-            
-            return self.select_next_question()
+        if self.selection_policy == 'max_info':
+            selected_question = self.select_max_information(topic)
+        else:
+            # Candidatas del índice (tema, dificultad), con la dificultad más
+            # cercana si no quedan en la pedida
+            administered = {pool.ids[i] for i in self.administered_items()}
+            selected_question = self.bank.item_index.select(
+                topic, current_difficulty, administered
+            )
+        if selected_question is None:
+            return None
         
-        # Seleccionar pregunta aleatoria
-        selected_question = random.choice(available_questions)
+        # La adaptación sigue desde la dificultad realmente administrada
+        self.current_test['current_difficulty'] = selected_question.difficulty
+        self.current_test['items'][self.current_test['presented']] = pool.position[selected_question.id]
+        self.current_test['presented'] += 1
         
         return selected_question
     
+    def select_max_information(self, topic: str) -> Optional[Question]:
+        """Ítem de máxima información en la habilidad actual (vectorizado)"""
+        pool = self.bank.irt_pool
+        index = pool.select_max_info(
+            self.current_test['theta'], self.administered_items(), topic
+        )
+        if index is None:
+            return None
+        return self.bank.question_by_id[pool.ids[index]]
+    
     def select_topic(self) -> str:
         """Seleccionar tema para la siguiente pregunta"""
         topics = ['aritmetica', 'algebra', 'geometria']
@@ -338,10 +572,12 @@ class AdaptiveTest:
         # Basado en historial de respuestas
         weak_areas = []
         
-        for question in self.current_test['questions']:
-            if not question.correct:
-                if question.topic not in weak_areas:
-                    weak_areas.append(question.topic)
+        correct = self.current_test['correct']
+        for i in range(self.current_test['questions_answered']):
+            if not correct[i]:
+                topic = self.question_at(i).topic
+                if topic not in weak_areas:
+                    weak_areas.append(topic)
         
         return weak_areas
     
@@ -353,16 +589,15 @@ class AdaptiveTest:
         
         # Buscar pregunta actual
         current_index = self.current_test['current_question_index']
-        if current_index >= len(self.current_test['questions']):
+        question = self.current_question()
+        if question is None:
             return False, "No hay pregunta actual"
         
-        question = self.current_test['questions'][current_index]
-        
-        # Verificar respuesta
+        # Verificar respuesta; se registra en la sesión, no en la pregunta
         is_correct = self.check_answer(question, user_answer)
-        question.user_answer = user_answer
-        question.time_spent = time_spent
-        question.correct = is_correct
+        self.current_test['answers'][current_index] = user_answer
+        self.current_test['time_spent'][current_index] = time_spent
+        self.current_test['correct'][current_index] = is_correct
         
         # Actualizar puntaje
         if is_correct:
@@ -381,61 +616,48 @@ class AdaptiveTest:
         feedback = self.generate_feedback(question, is_correct, user_answer)
         
         # Seleccionar siguiente pregunta
-        if self.current_test['questions_answered'] < 20:  # Límite de 20 preguntas
+        next_question = None
+        if self.current_test['questions_answered'] < self.MAX_QUESTIONS:
             next_question = self.select_next_question()
             if next_question:
-                self.current_test['questions'].append(next_question)
                 self.current_test['current_question_index'] += 1
         
+        # Punto de control: respuesta y siguiente pregunta, en una escritura
+        if self.session_log:
+            self.session_log.append(
+                self.current_test['id'],
+                ['a', user_answer, time_spent, is_correct],
+                *self._question_record(next_question)
+            )
+        
         return is_correct, feedback
     
     def check_answer(self, question: Question, user_answer: str) -> bool:
-        """Verificar si la respuesta es correcta"""
-        # Normalizar respuestas
-        normalized_user = user_answer.strip().lower()
-        normalized_correct = question.correct_answer.strip().lower()
-        
-        # Comparación exacta para cálculos
-        if question.type in [QuestionType.CALCULATION, QuestionType.SHORT_ANSWER]:
-            try:
-                # Intentar comparación numérica
-                user_num = float(normalized_user)
-                correct_num = float(normalized_correct)
-                return abs(user_num - correct_num) < 0.001
-            except:
-                # Comparación de texto
-                return normalized_user == normalized_correct
-        
-        # Para opción múltiple, comparar el texto o índice
-        elif question.type == QuestionType.MULTIPLE_CHOICE:
+        """Verificar si la respuesta es correcta
+        
+        Se compara por equivalencia (grading): '13/20' y '0.65', o
+        '(x-3)(x-2)' y '(x-2)(x-3)', son la misma respuesta.
+        """
+        # Para opción múltiple, el usuario puede elegir la letra
+        if question.type == QuestionType.MULTIPLE_CHOICE:
+            normalized_user = user_answer.strip().lower()
             if normalized_user in ['a', 'b', 'c', 'd']:
-                # Usuario seleccionó letra
                 index = ord(normalized_user) - ord('a')
                 if 0 <= index < len(question.options):
                     return question.options[index] == question.correct_answer
-            else:
-                # Usuario escribió la respuesta
-                return normalized_user == normalized_correct
         
-        return normalized_user == normalized_correct
+        return self.bank.answer_keys.check(question.id, question.correct_answer, user_answer)
     
     def update_ability_estimate(self, question: Question, is_correct: bool):
         """Actualizar estimación de habilidad usando teoría de respuesta al ítem"""
-        current_ability = self.current_test['estimated_ability']
-        question_difficulty = question.difficulty.value
-        
-        # Algoritmo simplificado de actualización
-        if is_correct:
-            # Si respondió correctamente una pregunta difícil, aumentar habilidad más
-            adjustment = 0.1 * question_difficulty
-        else:
-            # Si falló una pregunta fácil, disminuir habilidad más
-            adjustment = -0.1 * (1 / question_difficulty)
-        
-        new_ability = current_ability + adjustment
-        new_ability = max(1.0, min(new_ability, 10.0))  # Limitar entre 1 y 10
+        ability = self.current_test['ability']
+        ability.update(self.bank.irt_pool.params(question.id), is_correct)
         
-        self.current_test['estimated_ability'] = new_ability
+        theta, se = ability.eap()
+        self.current_test['theta'] = theta
+        self.current_test['theta_se'] = se
+        # Escala 1-10 que usan el resto de la app y el historial
+        self.current_test['estimated_ability'] = theta_to_ability(theta)
     
     def adjust_difficulty(self, was_correct: bool):
         """Ajustar dificultad para la siguiente pregunta"""
@@ -478,7 +700,8 @@ class AdaptiveTest:
     
     def calculate_final_score(self, raw_score: int) -> float:
         """Calcular puntaje final normalizado"""
-        max_possible = sum(q.points for q in self.current_test['questions'])
+        pool = self.bank.irt_pool
+        max_possible = int(pool.points[self.administered_items()].sum())
         
         if max_possible == 0:
             return 0.0
@@ -495,13 +718,14 @@ class AdaptiveTest:
         topic_performance = {}
         
         # Analizar rendimiento por tema
-        for question in self.current_test['questions']:
-            topic = question.topic
+        correct = self.current_test['correct']
+        for i in range(self.current_test['questions_answered']):
+            topic = self.question_at(i).topic
             if topic not in topic_performance:
                 topic_performance[topic] = {'correct': 0, 'total': 0}
             
             topic_performance[topic]['total'] += 1
-            if question.correct:
+            if correct[i]:
                 topic_performance[topic]['correct'] += 1
         
         # Identificar áreas con menos del 70% de aciertos
@@ -518,11 +742,13 @@ class AdaptiveTest:
             return []
         
         incorrect = []
-        for question in self.current_test['questions']:
-            if not question.correct:
+        correct = self.current_test['correct']
+        for i in range(self.current_test['questions_answered']):
+            if not correct[i]:
+                question = self.question_at(i)
                 incorrect.append({
                     'question': question.text,
-                    'user_answer': question.user_answer,
+                    'user_answer': self.current_test['answers'][i],
                     'correct_answer': question.correct_answer,
                     'topic': question.topic,
                     'hint': question.hint
@@ -556,182 +782,88 @@ class AdaptiveAlgorithms:
         # current_ability: 1.0 a 10.0
         # previous_performance: 0.0 a 1.0
         
-        if current_ability < 3.0:
-            base_difficulty = Difficulty.EASY
-        elif current_ability < 6.0:
-            base_difficulty = Difficulty.MEDIUM
-        elif current_ability < 9.0:
-            base_difficulty = Difficulty.HARD
-        else:
-            base_difficulty = Difficulty.EXPERT
-        
-        # Ajustar basado en desempeño previo
-        if previous_performance > 0.8:
-            # Si tuvo buen desempeño, aumentar dificultad
-            if base_difficulty.value < Difficulty.EXPERT.value:
-                return Difficulty(base_difficulty.value + 1)
-        elif previous_performance < 0.4:
-            # Si tuvo mal desempeño, disminuir dificultad
-            if base_difficulty.value > Difficulty.EASY.value:
-                return Difficulty(base_difficulty.value - 1)
-        
-        return base_difficulty
+        # Nivel cuya dificultad TRI (b) está más cerca de la habilidad: ahí la
+        # información de un ítem de discriminación fija es máxima
+        def nearest_level(theta: float) -> int:
+            return min(DEFAULT_B_BY_LEVEL, key=lambda level: abs(DEFAULT_B_BY_LEVEL[level] - theta))
+        
+        theta = ability_to_theta(current_ability)
+        base_level = nearest_level(theta)
+        
+        # El desempeño previo en el nivel base también es una estimación de
+        # theta, más reciente: pesa el doble que la habilidad acumulada
+        theta_performance = performance_to_theta(previous_performance, DEFAULT_B_BY_LEVEL[base_level])
+        return Difficulty(nearest_level((theta + 2 * theta_performance) / 3))
 
 class AdaptiveExerciseGenerator:
     """Generador de ejercicios adaptativos"""
     
-    def __init__(self, difficulty: Difficulty, topic: str):
+    def __init__(self, difficulty: Difficulty, topic: str, seed: Optional[int] = None):
         self.difficulty = difficulty
         self.topic = topic
         self.problem_templates = self.load_templates()
+        # Ids '<tema>-<nivel>-<semilla>-<n>', como ExerciseBatchGenerator:
+        # no se repiten entre procesos ni entre generadores
+        self.seed = seed if seed is not None else new_seed()
+        self.generated = 0
     
     def load_templates(self) -> Dict:
-        """Cargar plantillas de problemas"""
+        """Plantillas compiladas (exercise_templates), por tema y dificultad"""
         return {
-            'aritmetica': {
-                Difficulty.EASY: [
-                    "¿Cuánto es {a} + {b}?",
-                    "Calcula: {a} - {b}",
-                    "{a} × {b} = ?",
-                    "{a} ÷ {b} = ?"
-                ],
-                Difficulty.MEDIUM: [
-                    "Calcula: ({a} + {b}) × {c}",
-                    "¿Cuál es el {p}% de {n}?",
-                    "Simplifica: {a}/{b} + {c}/{d}",
-                    "Resuelve: {a}² - {b}²"
-                ],
-                Difficulty.HARD: [
-                    "Calcula: √({a} × {b} + {c})",
-                    "Resuelve: ({a} + {b}i)({c} - {d}i)",
-                    "Encuentra el MCD de {a}, {b} y {c}",
-                    "Calcula la media de: {lista}"
-                ]
-            },
-            'algebra': {
-                Difficulty.EASY: [
-                    "Resuelve: {a}x + {b} = {c}",
-                    "Simplifica: {a}x + {b}x",
-                    "Evalúa: {a}x² cuando x = {b}",
-                    "¿Cuál es el coeficiente de x en {a}x + {b}?"
-                ],
-                Difficulty.MEDIUM: [
-                    "Resuelve el sistema: x + y = {a}, x - y = {b}",
-                    "Factoriza: x² + {a}x + {b}",
-                    "Grafica: y = {a}x + {b}",
-                    "Resuelve: |x - {a}| = {b}"
-                ],
-                Difficulty.HARD: [
-                    "Resuelve: {a}x³ + {b}x² + {c}x + {d} = 0",
-                    "Encuentra la inversa de la matriz [[{a},{b}],[{c},{d}]]",
-                    "Demuestra que ({a}+{b}i)² = {c}+{d}i",
-                    "Resuelve la desigualdad: {a}x² + {b}x + {c} > 0"
-                ]
-            }
-            # Agregar más temas...
+            topic: {Difficulty(level): templates for level, templates in levels.items()}
+            for topic, levels in TEMPLATES.items()
         }
     
+    def resolve_templates(self) -> List[ExerciseTemplate]:
+        """Plantillas del tema; si no hay para la dificultad, se baja de nivel"""
+        topic_templates = self.problem_templates.get(self.topic, {})
+        while not topic_templates.get(self.difficulty) and self.difficulty.value > 1:
+            self.difficulty = Difficulty(self.difficulty.value - 1)
+        return topic_templates.get(self.difficulty, [])
+    
     def generate_exercise(self) -> Dict:
         """Generar ejercicio adaptativo"""
-        templates = self.problem_templates.get(self.topic, {}).get(self.difficulty, [])
-        
+        return self.generate_many(1)[0]
+    
+    def generate_many(self, n: int) -> List[Dict]:
+        """Generar n ejercicios de una vez (hojas de trabajo, exámenes)"""
+        templates = self.resolve_templates()
         if not templates:
-            # Fallback a dificultad más baja
-            if self.difficulty.value > 1:
-                self.difficulty = Difficulty(self.difficulty.value - 1)
-                return self.generate_exercise()
-            else:
-                return self.generate_fallback_exercise()
-        
-        template = random.choice(templates)
-        
-        # Generar valores aleatorios
-        values = self.generate_values(template)
+            return [self.generate_fallback_exercise() for _ in range(n)]
         
-        # Crear problema
-        problem = template.format(**values)
-        
-        # Calcular respuesta
-        solution = self.calculate_solution(template, values)
-        
-        # Determinar puntos
         points = self.difficulty.value * 10
-        
-        return {
-            'id': f"ex_{random.randint(1000, 9999)}",
-            'problem': problem,
-            'solution': solution,
-            'points': points,
-            'difficulty': self.difficulty.name,
-            'topic': self.topic,
-            'values': values
-        }
-    
-    def generate_values(self, template: str) -> Dict[str, int]:
-        """Generar valores para el template"""
-        values = {}
-        
-        # Extraer variables del template
-        import re
-        variables = re.findall(r'\{(\w+)\}', template)
-        
-        for var in variables:
-            if var == 'a' or var == 'b' or var == 'c' or var == 'd':
-                values[var] = random.randint(1, 20)
-            elif var == 'p':
-                values[var] = random.randint(5, 50)  # Porcentaje
-            elif var == 'n':
-                values[var] = random.randint(50, 500)
-            elif var == 'lista':
-                values[var] = [random.randint(1, 100) for _ in range(5)]
-            else:
-                values[var] = random.randint(1, 100)
-        
-        return values
-    
-    def calculate_solution(self, template: str, values: Dict) -> str:
+        difficulty = self.difficulty.name
+        prefix = id_prefix(self.topic, self.difficulty.value, self.seed)
+        exercises = []
+        for template in random.choices(templates, k=n):
+            values = template.sample()
+            self.generated += 1
+            exercises.append({
+                'id': f"{prefix}{self.generated}",
+                'problem': template.render(values),
+                'solution': self.calculate_solution(template, values),
+                'points': points,
+                'difficulty': difficulty,
+                'topic': self.topic,
+                'values': values
+            })
+        return exercises
+    
+    def generate_batch(self, n: int, seed: Optional[int] = None) -> ExerciseBatch:
+        """Generar n ejercicios en columnas con NumPy (simulacros masivos)
+        
+        Con `seed` se reproducen los mismos ejercicios e ids; para lotes
+        sucesivos de la misma secuencia usar ExerciseBatchGenerator.stream().
+        """
+        templates = self.resolve_templates()
+        generator = ExerciseBatchGenerator(self.topic, self.difficulty.value, seed,
+                                           templates=templates or None)
+        return generator.generate(n)
+    
+    def calculate_solution(self, template: ExerciseTemplate, values: Dict) -> str:
         """Calcular solución del problema"""
         try:
-            # Evaluar expresión matemática
-            if ' + ' in template and '?' in template:
-                # Suma simple
-                a = values.get('a', 0)
-                b = values.get('b', 0)
-                return str(a + b)
-            elif ' - ' in template:
-                # Resta
-                a = values.get('a', 0)
-                b = values.get('b', 0)
-                return str(a - b)
-            elif ' × ' in template:
-                # Multiplicación
-                a = values.get('a', 0)
-                b = values.get('b', 0)
-                return str(a * b)
-            elif ' ÷ ' in template:
-                # División
-                a = values.get('a', 0)
-                b = values.get('b', 1)
-                if b == 0:
-                    b = 1
-                return str(round(a / b, 2))
-            elif '%' in template:
-                # Porcentaje
-                p = values.get('p', 0)
-                n = values.get('n', 0)
-                return str(round(n * p / 100, 2))
-            elif 'x' in template and '=' in template:
-                # Ecuación lineal
-                a = values.get('a', 1)
-                b = values.get('b', 0)
-                c = values.get('c', 0)
-                if a == 0:
-                    a = 1
-                return str(round((c - b) / a, 2))
-            
-            # Para otros casos, devolver placeholder
-            return "[Solución calculada]"
-            
+            return template.solve(values)
         except Exception as e:
             return f"Error: {str(e)}"
     
@@ -748,23 +880,10 @@ class AdaptiveExerciseGenerator:
         }
     
     def check_answer(self, exercise: Dict, user_answer: str) -> Tuple[bool, str]:
-        """Verificar respuesta del usuario"""
-        try:
-            user_value = float(user_answer)
-            correct_value = float(exercise['solution'])
-            
-            # Permitir margen de error pequeño
-            if abs(user_value - correct_value) < 0.001:
-                return True, "¡Respuesta correcta!"
-            else:
-                return False, f"La respuesta correcta es {exercise['solution']}"
-                
-        except ValueError:
-            # Comparación de texto
-            if user_answer.strip() == exercise['solution'].strip():
-                return True, "¡Respuesta correcta!"
-            else:
-                return False, f"La respuesta correcta es {exercise['solution']}"
+        """Verificar respuesta del usuario (por equivalencia, ver grading)"""
+        if grade(exercise['solution'], user_answer):
+            return True, "¡Respuesta correcta!"
+        return False, f"La respuesta correcta es {exercise['solution']}"
     
     def get_hint(self, exercise: Dict) -> str:
         """Obtener pista para el ejercicio"""
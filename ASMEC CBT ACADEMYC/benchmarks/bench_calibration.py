@@ -0,0 +1,113 @@
+"""
+Benchmark de la calibración TRI: tiempo, memoria y recuperación de parámetros
+
+Genera respuestas sintéticas con parámetros 2PL conocidos, recalibra con
+todo el historial y luego calibra sólo un lote de respuestas nuevas.
+
+Uso:
+    python benchmarks/bench_calibration.py --responses 1000000 --items 500 --users 20000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calibration import ItemCalibrator
+from database import DatabaseManager
+from irt import probability
+
+
+def simulate(db: DatabaseManager, rng, theta, a, b, responses: int, batch: int = 100000):
+    """Insertar `responses` respuestas aleatorias usuario-ítem"""
+    now = datetime.now().isoformat()
+    for start in range(0, responses, batch):
+        size = min(batch, responses - start)
+        users = rng.integers(0, len(theta), size)
+        items = rng.integers(0, len(a), size)
+        correct = rng.random(size) < probability(theta[users], a[items], b[items], 0.0)
+        with db.pool.writer() as conn:
+            conn.executemany('''
+                INSERT INTO exercise_results
+                (user_id, exercise_id, exercise_type, correct, time_spent, timestamp)
+                VALUES (?, ?, 'calibracion', ?, 30, ?)
+            ''', zip((users + 1).tolist(), (f'item_{i}' for i in items.tolist()),
+                     correct.tolist(), [now] * size))
+
+
+def measure(calibrator: ItemCalibrator, trace_memory: bool, **kwargs):
+    """Ejecutar la calibración; devuelve (informe, pico de memoria en MB)"""
+    if trace_memory:
+        tracemalloc.start()
+    report = calibrator.run(**kwargs)
+    peak_mb = 0.0
+    if trace_memory:
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return report, peak_mb
+
+
+def recovery(db: DatabaseManager, a, b) -> str:
+    """Correlación y RMSE entre parámetros verdaderos y estimados"""
+    estimated = db.get_item_parameters()
+    ids = [i for i in range(len(a)) if f'item_{i}' in estimated]
+    est_a = np.array([estimated[f'item_{i}'][0] for i in ids])
+    est_b = np.array([estimated[f'item_{i}'][1] for i in ids])
+    corr_a = np.corrcoef(a[ids], est_a)[0, 1]
+    corr_b = np.corrcoef(b[ids], est_b)[0, 1]
+    rmse_b = np.sqrt(np.mean((b[ids] - est_b) ** 2))
+    return f"r(a)={corr_a:.3f} r(b)={corr_b:.3f} RMSE(b)={rmse_b:.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--responses', type=int, default=1000000)
+    parser.add_argument('--new', type=int, default=100000,
+                        help='respuestas nuevas para la pasada incremental')
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--passes', type=int, default=5)
+    parser.add_argument('--chunk-size', type=int, default=20000)
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='medir el pico de memoria con tracemalloc (más lento)')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    theta = rng.normal(0, 1, args.users)
+    a = rng.lognormal(0, 0.3, args.items)
+    b = rng.normal(0, 1, args.items)
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench_calibration.db')
+    db = DatabaseManager(db_path)
+    try:
+        start = time.perf_counter()
+        simulate(db, rng, theta, a, b, args.responses)
+        print(f"{args.responses:,} respuestas generadas en {time.perf_counter() - start:.1f} s")
+
+        print(f"{'pasada':<12} {'respuestas':>12} {'s':>8} {'resp/s':>10} {'pico MB':>8}  recuperación")
+        calibrator = ItemCalibrator(db, chunk_size=args.chunk_size)
+        report, peak_mb = measure(calibrator, args.trace_memory, full=True, passes=args.passes)
+        print(f"{'completa':<12} {report['responses']:>12,} {report['seconds']:>8.1f} "
+              f"{report['responses'] * args.passes / report['seconds']:>10,.0f} "
+              f"{peak_mb:>8.1f}  {recovery(db, a, b)}")
+
+        simulate(db, rng, theta, a, b, args.new)
+        calibrator = ItemCalibrator(db, chunk_size=args.chunk_size)
+        report, peak_mb = measure(calibrator, args.trace_memory)
+        print(f"{'incremental':<12} {report['responses']:>12,} {report['seconds']:>8.1f} "
+              f"{report['responses'] / report['seconds']:>10,.0f} "
+              f"{peak_mb:>8.1f}  {recovery(db, a, b)}")
+    finally:
+        db.close()
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
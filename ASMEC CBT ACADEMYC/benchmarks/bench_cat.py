@@ -0,0 +1,162 @@
+"""
+Simulación de exámenes adaptativos (CAT) con examinados sintéticos
+
+Cada examinado tiene una habilidad verdadera conocida y responde según el
+modelo TRI; AdaptiveTest se ejecuta completo (start_test, submit_answer).
+Informa preguntas hasta converger, error de estimación, exposición de
+ítems y latencia por paso. Los examinados se reparten entre procesos.
+
+Uso:
+    python benchmarks/bench_cat.py --examinees 2000 --bank-sizes 500 5000 --policies max_info difficulty
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assessment import AdaptiveTest, AssessmentEngine, Difficulty, Question, QuestionType
+from irt import probability
+
+TOPICS = ['aritmetica', 'algebra', 'geometria']
+
+
+class SyntheticEngine(AssessmentEngine):
+    """Motor con un banco sintético cuyos parámetros TRI son los verdaderos"""
+
+    def __init__(self, items: int, seed: int):
+        rng = np.random.default_rng(seed)
+        self.true_params = {
+            f'sim_{i}': (float(a), float(b), 0.0)
+            for i, (a, b) in enumerate(zip(rng.lognormal(0, 0.3, items), rng.normal(0, 1, items)))
+        }
+        super().__init__(item_parameters=self.true_params)
+
+    def load_question_bank(self):
+        bank = {topic: [] for topic in TOPICS}
+        for i, (item_id, (_, b, _)) in enumerate(self.true_params.items()):
+            level = int(np.clip(np.digitize(b, [-1.0, 0.0, 1.0]) + 1, 1, 4))
+            topic = TOPICS[i % len(TOPICS)]
+            bank[topic].append(Question(
+                id=item_id,
+                text=f'Pregunta sintética {i}',
+                question_type=QuestionType.CALCULATION,
+                correct_answer='1',
+                points=10,
+                difficulty=Difficulty(level),
+                topic=topic
+            ))
+        return bank
+
+
+def simulate_batch(job) -> dict:
+    """Simular un lote de examinados (se ejecuta en un proceso hijo)"""
+    policy, items, thetas, se_target, max_questions, seed = job
+    random.seed(seed)
+    rng = np.random.default_rng(seed)
+    engine = SyntheticEngine(items, seed=0)
+    pool = engine.irt_pool
+
+    exposure = np.zeros(len(pool), dtype=np.int64)
+    converged_at, errors, step_ms = [], [], []
+
+    for true_theta in thetas:
+        test = AdaptiveTest(engine, selection_policy=policy)
+        test.MAX_QUESTIONS = max_questions
+
+        start = time.perf_counter()
+        test.start_test('diagnostico', user_level=5)
+        step_ms.append((time.perf_counter() - start) * 1000)
+
+        steps = None
+        state = test.current_test
+        while test.current_question() is not None:
+            index = state['current_question_index']
+            question = test.current_question()
+            correct = rng.random() < probability(true_theta, *pool.params(question.id))
+
+            start = time.perf_counter()
+            test.submit_answer(question.id, '1' if correct else '0')
+            step_ms.append((time.perf_counter() - start) * 1000)
+
+            if steps is None and state['theta_se'] <= se_target:
+                steps = state['questions_answered']
+            # Sin pregunta nueva: límite alcanzado o banco agotado
+            if state['current_question_index'] == index:
+                break
+
+        exposure += np.bincount(test.administered_items(), minlength=len(pool)) > 0
+        converged_at.append(steps if steps is not None else -1)
+        errors.append(state['theta'] - true_theta)
+
+    return {'converged_at': converged_at, 'errors': errors,
+            'step_ms': step_ms, 'exposure': exposure}
+
+
+def run(policy: str, items: int, examinees: int, workers: int,
+        se_target: float, max_questions: int, seed: int) -> dict:
+    """Repartir los examinados entre procesos y combinar los resultados"""
+    thetas = np.random.default_rng(seed).normal(0, 1, examinees)
+    jobs = [
+        (policy, items, chunk.tolist(), se_target, max_questions, seed + i)
+        for i, chunk in enumerate(np.array_split(thetas, workers)) if len(chunk)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(simulate_batch, jobs))
+
+    converged_at = np.concatenate([r['converged_at'] for r in results])
+    errors = np.concatenate([r['errors'] for r in results])
+    step_ms = np.concatenate([r['step_ms'] for r in results])
+    exposure = np.sum([r['exposure'] for r in results], axis=0) / examinees
+    converged = converged_at[converged_at > 0]
+
+    return {
+        'convergidos %': len(converged) / examinees * 100,
+        'preguntas p50': float(np.median(converged)) if len(converged) else float('nan'),
+        'RMSE': float(np.sqrt(np.mean(errors ** 2))),
+        'sesgo': float(np.mean(errors)),
+        'exposición máx': float(exposure.max()),
+        'ítems sin uso %': float(np.mean(exposure == 0) * 100),
+        'paso p50 ms': float(np.percentile(step_ms, 50)),
+        'paso p95 ms': float(np.percentile(step_ms, 95)),
+        'paso p99 ms': float(np.percentile(step_ms, 99)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--examinees', type=int, default=2000)
+    parser.add_argument('--bank-sizes', type=int, nargs='+', default=[500, 5000])
+    parser.add_argument('--policies', nargs='+', default=list(AdaptiveTest.SELECTION_POLICIES),
+                        choices=AdaptiveTest.SELECTION_POLICIES)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--se-target', type=float, default=0.3,
+                        help='error estándar con el que se considera convergido')
+    parser.add_argument('--max-questions', type=int, default=AdaptiveTest.MAX_QUESTIONS)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    header = None
+    for items in args.bank_sizes:
+        for policy in args.policies:
+            start = time.perf_counter()
+            metrics = run(policy, items, args.examinees, args.workers,
+                          args.se_target, args.max_questions, args.seed)
+            elapsed = time.perf_counter() - start
+
+            if header is None:
+                header = f"{'política':<11} {'ítems':>7} " + ' '.join(f'{name:>15}' for name in metrics)
+                print(header)
+            print(f"{policy:<11} {items:>7,} "
+                  + ' '.join(f'{value:>15.2f}' for value in metrics.values())
+                  + f"   ({elapsed:.1f} s)")
+
+
+if __name__ == '__main__':
+    main()
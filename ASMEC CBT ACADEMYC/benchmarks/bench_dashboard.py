@@ -0,0 +1,118 @@
+"""
+Benchmark del dashboard: tiempo de frame al volver de un ejercicio
+
+Abre la aplicación (requiere pantalla), alterna entre el dashboard y la
+pantalla de ejercicio y mide la duración de cada frame y de
+DashboardScreen.update_content. Para comparar antes/después, ejecutar el
+mismo script sobre cada revisión.
+
+Uso:
+    python benchmarks/bench_dashboard.py --cycles 100 --users 1000
+"""
+
+import argparse
+import functools
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Los argumentos son del benchmark, no de Kivy
+os.environ['KIVY_NO_ARGS'] = '1'
+
+import main
+from database import DatabaseManager
+from kivy.clock import Clock
+from kivy.uix.screenmanager import NoTransition
+
+
+def percentile(values, pct: float) -> float:
+    """Percentil simple sobre una lista ordenada"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+class DashboardBenchApp(main.ASMETApp):
+    """Aplicación que navega sola y registra tiempos"""
+
+    def __init__(self, db_path: str, cycles: int, users: int, **kwargs):
+        super().__init__(**kwargs)
+        self.db_path = db_path
+        self.cycles = cycles
+        self.users = users
+        self.frame_times = []
+        self.update_times = []
+        self.remaining = cycles * 2
+
+    def build(self):
+        main.DatabaseManager = functools.partial(DatabaseManager, self.db_path)
+        sm = super().build()
+        sm.transition = NoTransition()
+
+        # Medir update_content en la instancia del dashboard
+        dashboard = sm.get_screen('dashboard')
+        update_content = dashboard.update_content
+
+        def timed_update(*args, **kwargs):
+            start = time.perf_counter()
+            update_content(*args, **kwargs)
+            self.update_times.append((time.perf_counter() - start) * 1000)
+
+        dashboard.update_content = timed_update
+        return sm
+
+    def on_start(self):
+        self.db.register_users_bulk(
+            (f'bench{i}', None, 'bench') for i in range(self.users)
+        )
+        user = self.db.authenticate_user('bench0', 'bench')
+        self.root.get_screen('login').on_login_result(user)
+
+        Clock.schedule_interval(self.record_frame, 0)
+        Clock.schedule_once(self.step, 0.5)
+
+    def record_frame(self, dt):
+        self.frame_times.append(dt * 1000)
+
+    def step(self, dt):
+        """Simular una respuesta y alternar de pantalla"""
+        if self.remaining == 0:
+            self.stop()
+            return
+
+        if self.root.current == 'dashboard':
+            self.gamification.record_exercise_completion('arithmetic', True, 10, 5)
+            self.root.current = 'exercise'
+        else:
+            self.root.current = 'dashboard'
+
+        self.remaining -= 1
+        Clock.schedule_once(self.step, 0.05)
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cycles', type=int, default=100)
+    parser.add_argument('--users', type=int, default=100)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench_dashboard.db')
+    app = DashboardBenchApp(db_path, args.cycles, args.users)
+    try:
+        app.run()
+    finally:
+        os.remove(db_path)
+
+    frames = app.frame_times[1:]
+    print(f"\n{args.cycles} ciclos dashboard/ejercicio, {args.users} usuarios")
+    print(f"frame: media {statistics.mean(frames):.2f} ms, "
+          f"p95 {percentile(frames, 0.95):.2f} ms, máx {max(frames):.2f} ms")
+    print(f"update_content: media {statistics.mean(app.update_times):.2f} ms, "
+          f"máx {max(app.update_times):.2f} ms")
+
+
+if __name__ == '__main__':
+    main_bench()
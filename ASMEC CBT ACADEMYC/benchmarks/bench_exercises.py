@@ -0,0 +1,111 @@
+"""
+Benchmark del generador de ejercicios: análisis por llamada, plantillas compiladas y lotes NumPy
+
+Compara la implementación anterior (re.findall y elección del solucionador
+por subcadenas en cada ejercicio) con generate_many() sobre plantillas
+compiladas y con generate_batch() (columnas de NumPy), y cuenta cuántas
+soluciones quedaban sin calcular.
+
+Uso:
+    python benchmarks/bench_exercises.py --count 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assessment import AdaptiveExerciseGenerator, Difficulty
+
+PLACEHOLDER = "[Solución calculada]"
+
+
+def legacy_values(template: str) -> dict:
+    """generate_values anterior: analiza la plantilla en cada llamada"""
+    values = {}
+    import re
+    for var in re.findall(r'\{(\w+)\}', template):
+        if var in ('a', 'b', 'c', 'd'):
+            values[var] = random.randint(1, 20)
+        elif var == 'p':
+            values[var] = random.randint(5, 50)
+        elif var == 'n':
+            values[var] = random.randint(50, 500)
+        elif var == 'lista':
+            values[var] = [random.randint(1, 100) for _ in range(5)]
+        else:
+            values[var] = random.randint(1, 100)
+    return values
+
+
+def legacy_solution(template: str, values: dict) -> str:
+    """calculate_solution anterior: elige la operación por subcadenas"""
+    if ' + ' in template and '?' in template:
+        return str(values.get('a', 0) + values.get('b', 0))
+    elif ' - ' in template:
+        return str(values.get('a', 0) - values.get('b', 0))
+    elif ' × ' in template:
+        return str(values.get('a', 0) * values.get('b', 0))
+    elif ' ÷ ' in template:
+        return str(round(values.get('a', 0) / (values.get('b', 1) or 1), 2))
+    elif '%' in template:
+        return str(round(values.get('n', 0) * values.get('p', 0) / 100, 2))
+    elif 'x' in template and '=' in template:
+        return str(round((values.get('c', 0) - values.get('b', 0)) / (values.get('a', 1) or 1), 2))
+    return PLACEHOLDER
+
+
+def run_legacy(generator: AdaptiveExerciseGenerator, count: int):
+    """Generar `count` ejercicios con la implementación anterior"""
+    templates = [t.text for t in generator.resolve_templates()]
+    exercises = []
+    for _ in range(count):
+        template = random.choice(templates)
+        values = legacy_values(template)
+        exercises.append({
+            'id': f"ex_{random.randint(1000, 9999)}",
+            'problem': template.format(**values),
+            'solution': legacy_solution(template, values),
+            'points': generator.difficulty.value * 10,
+            'difficulty': generator.difficulty.name,
+            'topic': generator.topic,
+            'values': values
+        })
+    return exercises
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=100000)
+    parser.add_argument('--topics', nargs='+', default=['aritmetica', 'algebra'])
+    args = parser.parse_args()
+
+    print(f"{'tema':<11} {'nivel':<7} {'anterior µs':>12} {'compilado µs':>13} {'lote µs':>8} "
+          f"{'sin solución antes':>19} {'ahora':>6}")
+    for topic in args.topics:
+        for difficulty in (Difficulty.EASY, Difficulty.MEDIUM, Difficulty.HARD):
+            generator = AdaptiveExerciseGenerator(difficulty, topic)
+
+            start = time.perf_counter()
+            legacy = run_legacy(generator, args.count)
+            legacy_us = (time.perf_counter() - start) / args.count * 1e6
+
+            start = time.perf_counter()
+            compiled = generator.generate_many(args.count)
+            compiled_us = (time.perf_counter() - start) / args.count * 1e6
+
+            start = time.perf_counter()
+            generator.generate_batch(args.count, seed=0)
+            batch_us = (time.perf_counter() - start) / args.count * 1e6
+
+            unsolved_before = sum(e['solution'] == PLACEHOLDER for e in legacy) / args.count * 100
+            unsolved_now = sum(e['solution'] == PLACEHOLDER for e in compiled) / args.count * 100
+            print(f"{topic:<11} {difficulty.name:<7} {legacy_us:>12.2f} {compiled_us:>13.2f} {batch_us:>8.2f} "
+                  f"{unsolved_before:>18.0f}% {unsolved_now:>5.0f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark de calificación: comparación por equivalencia con y sin caché de claves
+
+Genera respuestas equivalentes a las esperadas (fracciones por decimales,
+factores en otro orden, pares reordenados) y mide el tiempo por respuesta
+con las formas canónicas en caché y sin ella.
+
+Uso:
+    python benchmarks/bench_grading.py --answers 50000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from fractions import Fraction
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grading import AnswerKeys, canonicalize
+
+
+def make_item(kind: int):
+    """(esperada, respuesta equivalente) de un tipo de ítem"""
+    if kind == 0:
+        value = Fraction(random.randint(1, 99), random.choice([2, 4, 5, 8, 10, 20, 25]))
+        return f"{value.numerator}/{value.denominator}", str(float(value))
+    if kind == 1:
+        r, s = random.randint(1, 9), random.randint(1, 9)
+        return f"(x-{r})(x-{s})", f"(x-{s})(x-{r})"
+    if kind == 2:
+        x, y = random.randint(-9, 9), random.randint(-9, 9)
+        return f"x={x}, y={y}", f"y = {y}, x = {x}"
+    value = random.randint(1, 500)
+    return str(value), f"{value}.0"
+
+
+def make_answers(count: int, items: int = 2000):
+    """(ítem, esperada, respuesta) sobre un banco de `items` preguntas"""
+    bank = [(f"item_{i}",) + make_item(i % 4) for i in range(items)]
+    return [random.choice(bank) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--answers', type=int, default=50000)
+    args = parser.parse_args()
+
+    records = make_answers(args.answers)
+
+    # Sin caché: cada respuesta analiza de nuevo la esperada
+    start = time.perf_counter()
+    correct = 0
+    for item_id, expected, answer in records:
+        canonicalize.cache_clear()
+        correct += AnswerKeys().check(item_id, expected, answer)
+    cold_us = (time.perf_counter() - start) / len(records) * 1e6
+
+    keys = AnswerKeys()
+    start = time.perf_counter()
+    for item_id, expected, answer in records:
+        correct += keys.check(item_id, expected, answer)
+    warm_us = (time.perf_counter() - start) / len(records) * 1e6
+
+    print(f"{'modo':<12} {'µs/respuesta':>13} {'respuestas/s':>13}")
+    print(f"{'sin caché':<12} {cold_us:>13.1f} {1e6 / cold_us:>13,.0f}")
+    print(f"{'con caché':<12} {warm_us:>13.1f} {1e6 / warm_us:>13,.0f}")
+    print(f"Correctas: {correct} de {2 * len(records)}")
+
+
+if __name__ == '__main__':
+    main()
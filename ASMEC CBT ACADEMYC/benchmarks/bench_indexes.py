@@ -0,0 +1,161 @@
+"""
+Benchmark de índices secundarios: planes de consulta antes y después de migrar
+
+Uso:
+    python benchmarks/bench_indexes.py --users 2000 --results 200000
+    python benchmarks/bench_indexes.py --users 200000 --results 200000   # ranking
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager, SCHEMA_MIGRATIONS
+
+# Consultas calientes de DatabaseManager
+HOT_QUERIES = [
+    ('resultados por usuario', '''
+        SELECT * FROM exercise_results
+        WHERE user_id = ? ORDER BY timestamp DESC LIMIT 20
+    ''', lambda users: (random.randint(1, users),)),
+    ('tests por usuario', '''
+        SELECT * FROM tests
+        WHERE user_id = ? ORDER BY taken_at DESC LIMIT 10
+    ''', lambda users: (random.randint(1, users),)),
+    ('notificaciones pendientes', '''
+        SELECT * FROM notifications
+        WHERE user_id = ? AND read = 0
+        ORDER BY created_at DESC LIMIT 10
+    ''', lambda users: (random.randint(1, users),)),
+    ('último usuario activo', '''
+        SELECT * FROM users
+        WHERE is_active = 1 ORDER BY last_login DESC LIMIT 1
+    ''', lambda users: ()),
+    ('ranking por puntos', '''
+        SELECT username, total_points FROM users
+        ORDER BY total_points DESC LIMIT 10
+    ''', lambda users: ()),
+]
+
+
+def populate(db: DatabaseManager, users: int, results: int):
+    """Llenar la base de datos con datos sintéticos"""
+    cursor = db.conn.cursor()
+    now = datetime.now()
+
+    cursor.executemany('''
+        INSERT INTO users
+        (username, email, password_hash, salt, total_points, created_at, last_login)
+        VALUES (?, ?, 'x', 'x', ?, ?, ?)
+    ''', (
+        (f'user{i}', f'user{i}@asmet.test', random.randint(0, 50000),
+         now.isoformat(), (now - timedelta(minutes=i)).isoformat())
+        for i in range(users)
+    ))
+
+    cursor.executemany('''
+        INSERT INTO exercise_results
+        (user_id, exercise_id, exercise_type, correct, time_spent, points_earned, timestamp)
+        VALUES (?, ?, 'arithmetic', ?, ?, 10, ?)
+    ''', (
+        (random.randint(1, users), f'ex_{i}', random.random() < 0.7,
+         random.randint(5, 120), (now - timedelta(seconds=i)).isoformat())
+        for i in range(results)
+    ))
+
+    cursor.executemany('''
+        INSERT INTO tests (user_id, test_type, score, taken_at)
+        VALUES (?, 'diagnostico', ?, ?)
+    ''', (
+        (random.randint(1, users), random.uniform(0, 100), now.isoformat())
+        for _ in range(results // 10)
+    ))
+
+    cursor.executemany('''
+        INSERT INTO notifications (user_id, title, message, type, read, created_at)
+        VALUES (?, 'Aviso', 'Mensaje', 'info', ?, ?)
+    ''', (
+        (random.randint(1, users), random.random() < 0.8, now.isoformat())
+        for _ in range(results // 5)
+    ))
+
+    db.conn.commit()
+
+
+def drop_secondary_indexes(db: DatabaseManager):
+    """Volver al esquema sin índices secundarios (versión 1)"""
+    cursor = db.conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")
+    for (name,) in cursor.fetchall():
+        cursor.execute(f'DROP INDEX {name}')
+    cursor.execute('PRAGMA user_version = 1')
+    db.conn.commit()
+
+
+def report(db: DatabaseManager, users: int, repeat: int, label: str):
+    """Mostrar plan de consulta y tiempo medio de cada consulta caliente"""
+    print(f"\n=== {label} (esquema v{db.get_schema_version()}) ===")
+
+    for name, sql, make_params in HOT_QUERIES:
+        params = make_params(users)
+        plan = db.conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            db.conn.execute(sql, make_params(users)).fetchall()
+        elapsed_ms = (time.perf_counter() - start) / repeat * 1000
+
+        print(f"\n{name}: {elapsed_ms:.3f} ms/consulta")
+        for row in plan:
+            print(f"    {row[-1]}")
+
+
+def report_rank(db: DatabaseManager, repeat: int):
+    """Tiempo de get_user_rank para el primer y el último puesto (peor caso)"""
+    ranking = db.conn.execute(
+        'SELECT id FROM users ORDER BY total_points DESC, id'
+    ).fetchall()
+    print(f"\n=== Posición en el ranking ({len(ranking)} usuarios) ===")
+    for label, (user_id,) in (('primer puesto', ranking[0]), ('último puesto', ranking[-1])):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            rank = db.get_user_rank(user_id)
+        elapsed_ms = (time.perf_counter() - start) / repeat * 1000
+        print(f"{label}: {elapsed_ms:.3f} ms/consulta (posición {rank})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--results', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench_indexes.db')
+    db = DatabaseManager(db_path)
+
+    try:
+        populate(db, args.users, args.results)
+
+        drop_secondary_indexes(db)
+        report(db, args.users, args.repeat, 'ANTES')
+
+        db.migrate()
+        db.conn.execute('ANALYZE')
+        report(db, args.users, args.repeat, 'DESPUÉS')
+        report_rank(db, args.repeat)
+
+        print(f"\nMigraciones disponibles: {[m[0] for m in SCHEMA_MIGRATIONS]}")
+    finally:
+        db.close()
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
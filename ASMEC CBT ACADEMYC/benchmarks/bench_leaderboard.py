@@ -0,0 +1,100 @@
+"""
+Benchmark del ranking: recorrido completo frente a idx_users_ranking
+
+Uso:
+    python benchmarks/bench_leaderboard.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+
+# Consultas anteriores a la migración 4: ordenan o recorren toda la tabla
+SCAN_TOP_SQL = '''
+    SELECT username, total_points, level
+    FROM users NOT INDEXED
+    ORDER BY total_points DESC
+    LIMIT ?
+'''
+SCAN_RANK_SQL = '''
+    SELECT COUNT(*) FROM users NOT INDEXED
+    WHERE total_points > (SELECT total_points FROM users WHERE id = ?)
+'''
+
+
+def populate(db: DatabaseManager, users: int):
+    """Crear `users` usuarios con puntos aleatorios"""
+    now = datetime.now().isoformat()
+    with db.pool.writer() as conn:
+        conn.executemany('''
+            INSERT INTO users
+            (username, password_hash, salt, total_points, created_at)
+            VALUES (?, 'x', 'x', ?, ?)
+        ''', (
+            (f'user{i}', random.randint(0, 100000), now)
+            for i in range(users)
+        ))
+        conn.execute('ANALYZE')
+
+
+def timed(fn, repeat: int) -> float:
+    """Tiempo medio de fn() en milisegundos"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(users: int, repeat: int, limit: int):
+    """Medir top-N y posición de un usuario con y sin índice"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench_leaderboard.db')
+    db = DatabaseManager(db_path)
+
+    try:
+        populate(db, users)
+        user_ids = [random.randint(1, users) for _ in range(repeat)]
+
+        def scan_top():
+            db.conn.execute(SCAN_TOP_SQL, (limit,)).fetchall()
+
+        def scan_rank():
+            db.conn.execute(SCAN_RANK_SQL, (random.choice(user_ids),)).fetchone()
+
+        results = {
+            'top (recorrido)': timed(scan_top, repeat),
+            'top (índice)': timed(lambda: db.get_rankings(limit), repeat),
+            'posición (recorrido)': timed(scan_rank, repeat),
+            'posición (índice)': timed(
+                lambda: db.get_user_rank(random.choice(user_ids)), repeat
+            ),
+        }
+    finally:
+        db.close()
+        os.remove(db_path)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'usuarios':>10} {'consulta':<22} {'ms/consulta':>12}")
+    for users in args.sizes:
+        for name, elapsed_ms in run(users, args.repeat, args.limit).items():
+            print(f"{users:>10,} {name:<22} {elapsed_ms:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
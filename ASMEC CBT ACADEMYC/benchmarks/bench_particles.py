@@ -0,0 +1,115 @@
+"""
+Benchmark de celebración: widgets Label nuevos frente al pool de partículas
+
+Abre una ventana (requiere pantalla), simula respuestas correctas rápidas
+y mide el tiempo de frame con cada implementación.
+
+Uso:
+    python benchmarks/bench_particles.py --seconds 10 --interval 0.25
+"""
+
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Los argumentos son del benchmark, no de Kivy
+os.environ['KIVY_NO_ARGS'] = '1'
+
+from kivy.animation import Animation
+from kivy.app import App
+from kivy.clock import Clock
+from kivy.uix.floatlayout import FloatLayout
+from kivy.uix.label import Label
+
+from particles import ParticleSystem
+
+FRAME_BUDGET_MS = 1000 / 60
+
+
+def celebrate_with_labels(root: FloatLayout):
+    """Implementación anterior: 10 Label, 10 Animation y 10 eventos de reloj"""
+    particles = ['🎉', '✨', '🌟', '⭐', '🎊']
+
+    for _ in range(10):
+        particle = Label(
+            text=random.choice(particles),
+            font_size=random.randint(20, 40),
+            pos=(random.randint(50, 300), random.randint(100, 500))
+        )
+        root.add_widget(particle)
+
+        anim = Animation(y=600, opacity=0, duration=random.uniform(1, 2))
+        anim.start(particle)
+        Clock.schedule_once(lambda dt, p=particle: root.remove_widget(p), 2)
+
+
+class ParticleBenchApp(App):
+    """Aplicación mínima que celebra a intervalos fijos"""
+
+    def __init__(self, mode: str, seconds: float, interval: float, **kwargs):
+        super().__init__(**kwargs)
+        self.mode = mode
+        self.seconds = seconds
+        self.interval = interval
+        self.frame_times = []
+
+    def build(self):
+        root = FloatLayout()
+        self.particles = ParticleSystem(max_particles=30)
+        root.add_widget(self.particles)
+        return root
+
+    def on_start(self):
+        Clock.schedule_interval(self.celebrate, self.interval)
+        Clock.schedule_interval(self.record_frame, 0)
+        Clock.schedule_once(lambda dt: self.stop(), self.seconds)
+
+    def celebrate(self, dt):
+        if self.mode == 'labels':
+            celebrate_with_labels(self.root)
+        else:
+            self.particles.emit(10)
+
+    def record_frame(self, dt):
+        self.frame_times.append(dt * 1000)
+
+
+def run(mode: str, seconds: float, interval: float):
+    """Medir una implementación e imprimir su fila de resultados"""
+    app = ParticleBenchApp(mode, seconds, interval)
+    app.run()
+
+    frames = sorted(app.frame_times[1:])
+    p95 = frames[min(len(frames) - 1, int(len(frames) * 0.95))]
+    over = sum(1 for f in frames if f > FRAME_BUDGET_MS) / len(frames) * 100
+    print(f"{mode:<8} {statistics.mean(frames):>10.2f} {p95:>10.2f} "
+          f"{max(frames):>10.2f} {over:>13.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mode', choices=['labels', 'pool', 'both'], default='both')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--interval', type=float, default=0.25)
+    args = parser.parse_args()
+
+    if args.mode != 'both':
+        run(args.mode, args.seconds, args.interval)
+        return
+
+    # Kivy no puede reabrir la ventana en el mismo proceso: un proceso por modo
+    print(f"{'modo':<8} {'media ms':>10} {'p95 ms':>10} {'máx ms':>10} {'> presupuesto':>14}")
+    for mode in ('labels', 'pool'):
+        subprocess.run([
+            sys.executable, os.path.abspath(__file__), '--mode', mode,
+            '--seconds', str(args.seconds), '--interval', str(args.interval)
+        ], check=True)
+
+
+if __name__ == '__main__':
+    main()
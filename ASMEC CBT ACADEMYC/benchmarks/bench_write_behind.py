@@ -0,0 +1,71 @@
+"""
+Benchmark de escritura: un commit por respuesta frente a la cola diferida
+
+Uso:
+    python benchmarks/bench_write_behind.py --events 5000 --batch-size 20
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+
+
+def run(events: int, synchronous: str, write_behind: bool,
+        batch_size: int, flush_interval_ms: int) -> float:
+    """Guardar `events` resultados y devolver respuestas por segundo"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench_write_behind.db')
+    db = DatabaseManager(
+        db_path,
+        pragmas={'synchronous': synchronous},
+        write_behind=write_behind,
+        batch_size=batch_size,
+        flush_interval_ms=flush_interval_ms
+    )
+    db.register_user('bench', 'bench@asmet.test', 'bench')
+
+    try:
+        start = time.perf_counter()
+        for i in range(events):
+            correct = random.random() < 0.7
+            db.save_exercise_result(1, 'arithmetic', correct, 10, random.randint(5, 60),
+                                    exercise_id=f'ex_{i}')
+        db.flush()
+        elapsed = time.perf_counter() - start
+
+        stats = db.get_study_stats(1)
+        assert stats['exercises_done'] == events, stats
+    finally:
+        db.close()
+        os.remove(db_path)
+
+    return events / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=20)
+    parser.add_argument('--flush-interval-ms', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{args.events} respuestas, lote de {args.batch_size}, "
+          f"ventana de {args.flush_interval_ms} ms\n")
+    print(f"{'synchronous':<12} {'modo':<22} {'resp/s':>12}")
+
+    for synchronous in ('FULL', 'NORMAL'):
+        for write_behind in (False, True):
+            rate = run(args.events, synchronous, write_behind,
+                       args.batch_size, args.flush_interval_ms)
+            mode = 'escritura diferida' if write_behind else 'commit por respuesta'
+            print(f"{synchronous:<12} {mode:<22} {rate:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
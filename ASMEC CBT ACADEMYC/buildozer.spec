@@ -4,8 +4,9 @@ package.name = asmetcbt
 package.domain = org.asmet
 source.dir = .
 source.include_exts = py,png,jpg,kv,ttf,db,json
+source.exclude_dirs = benchmarks
 version = 3.0.0
-requirements = python3, kivy==2.3.0, kivymd, pillow, requests, openssl, sqlite3, pyjnius, android
+requirements = python3, kivy==2.3.0, kivymd, pillow, requests, openssl, sqlite3, pyjnius, android, numpy
 orientation = portrait
 fullscreen = 0
 android.api = 33
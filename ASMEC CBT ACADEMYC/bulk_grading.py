@@ -0,0 +1,268 @@
+import csv
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from grading import AnswerKeys
+
+# Registro de respuesta: (session_id, user_id, test_type, item_id, answer,
+# time_spent, taken_at)
+AnswerRecord = Tuple[str, int, str, str, str, int, Optional[str]]
+
+# Columnas del CSV de entrada (test_type, time_spent y taken_at son opcionales)
+CSV_COLUMNS = ('session_id', 'user_id', 'test_type', 'item_id', 'answer', 'time_spent', 'taken_at')
+
+# Igual que AdaptiveTest.get_weak_areas: temas con menos del 70% de aciertos
+WEAK_AREA_ACCURACY = 70
+
+# Estado de cada proceso trabajador: id -> pregunta y claves de respuesta
+_worker_bank: Optional[Tuple[Dict, AnswerKeys]] = None
+
+def read_csv_records(path: str) -> Iterator[AnswerRecord]:
+    """Registros de un CSV con encabezado (CSV_COLUMNS)"""
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            yield (row['session_id'], int(row['user_id']), row.get('test_type') or 'offline',
+                   row['item_id'], row.get('answer') or '', int(row.get('time_spent') or 0),
+                   row.get('taken_at') or None)
+
+def sessions_are_contiguous(records: Iterable[AnswerRecord]) -> bool:
+    """True si las respuestas de cada sesión llegan juntas"""
+    seen = set()
+    previous = None
+    for record in records:
+        session_id = record[0]
+        if session_id != previous:
+            if session_id in seen:
+                return False
+            seen.add(session_id)
+            previous = session_id
+    return True
+
+def group_sessions(records: Iterable[AnswerRecord]) -> Iterator[List[AnswerRecord]]:
+    """Agrupar registros consecutivos de la misma sesión
+    
+    Una sesión que reaparece después de otra lanza ValueError: calificarla
+    en dos partes dejaría dos tests incompletos.
+    """
+    seen = set()
+    session: List[AnswerRecord] = []
+    for record in records:
+        if session and record[0] != session[0][0]:
+            yield session
+            session = []
+        if not session:
+            if record[0] in seen:
+                raise ValueError(f"Sesión repetida en registros no agrupados: {record[0]}")
+            seen.add(record[0])
+        session.append(record)
+    if session:
+        yield session
+
+def load_bank(bank_db: Optional[str] = None) -> Tuple[Dict, AnswerKeys]:
+    """Preguntas por id y claves de respuesta ya calculadas
+
+    Sin `bank_db` se usa content/questions; con una ruta, la tabla questions
+    (abierta sólo para lectura, sin migrar, y cerrada al terminar).
+    """
+    from assessment import Question
+    from question_bank import JsonQuestionSource, QuestionBank, SqliteQuestionSource
+
+    db = None
+    if bank_db:
+        from database import DatabaseManager
+        db = DatabaseManager(bank_db, readers=1, read_only=True)
+        source = SqliteQuestionSource(db)
+    else:
+        source = JsonQuestionSource()
+    try:
+        bank = QuestionBank(source, Question.from_dict)
+        question_by_id = {
+            question.id: question
+            for questions in bank.load_all().values()
+            for question in questions
+        }
+    finally:
+        if db is not None:
+            db.close()
+    answer_keys = AnswerKeys()
+    answer_keys.precompute(question_by_id.values())
+    return question_by_id, answer_keys
+
+def _init_worker(bank_db: Optional[str]):
+    """Cargar el banco una vez por proceso"""
+    global _worker_bank
+    _worker_bank = load_bank(bank_db)
+
+def grade_sessions(sessions: List[List[AnswerRecord]],
+                   bank: Optional[Tuple[Dict, AnswerKeys]] = None) -> Tuple[List[Dict], List[str], int]:
+    """Calificar sesiones completas: (resultados para tests, sesiones, ítems desconocidos)
+
+    Una sesión sin ningún ítem conocido no genera test, pero cuenta como procesada.
+    """
+    question_by_id, answer_keys = bank or _worker_bank
+    results = []
+    session_ids = []
+    unknown = 0
+    for records in sessions:
+        session_id, user_id, test_type, _, _, _, taken_at = records[0]
+        session_ids.append(session_id)
+        earned = possible = correct_count = total = time_spent = 0
+        topics: Dict[str, List[int]] = {}
+
+        for _, _, _, item_id, answer, spent, _ in records:
+            question = question_by_id.get(item_id)
+            if question is None:
+                unknown += 1
+                continue
+            is_correct = answer_keys.check(item_id, question.correct_answer, answer or '')
+            total += 1
+            time_spent += spent
+            possible += question.points
+            stats = topics.setdefault(question.topic, [0, 0])
+            stats[1] += 1
+            if is_correct:
+                correct_count += 1
+                earned += question.points
+                stats[0] += 1
+
+        if not total:
+            continue
+        results.append({
+            'session_id': session_id,
+            'user_id': user_id,
+            'test_type': test_type,
+            # Mismo cálculo que AdaptiveTest.calculate_final_score
+            'score': round(earned / possible * 100, 1) if possible else 0.0,
+            'total_questions': total,
+            'correct_answers': correct_count,
+            'time_spent': time_spent,
+            'taken_at': taken_at,
+            'weak_areas': [
+                topic for topic, (hits, count) in topics.items()
+                if hits / count * 100 < WEAK_AREA_ACCURACY
+            ],
+        })
+    return results, session_ids, unknown
+
+class BulkGrader:
+    """Calificación en lote de exámenes en papel o sin conexión
+
+    Los registros se agrupan por sesión y se reparten en bloques de
+    `chunk_sessions` sesiones entre `workers` procesos (cada uno carga el
+    banco y sus claves una vez). Los resultados de cada bloque se escriben
+    en una transacción: filas de tests, puntos de los usuarios y, si
+    vienen de offline_answers, la marca de calificadas. Con workers=0 se
+    califica en el mismo proceso.
+    """
+
+    def __init__(self, db, workers: Optional[int] = None, chunk_sessions: int = 200,
+                 bank_db: Optional[str] = None):
+        self.db = db
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.chunk_sessions = chunk_sessions
+        self.bank_db = bank_db
+
+    def grade_csv(self, path: str) -> Dict:
+        """Calificar las respuestas de un CSV, en cualquier orden
+        
+        Si las filas de una sesión no están juntas se ordenan por sesión en
+        memoria (orden estable); si lo están, el archivo se lee en flujo.
+        """
+        records = read_csv_records(path)
+        if not sessions_are_contiguous(read_csv_records(path)):
+            records = sorted(records, key=lambda record: record[0])
+        return self.grade_records(records)
+
+    def grade_pending(self, page_size: int = 20000) -> Dict:
+        """Calificar las sesiones de offline_answers aún sin calificar"""
+        return self.grade_records(self._pending_records(page_size), from_db=True)
+
+    def grade_records(self, records: Iterable[AnswerRecord], from_db: bool = False) -> Dict:
+        """Calificar un flujo de registros agrupados por sesión (ver group_sessions)"""
+        start = time.perf_counter()
+        report = {'sessions': 0, 'answers': 0, 'unknown_items': 0, 'already_graded': 0}
+
+        chunks = self._chunks(group_sessions(records))
+        for results, sessions, unknown in self._graded(chunks):
+            saved = self.db.save_test_results_many(results, graded_sessions=sessions if from_db else ())
+            report['already_graded'] += len(results) - saved
+            report['sessions'] += len(sessions)
+            report['answers'] += sum(r['total_questions'] for r in results) + unknown
+            report['unknown_items'] += unknown
+
+        report['seconds'] = time.perf_counter() - start
+        report['answers_per_second'] = report['answers'] / report['seconds'] if report['seconds'] else 0.0
+        return report
+
+    def _chunks(self, sessions: Iterator[List[AnswerRecord]]) -> Iterator[List[List[AnswerRecord]]]:
+        """Bloques de chunk_sessions sesiones"""
+        chunk = []
+        for session in sessions:
+            chunk.append(session)
+            if len(chunk) == self.chunk_sessions:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _graded(self, chunks: Iterator[List[List[AnswerRecord]]]) -> Iterator[Tuple[List[Dict], List[str], int]]:
+        """Resultados de cada bloque, en orden de entrada"""
+        if self.workers <= 0:
+            bank = load_bank(self.bank_db)
+            for chunk in chunks:
+                yield grade_sessions(chunk, bank)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.bank_db,)) as executor:
+            # Pocos bloques en vuelo: la memoria no depende del tamaño del archivo
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(grade_sessions, chunk))
+                if len(pending) >= 2 * self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _pending_records(self, page_size: int) -> Iterator[AnswerRecord]:
+        """Respuestas sin calificar, ordenadas por sesión"""
+        with self.db.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute('''
+                SELECT session_id, user_id, test_type, item_id, answer,
+                       COALESCE(time_spent, 0), taken_at
+                FROM offline_answers
+                WHERE graded_at IS NULL
+                ORDER BY session_id, id
+            ''')
+            while True:
+                rows = cursor.fetchmany(page_size)
+                if not rows:
+                    break
+                yield from rows
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Calificar en lote exámenes en papel o sin conexión')
+    parser.add_argument('--db', default='asmet_data.db', help='Ruta de la base de datos')
+    parser.add_argument('--csv', help='Archivo de respuestas (sin él: offline_answers pendientes)')
+    parser.add_argument('--workers', type=int, default=None, help='Procesos (0: en este proceso)')
+    parser.add_argument('--bank-db', help='Usar la tabla questions de esta base como banco')
+    args = parser.parse_args()
+
+    from database import DatabaseManager
+    db = DatabaseManager(args.db)
+    try:
+        grader = BulkGrader(db, workers=args.workers, bank_db=args.bank_db)
+        report = grader.grade_csv(args.csv) if args.csv else grader.grade_pending()
+        print(f"{report['sessions']} sesiones, {report['answers']} respuestas "
+              f"({report['unknown_items']} de ítems desconocidos, "
+              f"{report['already_graded']} sesiones ya calificadas) en {report['seconds']:.1f} s: "
+              f"{report['answers_per_second']:,.0f} respuestas/s")
+    finally:
+        db.close()
@@ -0,0 +1,409 @@
+import math
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from irt import DEFAULT_B_BY_LEVEL, THETA_GRID, ItemParams, probability
+
+# Clave de app_settings con el último exercise_results.id ya calibrado
+WATERMARK_KEY = 'calibration_last_result_id'
+
+# Niveles de Difficulty por nombre, para el valor inicial de b
+LEVEL_BY_NAME = {'easy': 1, 'medium': 2, 'hard': 3, 'expert': 4}
+
+# Priors débiles de la etapa M: a ~ N(1, 0.5²), intercepto d ~ N(0, 2²)
+A_PRIOR = (1.0, 0.5)
+D_PRIOR = (0.0, 2.0)
+A_BOUNDS = (0.2, 4.0)
+B_BOUNDS = (-4.0, 4.0)
+
+# Límite de parámetros por consulta IN (SQLITE_MAX_VARIABLE_NUMBER antiguo)
+MAX_SQL_PARAMS = 900
+
+def initial_b(difficulty) -> float:
+    """b inicial a partir de la columna difficulty de exercise_results"""
+    if difficulty is None:
+        return 0.0
+    text = str(difficulty).strip().lower()
+    # Admite '2', 'medium' y 'Difficulty.MEDIUM'
+    level = int(text) if text.isdigit() else LEVEL_BY_NAME.get(text.split('.')[-1])
+    return DEFAULT_B_BY_LEVEL.get(level, 0.0)
+
+def score_to_theta(score: float) -> float:
+    """Media a priori de theta a partir de la nota media en tests (0-100)"""
+    p = min(max(score / 100.0, 0.05), 0.95)
+    return math.log(p / (1.0 - p))
+
+class ItemCalibrator:
+    """Calibración por lotes de los parámetros TRI desde exercise_results
+
+    EM marginal (Bock-Aitkin) sobre la malla de cuadratura: la etapa E
+    recorre las respuestas en bloques de `chunk_size` y acumula, por ítem,
+    los aciertos y respuestas esperados en cada nodo; la etapa M ajusta a y
+    b de todos los ítems a la vez (Fisher scoring vectorizado), con c fijo.
+    La memoria depende del número de ítems y del bloque, no del historial.
+
+    Sin `full`, run() procesa sólo las respuestas nuevas (id mayor que la
+    marca de agua): la habilidad guardada de cada usuario hace de prior y
+    lo esperado se suma a los estadísticos guardados de cada ítem.
+    """
+
+    def __init__(self, db, chunk_size: int = 20000, min_responses: int = 30,
+                 initial_params: Optional[Dict[str, ItemParams]] = None,
+                 grid: np.ndarray = THETA_GRID):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.min_responses = min_responses
+        # Valores de partida de ítems sin calibrar (p. ej. ItemPool.default_params)
+        self.initial_params = initial_params or {}
+        self.grid = grid
+
+        self.item_ids: List[str] = []
+        self.position: Dict[str, int] = {}
+        self.a = np.empty(0)
+        self.b = np.empty(0)
+        self.c = np.empty(0)
+        self.responses = np.empty(0, dtype=np.int64)
+        # (ítems x malla): aciertos y respuestas esperados en cada nodo
+        self.expected_correct = np.empty((0, len(grid)))
+        self.expected_total = np.empty((0, len(grid)))
+        self._log_p = self._log_q = None
+
+    def run(self, full: bool = False, passes: int = 5) -> Dict:
+        """Calibrar; con `full` se reinicia y se recorre todo el historial"""
+        start = time.perf_counter()
+        self._load_items(with_counts=not full)
+
+        with self.db.pool.reader() as conn:
+            last_id = conn.execute('SELECT MAX(id) FROM exercise_results').fetchone()[0] or 0
+
+        if full:
+            report = self._run_full(last_id, passes)
+        else:
+            report = self._run_incremental(last_id)
+
+        report['last_result_id'] = last_id
+        report['seconds'] = time.perf_counter() - start
+        return report
+
+    def _run_full(self, last_id: int, passes: int) -> Dict:
+        """Varias pasadas de EM por todo el historial, agrupado por usuario"""
+        # Dejar el estado como si nunca se hubiera calibrado: si el trabajo
+        # se interrumpe, la siguiente ejecución incremental empieza de cero
+        with self.db.pool.writer() as conn:
+            conn.execute('DELETE FROM user_abilities')
+            conn.execute('UPDATE item_parameters SET responses = 0, expected_counts = NULL')
+            self._write_watermark(conn, 0)
+
+        sql = '''
+            SELECT user_id, exercise_id, correct, difficulty
+            FROM exercise_results
+            WHERE id <= ?
+            ORDER BY user_id
+        '''
+        passes = max(1, passes)
+        report = {'responses': 0, 'users': 0, 'chunks': 0, 'items_updated': 0}
+        for iteration in range(passes):
+            final = iteration == passes - 1
+            self.responses[:] = 0
+            self.expected_correct[:] = 0
+            self.expected_total[:] = 0
+            self._refresh_log_probabilities()
+
+            for rows in self._whole_users(self._stream(sql, (last_id,))):
+                user_ids, theta, se, counts, _ = self._process(rows, use_saved=False)
+                if final:
+                    report['responses'] += len(rows)
+                    report['users'] += len(user_ids)
+                    report['chunks'] += 1
+                    with self.db.pool.writer() as conn:
+                        self._write_abilities(conn, user_ids, theta, se, counts)
+
+            updated = self._m_step(np.arange(len(self.item_ids)))
+
+        with self.db.pool.writer() as conn:
+            self._write_items(conn, np.flatnonzero(self.responses))
+            self._write_watermark(conn, last_id)
+
+        report['items_updated'] = len(updated)
+        return report
+
+    def _run_incremental(self, last_id: int) -> Dict:
+        """Una pasada por las respuestas nuevas, confirmando bloque a bloque"""
+        with self.db.pool.reader() as conn:
+            row = conn.execute(
+                'SELECT value FROM app_settings WHERE key = ?', (WATERMARK_KEY,)
+            ).fetchone()
+        watermark = int(row[0]) if row else 0
+
+        sql = '''
+            SELECT user_id, exercise_id, correct, difficulty, id
+            FROM exercise_results
+            WHERE id > ? AND id <= ?
+            ORDER BY id
+        '''
+        report = {'responses': 0, 'users': 0, 'chunks': 0, 'items_updated': 0}
+        updated_items = set()
+        self._refresh_log_probabilities()
+
+        for rows in self._stream(sql, (watermark, last_id)):
+            user_ids, theta, se, counts, items = self._process(rows, use_saved=True)
+            updated = self._m_step(items)
+            self._refresh_log_probabilities()
+
+            # Usuarios, ítems y marca de agua en la misma transacción
+            with self.db.pool.writer() as conn:
+                self._write_abilities(conn, user_ids, theta, se, counts)
+                self._write_items(conn, items)
+                self._write_watermark(conn, rows[-1][4])
+
+            updated_items.update(updated.tolist())
+            report['responses'] += len(rows)
+            report['users'] += len(user_ids)
+            report['chunks'] += 1
+
+        report['items_updated'] = len(updated_items)
+        return report
+
+    def _stream(self, sql: str, params: tuple) -> Iterator[List[tuple]]:
+        """Leer el resultado de la consulta en bloques de chunk_size filas"""
+        with self.db.pool.reader() as conn:
+            cursor = conn.cursor()
+            # Tuplas en lugar de sqlite3.Row: bastante más rápido por fila
+            cursor.row_factory = None
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(self.chunk_size)
+                if not rows:
+                    break
+                yield rows
+
+    @staticmethod
+    def _whole_users(chunks: Iterable[List[tuple]]) -> Iterator[List[tuple]]:
+        """Reagrupar bloques ordenados por usuario sin partir a ningún usuario"""
+        carry: List[tuple] = []
+        for rows in chunks:
+            rows = carry + rows
+            split = len(rows)
+            while split and rows[split - 1][0] == rows[-1][0]:
+                split -= 1
+            carry = rows[split:]
+            if split:
+                yield rows[:split]
+        if carry:
+            yield carry
+
+    def _process(self, rows: List[tuple], use_saved: bool):
+        """Etapa E de un bloque: (usuarios, theta, error, respuestas, ítems)"""
+        new_items = {row[1]: row[3] for row in rows if row[1] not in self.position}
+        if new_items:
+            self._add_items(new_items)
+
+        size = len(rows)
+        user_ids, users = np.unique(
+            np.fromiter((row[0] for row in rows), dtype=np.int64, count=size),
+            return_inverse=True
+        )
+        items = np.fromiter((self.position[row[1]] for row in rows), dtype=np.intp, count=size)
+        correct = np.fromiter((bool(row[2]) for row in rows), dtype=bool, count=size)
+
+        prior_mean, prior_sd = self._priors(user_ids, use_saved)
+        theta, se = self._e_step(users, items, correct, prior_mean, prior_sd)
+        return user_ids, theta, se, np.bincount(users), np.unique(items)
+
+    def _e_step(self, users: np.ndarray, items: np.ndarray, correct: np.ndarray,
+                prior_mean: np.ndarray, prior_sd: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Posterior de cada usuario y suma de los conteos esperados por ítem"""
+        nodes = len(self.grid)
+        offsets = np.arange(nodes)
+
+        # Log-verosimilitud de cada usuario en cada nodo: suma por usuario
+        contribution = np.where(correct[:, None], self._log_p[items], self._log_q[items])
+        log_posterior = np.bincount(
+            (users[:, None] * nodes + offsets).ravel(),
+            weights=contribution.ravel(),
+            minlength=len(prior_mean) * nodes
+        ).reshape(len(prior_mean), nodes)
+        log_posterior -= 0.5 * ((self.grid - prior_mean[:, None]) / prior_sd[:, None]) ** 2
+        log_posterior -= log_posterior.max(axis=1, keepdims=True)
+        posterior = np.exp(log_posterior)
+        posterior /= posterior.sum(axis=1, keepdims=True)
+
+        # Cada respuesta reparte su peso según el posterior de su usuario
+        weights = posterior[users]
+        flat_items = (items[:, None] * nodes + offsets).ravel()
+        cells = len(self.item_ids) * nodes
+        self.expected_total += np.bincount(
+            flat_items, weights=weights.ravel(), minlength=cells
+        ).reshape(-1, nodes)
+        self.expected_correct += np.bincount(
+            flat_items, weights=(weights * correct[:, None]).ravel(), minlength=cells
+        ).reshape(-1, nodes)
+        self.responses += np.bincount(items, minlength=len(self.item_ids))
+
+        theta = posterior @ self.grid
+        se = np.sqrt(np.maximum(posterior @ self.grid ** 2 - theta ** 2, 0.0))
+        return theta, se
+
+    def _m_step(self, items: np.ndarray, iterations: int = 25, tol: float = 1e-4) -> np.ndarray:
+        """Ajustar a y b de los ítems con datos suficientes; devuelve cuáles"""
+        items = items[self.responses[items] >= self.min_responses]
+        if not items.size:
+            return items
+
+        r = self.expected_correct[items]
+        n = self.expected_total[items]
+        c = self.c[items][:, None]
+        a = self.a[items].copy()
+        d = -a * self.b[items]
+        (a_mean, a_sd), (d_mean, d_sd) = A_PRIOR, D_PRIOR
+
+        # Newton en (a, d) con z = a·theta + d; sistema 2x2 resuelto por ítem
+        for _ in range(iterations):
+            s = 1.0 / (1.0 + np.exp(-(a[:, None] * self.grid + d[:, None])))
+            p = np.clip(c + (1.0 - c) * s, 1e-9, 1 - 1e-9)
+            dp = (1.0 - c) * s * (1.0 - s)
+            score_z = (r - n * p) * dp / (p * (1.0 - p))
+            info_z = n * dp ** 2 / (p * (1.0 - p))
+
+            g_a = score_z @ self.grid - (a - a_mean) / a_sd ** 2
+            g_d = score_z.sum(axis=1) - (d - d_mean) / d_sd ** 2
+            h_aa = info_z @ self.grid ** 2 + 1 / a_sd ** 2
+            h_ad = info_z @ self.grid
+            h_dd = info_z.sum(axis=1) + 1 / d_sd ** 2
+            det = h_aa * h_dd - h_ad ** 2
+
+            step_a = (h_dd * g_a - h_ad * g_d) / det
+            step_d = (h_aa * g_d - h_ad * g_a) / det
+            a = np.clip(a + step_a, *A_BOUNDS)
+            d = d + step_d
+            if max(np.abs(step_a).max(), np.abs(step_d).max()) < tol:
+                break
+
+        self.a[items] = a
+        self.b[items] = np.clip(-d / a, *B_BOUNDS)
+        return items
+
+    def _refresh_log_probabilities(self):
+        """log P y log Q de cada ítem en cada nodo con los parámetros actuales"""
+        p = np.clip(probability(self.grid[None, :], self.a[:, None], self.b[:, None],
+                                self.c[:, None]), 1e-9, 1 - 1e-9)
+        self._log_p = np.log(p)
+        self._log_q = np.log1p(-p)
+
+    def _load_items(self, with_counts: bool):
+        """Cargar los ítems ya calibrados (y sus estadísticos, si se piden)"""
+        with self.db.pool.reader() as conn:
+            rows = conn.execute(
+                'SELECT item_id, a, b, c, responses, expected_counts FROM item_parameters'
+            ).fetchall()
+
+        nodes = len(self.grid)
+        self.item_ids = [row[0] for row in rows]
+        self.position = {item_id: i for i, item_id in enumerate(self.item_ids)}
+        self.a = np.array([row[1] for row in rows], dtype=float)
+        self.b = np.array([row[2] for row in rows], dtype=float)
+        self.c = np.array([row[3] for row in rows], dtype=float)
+        self.responses = np.zeros(len(rows), dtype=np.int64)
+        self.expected_correct = np.zeros((len(rows), nodes))
+        self.expected_total = np.zeros((len(rows), nodes))
+
+        if with_counts:
+            for i, row in enumerate(rows):
+                counts = np.frombuffer(row[5], dtype=np.float64) if row[5] else None
+                # Estadísticos de otra malla no sirven: se descartan
+                if counts is not None and counts.size == 2 * nodes:
+                    self.responses[i] = row[4] or 0
+                    self.expected_correct[i], self.expected_total[i] = counts.reshape(2, nodes)
+
+    def _add_items(self, new_items: Dict[str, Optional[str]]):
+        """Agregar ítems sin calibrar con sus valores de partida"""
+        params = [
+            self.initial_params.get(item_id) or (1.0, initial_b(difficulty), 0.0)
+            for item_id, difficulty in new_items.items()
+        ]
+        for item_id in new_items:
+            self.position[item_id] = len(self.item_ids)
+            self.item_ids.append(item_id)
+
+        a, b, c = (np.array(column, dtype=float) for column in zip(*params))
+        self.a = np.concatenate([self.a, a])
+        self.b = np.concatenate([self.b, b])
+        self.c = np.concatenate([self.c, c])
+        self.responses = np.concatenate([self.responses, np.zeros(len(params), dtype=np.int64)])
+        empty = np.zeros((len(params), len(self.grid)))
+        self.expected_correct = np.vstack([self.expected_correct, empty])
+        self.expected_total = np.vstack([self.expected_total, empty])
+
+        p = np.clip(probability(self.grid[None, :], a[:, None], b[:, None], c[:, None]),
+                    1e-9, 1 - 1e-9)
+        self._log_p = np.vstack([self._log_p, np.log(p)])
+        self._log_q = np.vstack([self._log_q, np.log1p(-p)])
+
+    def _priors(self, user_ids: np.ndarray, use_saved: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """Prior normal por usuario: habilidad guardada, nota en tests o N(0, 1)"""
+        mean = np.zeros(len(user_ids))
+        sd = np.ones(len(user_ids))
+        index = {int(user_id): i for i, user_id in enumerate(user_ids)}
+        ids = list(index)
+
+        with self.db.pool.reader() as conn:
+            for start in range(0, len(ids), MAX_SQL_PARAMS):
+                batch = ids[start:start + MAX_SQL_PARAMS]
+                marks = ', '.join('?' * len(batch))
+                for user_id, score in conn.execute(f'''
+                    SELECT user_id, AVG(score) FROM tests
+                    WHERE user_id IN ({marks})
+                    GROUP BY user_id
+                ''', batch):
+                    mean[index[user_id]] = score_to_theta(score)
+
+                if not use_saved:
+                    continue
+                for user_id, theta, theta_se in conn.execute(f'''
+                    SELECT user_id, theta, theta_se FROM user_abilities
+                    WHERE user_id IN ({marks})
+                ''', batch):
+                    mean[index[user_id]] = theta
+                    sd[index[user_id]] = max(theta_se, 0.05)
+
+        return mean, sd
+
+    def _write_abilities(self, conn, user_ids, theta, se, counts):
+        """Guardar la habilidad estimada de los usuarios del bloque"""
+        now = datetime.now().isoformat()
+        conn.executemany('''
+            INSERT INTO user_abilities (user_id, theta, theta_se, responses, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (user_id) DO UPDATE SET
+                theta = excluded.theta,
+                theta_se = excluded.theta_se,
+                responses = user_abilities.responses + excluded.responses,
+                updated_at = excluded.updated_at
+        ''', zip(user_ids.tolist(), theta.tolist(), se.tolist(), counts.tolist(),
+                 [now] * len(user_ids)))
+
+    def _write_items(self, conn, items: np.ndarray):
+        """Guardar parámetros y estadísticos de los ítems indicados"""
+        now = datetime.now().isoformat()
+        conn.executemany('''
+            INSERT OR REPLACE INTO item_parameters
+            (item_id, a, b, c, responses, expected_counts, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            (self.item_ids[i], float(self.a[i]), float(self.b[i]), float(self.c[i]),
+             int(self.responses[i]),
+             np.concatenate([self.expected_correct[i], self.expected_total[i]]).tobytes(),
+             now)
+            for i in items.tolist()
+        ))
+
+    @staticmethod
+    def _write_watermark(conn, last_id: int):
+        """Registrar hasta qué exercise_results.id está calibrado"""
+        conn.execute('''
+            INSERT OR REPLACE INTO app_settings (key, value, updated_at)
+            VALUES (?, ?, ?)
+        ''', (WATERMARK_KEY, str(last_id), datetime.now().isoformat()))
@@ -1,5 +1,4 @@
 import json
-import requests
 from typing import Dict, Optional, List
 from datetime import datetime
 import threading
@@ -19,6 +18,12 @@ class CloudSyncManager:
         # Cache local para cambios pendientes
         self.pending_changes = []
     
+    @property
+    def requests(self):
+        """Módulo requests, importado en el primer uso (acelera el arranque)"""
+        import requests
+        return requests
+    
     def sync_data(self, force: bool = False):
         """Sincronizar datos con la nube"""
         if self.is_syncing and not force:
@@ -57,6 +62,9 @@ class CloudSyncManager:
         if not data_to_upload:
             return
         
+        # Importar antes del try: sin la dependencia, el ImportError no
+        # debe aparecer al evaluar la cláusula except
+        requests = self.requests
         try:
             # Subir en lotes
             for batch in self.create_batches(data_to_upload, batch_size=50):
@@ -83,6 +91,7 @@ class CloudSyncManager:
     
     def download_cloud_data(self):
         """Descargar datos de la nube"""
+        requests = self.requests
         try:
             response = requests.get(
                 f"{self.api_url}/sync/download",
@@ -2,10 +2,14 @@ import sqlite3
 import json
 from datetime import datetime
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Tuple
-import hashlib
+from concurrent.futures import Future
+from typing import List, Dict, Optional, Tuple, Callable, Iterable
 import os
 
+from db_pool import ConnectionPool
+from password_hashing import PasswordHasher, hash_password
+from write_queue import WriteBehindQueue
+
 @dataclass
 class User:
     id: int
@@ -42,47 +46,393 @@ class Achievement:
     unlocked: bool
     unlocked_at: Optional[datetime]
 
+# Tabla de usuarios; el email es opcional (NULL) y único cuando existe
+USERS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS %s (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        email TEXT UNIQUE,
+        password_hash TEXT NOT NULL,
+        salt TEXT NOT NULL,
+        level INTEGER DEFAULT 1,
+        total_points INTEGER DEFAULT 0,
+        coins INTEGER DEFAULT 0,
+        overall_progress REAL DEFAULT 0.0,
+        streak_days INTEGER DEFAULT 0,
+        last_streak_date TEXT,
+        created_at TEXT NOT NULL,
+        last_login TEXT,
+        settings TEXT DEFAULT '{}',
+        is_active BOOLEAN DEFAULT 1
+    )
+'''
+
+# Columnas que faltan en bases creadas por las versiones anteriores de main.py
+LEGACY_MISSING_COLUMNS = {
+    'users': [
+        ('streak_days', 'INTEGER DEFAULT 0'),
+        ('last_streak_date', 'TEXT'),
+        ('settings', "TEXT DEFAULT '{}'"),
+        ('is_active', 'BOOLEAN DEFAULT 1'),
+    ],
+    'subject_progress': [
+        ('chapter', 'INTEGER DEFAULT 1'),
+        ('exercises_completed', 'INTEGER DEFAULT 0'),
+        ('average_score', 'REAL DEFAULT 0.0'),
+        ('time_spent', 'INTEGER DEFAULT 0'),
+    ],
+    'achievements': [
+        ('achievement_id', "TEXT NOT NULL DEFAULT ''"),
+    ],
+}
+
+def _make_email_optional(cursor):
+    """Reconstruir users si email es NOT NULL (esquema antiguo de database.py)"""
+    columns = cursor.execute('PRAGMA table_info(users)').fetchall()
+    email_not_null = any(col[1] == 'email' and col[3] for col in columns)
+    if not email_not_null:
+        return
+    
+    column_names = ', '.join(col[1] for col in columns)
+    cursor.execute(USERS_TABLE_SQL % 'users_new')
+    cursor.execute(f'INSERT INTO users_new ({column_names}) SELECT {column_names} FROM users')
+    cursor.execute("UPDATE users_new SET email = NULL WHERE email = ''")
+    cursor.execute('DROP TABLE users')
+    cursor.execute('ALTER TABLE users_new RENAME TO users')
+    
+    # Los índices se eliminan junto con la tabla
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_active_last_login ON users (is_active, last_login)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_total_points ON users (total_points)')
+
+def _migrate_legacy_exercises(cursor):
+    """Mover el historial de la tabla exercises (main.py) a exercise_results"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'exercises'")
+    if not cursor.fetchone():
+        return
+    
+    # Los triggers de exercise_results actualizan user_stats; los puntos ya
+    # se habían sumado a users.total_points al guardar cada ejercicio
+    cursor.execute('''
+        INSERT INTO exercise_results
+        (user_id, exercise_id, exercise_type, correct, time_spent, points_earned, timestamp)
+        SELECT
+            user_id,
+            'legacy_' || id,
+            exercise_type,
+            COALESCE(correct, 0),
+            time_spent,
+            COALESCE(points_earned, 0),
+            COALESCE(timestamp, datetime('now'))
+        FROM exercises
+        ORDER BY id
+    ''')
+    cursor.execute('DROP TABLE exercises')
+
+REBUILD_USER_STATS_SQL = '''
+    INSERT INTO user_stats
+    (user_id, exercises_done, correct_count, total_time, updated_at)
+    SELECT
+        user_id,
+        COUNT(*),
+        SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END),
+        COALESCE(SUM(time_spent), 0),
+        MAX(timestamp)
+    FROM exercise_results
+    GROUP BY user_id
+'''
+
+# Migraciones de esquema: (versión, descripción, sentencias o funciones(cursor)).
+# La versión aplicada se guarda en PRAGMA user_version; nunca editar una
+# migración ya publicada, siempre agregar una nueva al final.
+SCHEMA_MIGRATIONS = [
+    (1, 'Estadísticas agregadas por usuario (user_stats)', [
+        '''
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER PRIMARY KEY,
+            exercises_done INTEGER DEFAULT 0,
+            correct_count INTEGER DEFAULT 0,
+            total_time INTEGER DEFAULT 0,
+            updated_at TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_exercise_results_insert_stats
+        AFTER INSERT ON exercise_results
+        BEGIN
+            INSERT OR IGNORE INTO user_stats (user_id) VALUES (NEW.user_id);
+            UPDATE user_stats
+            SET exercises_done = exercises_done + 1,
+                correct_count = correct_count + (CASE WHEN NEW.correct THEN 1 ELSE 0 END),
+                total_time = total_time + COALESCE(NEW.time_spent, 0),
+                updated_at = NEW.timestamp
+            WHERE user_id = NEW.user_id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_exercise_results_delete_stats
+        AFTER DELETE ON exercise_results
+        BEGIN
+            UPDATE user_stats
+            SET exercises_done = exercises_done - 1,
+                correct_count = correct_count - (CASE WHEN OLD.correct THEN 1 ELSE 0 END),
+                total_time = total_time - COALESCE(OLD.time_spent, 0)
+            WHERE user_id = OLD.user_id;
+        END
+        ''',
+        # Poblar agregados a partir del historial existente
+        'DELETE FROM user_stats',
+        REBUILD_USER_STATS_SQL,
+    ]),
+    (2, 'Índices secundarios para consultas por usuario', [
+        # achievements y subject_progress ya tienen índice por su UNIQUE(user_id, ...)
+        '''
+        CREATE INDEX IF NOT EXISTS idx_exercise_results_user_timestamp
+        ON exercise_results (user_id, timestamp)
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_tests_user_taken_at
+        ON tests (user_id, taken_at)
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_notifications_user_read_created
+        ON notifications (user_id, read, created_at)
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_users_active_last_login
+        ON users (is_active, last_login)
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_users_total_points
+        ON users (total_points)
+        ''',
+    ]),
+    (3, 'Motor único: email opcional e historial de la tabla exercises', [
+        _make_email_optional,
+        _migrate_legacy_exercises,
+    ]),
+    (4, 'Índice de cobertura para el ranking por puntos', [
+        # El top-N y la posición de un usuario se leen sólo del índice;
+        # id desempata, así el orden del índice es el orden del ranking
+        '''
+        CREATE INDEX IF NOT EXISTS idx_users_ranking
+        ON users (total_points DESC, id, username, level)
+        ''',
+        'DROP INDEX IF EXISTS idx_users_total_points',
+    ]),
+    (5, 'Parámetros TRI calibrados y habilidad estimada por usuario', [
+        # expected_counts: aciertos y respuestas esperados por nodo de la malla
+        # (float64), estadísticos suficientes de la calibración incremental
+        '''
+        CREATE TABLE IF NOT EXISTS item_parameters (
+            item_id TEXT PRIMARY KEY,
+            a REAL NOT NULL DEFAULT 1.0,
+            b REAL NOT NULL DEFAULT 0.0,
+            c REAL NOT NULL DEFAULT 0.0,
+            responses INTEGER DEFAULT 0,
+            expected_counts BLOB,
+            updated_at TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_abilities (
+            user_id INTEGER PRIMARY KEY,
+            theta REAL NOT NULL,
+            theta_se REAL NOT NULL,
+            responses INTEGER DEFAULT 0,
+            updated_at TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''',
+    ]),
+    (6, 'Banco de preguntas en la base de datos (tabla questions)', [
+        # bank_topic: tema del banco (aritmetica, algebra...); topic: subtema
+        '''
+        CREATE TABLE IF NOT EXISTS questions (
+            id TEXT PRIMARY KEY,
+            bank_topic TEXT NOT NULL,
+            topic TEXT,
+            type TEXT NOT NULL,
+            text TEXT NOT NULL,
+            correct_answer TEXT NOT NULL,
+            options TEXT,  -- JSON array
+            hint TEXT,
+            points INTEGER DEFAULT 10,
+            difficulty INTEGER DEFAULT 1,
+            updated_at TEXT
+        )
+        ''',
+        # Páginas de un tema ordenadas por id, sólo desde el índice
+        '''
+        CREATE INDEX IF NOT EXISTS idx_questions_bank_topic
+        ON questions (bank_topic, id)
+        ''',
+    ]),
+    (7, 'Respuestas de exámenes en papel o sin conexión, para calificar en lote', [
+        # graded_at queda NULL hasta que bulk_grading escribe el test de la sesión
+        '''
+        CREATE TABLE IF NOT EXISTS offline_answers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            test_type TEXT NOT NULL DEFAULT 'offline',
+            item_id TEXT NOT NULL,
+            answer TEXT,
+            time_spent INTEGER DEFAULT 0,
+            taken_at TEXT,
+            graded_at TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''',
+        # Sólo las pendientes, en el orden en que se califican
+        '''
+        CREATE INDEX IF NOT EXISTS idx_offline_answers_pending
+        ON offline_answers (session_id, id) WHERE graded_at IS NULL
+        ''',
+    ]),
+    (8, 'Sesiones ya calificadas en lote, para no duplicar tests', [
+        '''
+        CREATE TABLE IF NOT EXISTS graded_sessions (
+            session_id TEXT PRIMARY KEY,
+            graded_at TEXT NOT NULL
+        )
+        ''',
+    ]),
+    (9, 'user_stats también sigue las modificaciones de exercise_results', [
+        # Restar la fila anterior y sumar la nueva (puede cambiar de usuario)
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_exercise_results_update_stats
+        AFTER UPDATE OF user_id, correct, time_spent ON exercise_results
+        BEGIN
+            UPDATE user_stats
+            SET exercises_done = exercises_done - 1,
+                correct_count = correct_count - (CASE WHEN OLD.correct THEN 1 ELSE 0 END),
+                total_time = total_time - COALESCE(OLD.time_spent, 0)
+            WHERE user_id = OLD.user_id;
+            INSERT OR IGNORE INTO user_stats (user_id) VALUES (NEW.user_id);
+            UPDATE user_stats
+            SET exercises_done = exercises_done + 1,
+                correct_count = correct_count + (CASE WHEN NEW.correct THEN 1 ELSE 0 END),
+                total_time = total_time + COALESCE(NEW.time_spent, 0),
+                updated_at = MAX(COALESCE(updated_at, ''), NEW.timestamp)
+            WHERE user_id = NEW.user_id;
+        END
+        ''',
+        # Corregir agregados desviados por modificaciones anteriores
+        'DELETE FROM user_stats',
+        REBUILD_USER_STATS_SQL,
+    ]),
+    (10, 'Histograma de puntos para la posición en el ranking', [
+        # Usuarios por total de puntos: la posición suma los totales mayores
+        # en vez de contar usuario por usuario en idx_users_ranking
+        '''
+        CREATE TABLE IF NOT EXISTS points_histogram (
+            total_points INTEGER PRIMARY KEY,
+            users INTEGER NOT NULL
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_users_insert_points
+        AFTER INSERT ON users
+        BEGIN
+            INSERT INTO points_histogram (total_points, users)
+            VALUES (COALESCE(NEW.total_points, 0), 1)
+            ON CONFLICT (total_points) DO UPDATE SET users = users + 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_users_delete_points
+        AFTER DELETE ON users
+        BEGIN
+            UPDATE points_histogram SET users = users - 1
+            WHERE total_points = COALESCE(OLD.total_points, 0);
+            DELETE FROM points_histogram
+            WHERE total_points = COALESCE(OLD.total_points, 0) AND users <= 0;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_users_update_points
+        AFTER UPDATE OF total_points ON users
+        WHEN COALESCE(OLD.total_points, 0) <> COALESCE(NEW.total_points, 0)
+        BEGIN
+            UPDATE points_histogram SET users = users - 1
+            WHERE total_points = COALESCE(OLD.total_points, 0);
+            DELETE FROM points_histogram
+            WHERE total_points = COALESCE(OLD.total_points, 0) AND users <= 0;
+            INSERT INTO points_histogram (total_points, users)
+            VALUES (COALESCE(NEW.total_points, 0), 1)
+            ON CONFLICT (total_points) DO UPDATE SET users = users + 1;
+        END
+        ''',
+        'DELETE FROM points_histogram',
+        '''
+        INSERT INTO points_histogram (total_points, users)
+        SELECT COALESCE(total_points, 0), COUNT(*) FROM users
+        GROUP BY COALESCE(total_points, 0)
+        ''',
+    ]),
+]
+
+SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
 class DatabaseManager:
     """Gestor avanzado de base de datos SQLite"""
     
-    def __init__(self, db_path='asmet_data.db'):
+    def __init__(self, db_path='asmet_data.db', readers: int = 3,
+                 pragmas: Optional[Dict] = None, write_behind: bool = False,
+                 batch_size: int = 20, flush_interval_ms: int = 500,
+                 track_main_thread: bool = False, read_only: bool = False):
         self.db_path = db_path
+        self.readers = readers
+        self.pragmas = pragmas
+        # Sólo lectura: sin migraciones ni escrituras (p. ej. un banco ajeno)
+        self.read_only = read_only
+        self.pool = None
         self.conn = None
+        # (versión, descripción) de las migraciones aplicadas por este gestor
+        self.applied_migrations: List[Tuple[int, str]] = []
+        # Pool para PBKDF2, así el login no bloquea el hilo de la UI
+        self.hasher = PasswordHasher()
         self.connect()
+        
+        # Avisar de cualquier consulta que aún bloquee el hilo de la UI
+        # (el esquema se prepara antes, al construir el gestor)
+        if track_main_thread:
+            self.pool.track_main_thread()
+        
+        # Escritura diferida opcional de resultados (una transacción por lote)
+        self.write_queue = None
+        if write_behind:
+            self.write_queue = WriteBehindQueue(
+                self._write_batch,
+                max_events=batch_size,
+                max_delay_ms=flush_interval_ms
+            )
     
     def connect(self):
-        """Conectar a la base de datos"""
-        self.conn = sqlite3.connect(
+        """Conectar a la base de datos (WAL: un escritor y N lectores)"""
+        self.pool = ConnectionPool(
             self.db_path,
-            check_same_thread=False
+            readers=self.readers,
+            pragmas=self.pragmas,
+            read_only=self.read_only
         )
-        self.conn.row_factory = sqlite3.Row
-        self.create_tables()
+        # Conexión de escritura, usar siempre bajo self.pool.writer()
+        self.conn = self.pool.writer_connection
+        if self.read_only:
+            return
+        
+        # Con el esquema al día no hace falta recorrer los CREATE TABLE
+        with self.pool.writer():
+            if self.get_schema_version() < SCHEMA_VERSION:
+                self.create_tables()
     
     def create_tables(self):
         """Crear todas las tablas necesarias"""
         cursor = self.conn.cursor()
         
         # Tabla de usuarios
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                salt TEXT NOT NULL,
-                level INTEGER DEFAULT 1,
-                total_points INTEGER DEFAULT 0,
-                coins INTEGER DEFAULT 0,
-                overall_progress REAL DEFAULT 0.0,
-                streak_days INTEGER DEFAULT 0,
-                last_streak_date TEXT,
-                created_at TEXT NOT NULL,
-                last_login TEXT,
-                settings TEXT DEFAULT '{}',
-                is_active BOOLEAN DEFAULT 1
-            )
-        ''')
+        cursor.execute(USERS_TABLE_SQL % 'users')
         
         # Tabla de progreso por materia
         cursor.execute('''
@@ -223,80 +573,193 @@ class DatabaseManager:
                 updated_at TEXT NOT NULL
             )
         ''')
+
+        self._add_missing_columns(cursor)
         
         self.conn.commit()
+        
+        # Aplicar migraciones pendientes (índices, agregados, ...)
+        self.migrate()
+    
+    def _add_missing_columns(self, cursor):
+        """Completar tablas creadas con el esquema reducido de main.py"""
+        for table, columns in LEGACY_MISSING_COLUMNS.items():
+            existing = {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+            for name, definition in columns:
+                if name not in existing:
+                    cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+    
+    @property
+    def data_version(self) -> int:
+        """Versión de los datos: cambia con cada escritura confirmada"""
+        return self.pool.write_version
     
+    @property
+    def main_thread_queries(self) -> int:
+        """Sentencias ejecutadas en el hilo principal desde que se activó el conteo"""
+        return self.pool.main_thread_queries if self.pool else 0
+    
+    def get_schema_version(self) -> int:
+        """Obtener versión del esquema (PRAGMA user_version)"""
+        return self.conn.execute('PRAGMA user_version').fetchone()[0]
+    
+    def migrate(self) -> int:
+        """Aplicar migraciones pendientes, una transacción por versión
+        
+        No imprime nada: las aplicadas quedan en applied_migrations (el
+        comando migrate de la línea de órdenes las muestra).
+        """
+        with self.pool.writer():
+            current_version = self.get_schema_version()
+            
+            for version, description, statements in SCHEMA_MIGRATIONS:
+                if version <= current_version:
+                    continue
+                
+                cursor = self.conn.cursor()
+                try:
+                    cursor.execute('BEGIN')
+                    for statement in statements:
+                        if callable(statement):
+                            statement(cursor)
+                        else:
+                            cursor.execute(statement)
+                    # PRAGMA no admite parámetros; version es un entero interno
+                    cursor.execute(f'PRAGMA user_version = {int(version)}')
+                    self.conn.commit()
+                except Exception:
+                    self.conn.rollback()
+                    raise
+                
+                self.applied_migrations.append((version, description))
+                current_version = version
+        
+        return current_version
+    
+    def rebuild_user_stats(self) -> int:
+        """Reconstruir la tabla user_stats desde exercise_results"""
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
+        
+            cursor.execute('DELETE FROM user_stats')
+            cursor.execute(REBUILD_USER_STATS_SQL)
+            rebuilt = cursor.rowcount
+        
+            return rebuilt
+
     def initialize_database(self):
         """Inicializar base de datos"""
         self.create_tables()
         print("Base de datos inicializada")
     
-    def register_user(self, username: str, email: str, password: str) -> Tuple[bool, str]:
-        """Registrar nuevo usuario con seguridad"""
+    def register_user(self, username: str, email: Optional[str], password: str) -> Tuple[bool, str]:
+        """Registrar nuevo usuario con seguridad (email opcional)"""
+        email = email or None
         try:
             # Verificar si usuario existe
-            cursor = self.conn.cursor()
-            cursor.execute(
-                'SELECT id FROM users WHERE username = ? OR email = ?',
-                (username, email)
-            )
-            if cursor.fetchone():
-                return False, 'El usuario o email ya existe'
+            with self.pool.reader() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    'SELECT id FROM users WHERE username = ? OR email = ?',
+                    (username, email)
+                )
+                if cursor.fetchone():
+                    return False, 'El usuario o email ya existe'
             
-            # Generar salt y hash de contraseña
+            # Generar salt y hash de contraseña (fuera del bloqueo de escritura)
             salt = os.urandom(32).hex()
             password_hash = self._hash_password(password, salt)
             
-            # Insertar usuario
-            created_at = datetime.now().isoformat()
-            cursor.execute('''
-                INSERT INTO users 
-                (username, email, password_hash, salt, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (username, email, password_hash, salt, created_at))
-            
-            user_id = cursor.lastrowid
-            
-            # Inicializar progreso por materias
-            subjects = ['Aritmética', 'Álgebra', 'Geometría', 'Cálculo', 'Estadística']
-            for subject in subjects:
-                cursor.execute('''
-                    INSERT INTO subject_progress 
-                    (user_id, subject, last_updated)
-                    VALUES (?, ?, ?)
-                ''', (user_id, subject, created_at))
+            with self.pool.writer() as conn:
+                self._insert_user(conn.cursor(), username, email, password_hash, salt)
             
-            # Crear logros iniciales
-            initial_achievements = [
-                ('first_login', 'Primer Inicio', 'Bienvenido a ASMET', '👋', 10),
-                ('profile_created', 'Perfil Creado', 'Has creado tu cuenta', '🎉', 20)
-            ]
-            
-            for ach_id, name, desc, icon, points in initial_achievements:
-                cursor.execute('''
-                    INSERT INTO achievements 
-                    (user_id, achievement_id, name, description, icon, points)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (user_id, ach_id, name, desc, icon, points))
-            
-            self.conn.commit()
             return True, 'Usuario registrado exitosamente'
             
         except Exception as e:
             return False, f'Error en registro: {str(e)}'
     
+    def _insert_user(self, cursor, username: str, email: str,
+                     password_hash: str, salt: str) -> int:
+        """Insertar usuario con sus materias y logros iniciales"""
+        created_at = datetime.now().isoformat()
+        cursor.execute('''
+            INSERT INTO users 
+            (username, email, password_hash, salt, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (username, email, password_hash, salt, created_at))
+        
+        user_id = cursor.lastrowid
+        
+        # Inicializar progreso por materias
+        subjects = ['Aritmética', 'Álgebra', 'Geometría', 'Cálculo', 'Estadística']
+        cursor.executemany('''
+            INSERT INTO subject_progress 
+            (user_id, subject, last_updated)
+            VALUES (?, ?, ?)
+        ''', [(user_id, subject, created_at) for subject in subjects])
+        
+        # Crear logros iniciales
+        initial_achievements = [
+            ('first_login', 'Primer Inicio', 'Bienvenido a ASMET', '👋', 10),
+            ('profile_created', 'Perfil Creado', 'Has creado tu cuenta', '🎉', 20)
+        ]
+        
+        cursor.executemany('''
+            INSERT INTO achievements 
+            (user_id, achievement_id, name, description, icon, points)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(user_id,) + achievement for achievement in initial_achievements])
+        
+        return user_id
+    
+    def register_user_async(self, username: str, email: str, password: str,
+                            callback: Optional[Callable] = None) -> Future:
+        """Registrar usuario en segundo plano; callback((éxito, mensaje))"""
+        return self.hasher.submit(
+            self.register_user, username, email, password, callback=callback
+        )
+    
+    def register_users_bulk(self, accounts: Iterable[Tuple[str, str, str]]) -> List[Tuple[bool, str]]:
+        """Registrar muchas cuentas (usuario, email, contraseña) en paralelo
+        
+        Los hashes se calculan en todos los núcleos y las inserciones van en
+        una sola transacción; un duplicado no aborta el resto del lote.
+        """
+        accounts = list(accounts)
+        salts = [os.urandom(32).hex() for _ in accounts]
+        hashes = self.hasher.hash_many(
+            (password, salt) for (_, _, password), salt in zip(accounts, salts)
+        )
+        
+        results = []
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
+            for (username, email, _), salt, password_hash in zip(accounts, salts, hashes):
+                cursor.execute('SAVEPOINT bulk_user')
+                try:
+                    self._insert_user(cursor, username, email or None, password_hash, salt)
+                    cursor.execute('RELEASE SAVEPOINT bulk_user')
+                    results.append((True, 'Usuario registrado exitosamente'))
+                except sqlite3.IntegrityError:
+                    cursor.execute('ROLLBACK TO SAVEPOINT bulk_user')
+                    cursor.execute('RELEASE SAVEPOINT bulk_user')
+                    results.append((False, 'El usuario o email ya existe'))
+        
+        return results
+    
     def authenticate_user(self, identifier: str, password: str) -> Optional[User]:
         """Autenticar usuario por username o email"""
         try:
-            cursor = self.conn.cursor()
-            
             # Buscar usuario por username o email
-            cursor.execute('''
-                SELECT * FROM users 
-                WHERE (username = ? OR email = ?) AND is_active = 1
-            ''', (identifier, identifier))
+            with self.pool.reader() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT * FROM users 
+                    WHERE (username = ? OR email = ?) AND is_active = 1
+                ''', (identifier, identifier))
+                
+                user_data = cursor.fetchone()
             
-            user_data = cursor.fetchone()
             if not user_data:
                 return None
             
@@ -309,10 +772,11 @@ class DatabaseManager:
                 return None
             
             # Actualizar último login
-            cursor.execute('''
-                UPDATE users SET last_login = ? WHERE id = ?
-            ''', (datetime.now().isoformat(), user_data['id']))
-            self.conn.commit()
+            last_login = datetime.now()
+            with self.pool.writer() as conn:
+                conn.execute('''
+                    UPDATE users SET last_login = ? WHERE id = ?
+                ''', (last_login.isoformat(), user_data['id']))
             
             # Crear objeto User
             return User(
@@ -324,200 +788,506 @@ class DatabaseManager:
                 coins=user_data['coins'],
                 overall_progress=user_data['overall_progress'],
                 created_at=datetime.fromisoformat(user_data['created_at']),
-                last_login=datetime.fromisoformat(user_data['last_login'])
+                last_login=last_login
             )
             
         except Exception as e:
             print(f"Error en autenticación: {e}")
             return None
     
+    def authenticate_user_async(self, identifier: str, password: str,
+                                callback: Optional[Callable] = None) -> Future:
+        """Autenticar en segundo plano; callback(User o None) al terminar
+        
+        El callback se ejecuta en el hilo del pool: desde Kivy hay que
+        reenviarlo al hilo principal con Clock.schedule_once.
+        """
+        return self.hasher.submit(
+            self.authenticate_user, identifier, password, callback=callback
+        )
+    
     def get_subject_progress(self, user_id: int) -> List[Tuple[str, float]]:
         """Obtener progreso por materia"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT subject, progress 
-            FROM subject_progress 
-            WHERE user_id = ?
-            ORDER BY progress DESC
-        ''', (user_id,))
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT subject, progress 
+                FROM subject_progress 
+                WHERE user_id = ?
+                ORDER BY progress DESC
+            ''', (user_id,))
         
-        return [(row['subject'], row['progress']) for row in cursor.fetchall()]
+            return [(row['subject'], row['progress']) for row in cursor.fetchall()]
+    
+    def _get_user_aggregates(self, user_id: int) -> Optional[sqlite3.Row]:
+        """Una sola búsqueda por clave primaria sobre users y user_stats"""
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT 
+                    u.total_points,
+                    u.streak_days,
+                    COALESCE(s.total_time, 0) as total_time,
+                    COALESCE(s.exercises_done, 0) as exercises_done,
+                    COALESCE(s.correct_count, 0) as correct
+                FROM users u
+                LEFT JOIN user_stats s ON s.user_id = u.id
+                WHERE u.id = ?
+            ''', (user_id,))
+            return cursor.fetchone()
     
     def get_study_stats(self, user_id: int) -> Dict:
         """Obtener estadísticas de estudio"""
-        cursor = self.conn.cursor()
+        stats = self._get_user_aggregates(user_id)
         
-        # Tiempo total de estudio
-        cursor.execute('''
-            SELECT SUM(time_spent) as total_time
-            FROM exercise_results 
-            WHERE user_id = ?
-        ''', (user_id,))
-        total_time = cursor.fetchone()['total_time'] or 0
+        if not stats:
+            return {'total_time': 0, 'exercises_done': 0, 'accuracy': 0, 'streak': 0}
         
-        # Ejercicios completados
-        cursor.execute('''
-            SELECT COUNT(*) as exercises_done
-            FROM exercise_results 
-            WHERE user_id = ?
-        ''', (user_id,))
-        exercises_done = cursor.fetchone()['exercises_done']
+        exercises_done = stats['exercises_done']
+        accuracy = (stats['correct'] / exercises_done * 100) if exercises_done > 0 else 0
         
-        # Precisión
-        cursor.execute('''
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) as correct
-            FROM exercise_results 
-            WHERE user_id = ?
-        ''', (user_id,))
-        stats = cursor.fetchone()
-        accuracy = (stats['correct'] / stats['total'] * 100) if stats['total'] > 0 else 0
-        
-        # Racha actual
-        cursor.execute('''
-            SELECT streak_days 
-            FROM users 
-            WHERE id = ?
-        ''', (user_id,))
-        streak = cursor.fetchone()['streak_days']
+        return {
+            'total_time': stats['total_time'] // 60,  # Convertir a horas
+            'exercises_done': exercises_done,
+            'accuracy': round(accuracy, 1),
+            'streak': stats['streak_days']
+        }
+    
+    def get_user_stats(self, user_id: int) -> Dict:
+        """Obtener estadísticas del usuario para el dashboard"""
+        stats = self._get_user_aggregates(user_id)
+        
+        if not stats:
+            return {'exercises_done': 0, 'accuracy': 0, 'total_points': 0, 'level': 1}
+        
+        exercises_done = stats['exercises_done']
+        accuracy = (stats['correct'] / exercises_done * 100) if exercises_done > 0 else 0
+        total_points = stats['total_points'] or 0
         
         return {
-            'total_time': total_time // 60,  # Convertir a horas
             'exercises_done': exercises_done,
             'accuracy': round(accuracy, 1),
-            'streak': streak
+            'total_points': total_points,
+            'level': 1 + (total_points // 100)  # 1 nivel cada 100 puntos
         }
     
+    def get_rankings(self, limit: int = 10) -> List[Dict]:
+        """Obtener ranking general por puntos"""
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, username, total_points, level
+                FROM users INDEXED BY idx_users_ranking
+                ORDER BY total_points DESC, id
+                LIMIT ?
+            ''', (limit,))
+            
+            return [
+                {
+                    'position': i,
+                    'user_id': row['id'],
+                    'username': row['username'],
+                    'points': row['total_points'],
+                    'level': row['level']
+                }
+                for i, row in enumerate(cursor.fetchall(), 1)
+            ]
+    
+    def get_user_rank(self, user_id: int) -> Optional[int]:
+        """Obtener la posición de un usuario en el ranking (1 = primero)
+        
+        Coste lineal en el número de totales distintos por encima del
+        usuario (points_histogram) más los empatados con él, no en su
+        posición: el último de un millón de usuarios no recorre todo el
+        índice. Ver benchmarks/bench_indexes.py (primer y último puesto).
+        """
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COALESCE(total_points, 0) FROM users WHERE id = ?', (user_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            
+            # Usuarios con más puntos desde el histograma; el empate se
+            # resuelve por id sobre idx_users_ranking, igual que en get_rankings
+            cursor.execute('''
+                SELECT
+                    (SELECT COALESCE(SUM(users), 0) FROM points_histogram
+                     WHERE total_points > ?) +
+                    (SELECT COUNT(*) FROM users INDEXED BY idx_users_ranking
+                     WHERE total_points = ? AND id < ?)
+            ''', (row[0], row[0], user_id))
+            
+            return cursor.fetchone()[0] + 1
+    
+    def get_item_parameters(self) -> Dict[str, Tuple[float, float, float]]:
+        """Parámetros TRI calibrados: item_id -> (a, b, c)"""
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT item_id, a, b, c FROM item_parameters')
+            return {row['item_id']: (row['a'], row['b'], row['c']) for row in cursor.fetchall()}
+    
+    def save_questions(self, bank_topic: str, rows: Iterable[Dict]) -> int:
+        """Insertar o actualizar preguntas de un tema y subir la versión del banco"""
+        now = datetime.now().isoformat()
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT OR REPLACE INTO questions
+                (id, bank_topic, topic, type, text, correct_answer, options,
+                 hint, points, difficulty, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                (row['id'], bank_topic, row.get('topic'), row['type'], row['text'],
+                 row['correct_answer'],
+                 json.dumps(row['options']) if row.get('options') else None,
+                 row.get('hint'), row.get('points', 10), row.get('difficulty', 1), now)
+                for row in rows
+            ))
+            saved = cursor.rowcount
+            
+            # Los bancos cargados detectan el cambio y se recargan
+            cursor.execute('''
+                INSERT INTO app_settings (key, value, updated_at) VALUES ('question_bank_version', '1', ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    value = CAST(value AS INTEGER) + 1,
+                    updated_at = excluded.updated_at
+            ''', (now,))
+            return saved
+    
+    def get_question_bank_version(self) -> int:
+        """Versión del banco de preguntas (cambia con save_questions)"""
+        with self.pool.reader() as conn:
+            row = conn.execute(
+                "SELECT value FROM app_settings WHERE key = 'question_bank_version'"
+            ).fetchone()
+            return int(row['value']) if row else 0
+    
+    def get_question_topics(self) -> List[str]:
+        """Temas del banco de preguntas"""
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT DISTINCT bank_topic FROM questions ORDER BY bank_topic')
+            return [row['bank_topic'] for row in cursor.fetchall()]
+    
+    def get_questions_page(self, bank_topic: str, after_id: str = '',
+                           limit: int = 500) -> List[Dict]:
+        """Página de preguntas de un tema con id mayor que `after_id`"""
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, topic, type, text, correct_answer, options, hint, points, difficulty
+                FROM questions
+                WHERE bank_topic = ? AND id > ?
+                ORDER BY id
+                LIMIT ?
+            ''', (bank_topic, after_id, limit))
+            
+            rows = []
+            for row in cursor.fetchall():
+                question = dict(row)
+                question['options'] = json.loads(row['options']) if row['options'] else None
+                rows.append(question)
+            return rows
+    
     def get_lesson(self, lesson_id: int) -> Optional[Dict]:
         """Obtener lección completa"""
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM lessons WHERE id = ?', (lesson_id,))
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM lessons WHERE id = ?', (lesson_id,))
         
-        lesson = cursor.fetchone()
-        if not lesson:
-            return None
+            lesson = cursor.fetchone()
+            if not lesson:
+                return None
         
-        # Convertir JSON strings a objetos
-        examples = json.loads(lesson['examples']) if lesson['examples'] else []
-        exercises = json.loads(lesson['exercises']) if lesson['exercises'] else []
+            # Convertir JSON strings a objetos
+            examples = json.loads(lesson['examples']) if lesson['examples'] else []
+            exercises = json.loads(lesson['exercises']) if lesson['exercises'] else []
         
-        return {
-            'id': lesson['id'],
-            'title': lesson['title'],
-            'topic': lesson['topic'],
-            'difficulty': lesson['difficulty'],
-            'content': lesson['content'],
-            'examples': examples,
-            'exercises': exercises,
-            'video_url': lesson['video_url'],
-            'estimated_time': lesson['estimated_time'],
-            'points_reward': lesson['points_reward']
-        }
+            return {
+                'id': lesson['id'],
+                'title': lesson['title'],
+                'topic': lesson['topic'],
+                'difficulty': lesson['difficulty'],
+                'content': lesson['content'],
+                'examples': examples,
+                'exercises': exercises,
+                'video_url': lesson['video_url'],
+                'estimated_time': lesson['estimated_time'],
+                'points_reward': lesson['points_reward']
+            }
     
     def toggle_bookmark(self, user_id: int, lesson_id: int, bookmark: bool):
         """Agregar o remover bookmark"""
-        cursor = self.conn.cursor()
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
         
-        if bookmark:
-            # Agregar bookmark
-            cursor.execute('''
-                INSERT OR IGNORE INTO bookmarks 
-                (user_id, lesson_id, created_at)
-                VALUES (?, ?, ?)
-            ''', (user_id, lesson_id, datetime.now().isoformat()))
-        else:
-            # Remover bookmark
-            cursor.execute('''
-                DELETE FROM bookmarks 
-                WHERE user_id = ? AND lesson_id = ?
-            ''', (user_id, lesson_id))
+            if bookmark:
+                # Agregar bookmark
+                cursor.execute('''
+                    INSERT OR IGNORE INTO bookmarks 
+                    (user_id, lesson_id, created_at)
+                    VALUES (?, ?, ?)
+                ''', (user_id, lesson_id, datetime.now().isoformat()))
+            else:
+                # Remover bookmark
+                cursor.execute('''
+                    DELETE FROM bookmarks 
+                    WHERE user_id = ? AND lesson_id = ?
+                ''', (user_id, lesson_id))
+    
+    def save_exercise_result(self, user_id: int, exercise_type: str,
+                             correct: bool, points: int, time_spent: int,
+                             exercise_id: str = None, user_answer: str = None,
+                             correct_answer: str = None, difficulty: str = None,
+                             topic: str = None):
+        """Guardar resultado de ejercicio y sumar puntos al usuario"""
+        timestamp = datetime.now().isoformat()
+        operations = [
+            ('''
+                INSERT INTO exercise_results 
+                (user_id, exercise_id, exercise_type, correct, user_answer,
+                 correct_answer, time_spent, points_earned, difficulty, topic, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                user_id,
+                exercise_id or exercise_type,
+                exercise_type,
+                correct,
+                user_answer,
+                correct_answer,
+                time_spent,
+                points if correct else 0,
+                difficulty,
+                topic,
+                timestamp
+            ))
+        ]
         
-        self.conn.commit()
+        if correct and points:
+            operations.append((
+                'UPDATE users SET total_points = total_points + ? WHERE id = ?',
+                (points, user_id)
+            ))
+        
+        if self.write_queue:
+            for sql, params in operations:
+                self.write_queue.enqueue(sql, params)
+        else:
+            self._write_batch(operations)
+    
+    def _write_batch(self, operations: List[Tuple[str, tuple]]):
+        """Ejecutar varias escrituras en una sola transacción"""
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
+            for sql, params in operations:
+                cursor.execute(sql, params)
+    
+    def flush(self) -> int:
+        """Escribir de inmediato los resultados pendientes de la cola diferida"""
+        if self.write_queue:
+            return self.write_queue.flush()
+        return 0
     
     def save_test_results(self, user_id: int, test_type: str, score: float, 
                          time_spent: int, weak_areas: List[str] = None):
         """Guardar resultados de test"""
-        cursor = self.conn.cursor()
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('''
-            INSERT INTO tests 
-            (user_id, test_type, score, time_spent, taken_at, weak_areas)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            user_id, 
-            test_type, 
-            score, 
-            time_spent,
-            datetime.now().isoformat(),
-            json.dumps(weak_areas) if weak_areas else '[]'
-        ))
+            cursor.execute('''
+                INSERT INTO tests 
+                (user_id, test_type, score, time_spent, taken_at, weak_areas)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (
+                user_id, 
+                test_type, 
+                score, 
+                time_spent,
+                datetime.now().isoformat(),
+                json.dumps(weak_areas) if weak_areas else '[]'
+            ))
         
-        # Actualizar progreso del usuario
-        cursor.execute('''
-            UPDATE users 
-            SET total_points = total_points + ?,
-                overall_progress = overall_progress + 0.5
-            WHERE id = ?
-        ''', (int(score), user_id))
+            # Actualizar progreso del usuario
+            cursor.execute('''
+                UPDATE users 
+                SET total_points = total_points + ?,
+                    overall_progress = overall_progress + 0.5
+                WHERE id = ?
+            ''', (int(score), user_id))
+    
+    def save_test_results_many(self, results: List[Dict],
+                               graded_sessions: Iterable[str] = ()) -> int:
+        """Guardar muchos tests en una transacción (calificación en lote)
         
-        self.conn.commit()
+        Cada resultado: user_id, test_type, score, total_questions,
+        correct_answers, time_spent, taken_at y weak_areas. Un resultado con
+        session_id ya registrado en graded_sessions se omite, así volver a
+        calificar el mismo archivo no duplica tests ni puntos. Las respuestas
+        de offline_answers de `graded_sessions` quedan calificadas en la
+        misma transacción. Devuelve cuántos tests se guardaron.
+        """
+        now = datetime.now().isoformat()
+        
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
+            
+            # Reservar cada sesión; si ya estaba, el resultado no se guarda
+            new_results = []
+            for result in results:
+                if result.get('session_id') is not None:
+                    cursor.execute('''
+                        INSERT OR IGNORE INTO graded_sessions (session_id, graded_at)
+                        VALUES (?, ?)
+                    ''', (result['session_id'], now))
+                    if not cursor.rowcount:
+                        continue
+                new_results.append(result)
+            results = new_results
+            
+            progress: Dict[int, List] = {}
+            for result in results:
+                user = progress.setdefault(result['user_id'], [0, 0.0])
+                user[0] += int(result['score'])
+                user[1] += 0.5
+            
+            cursor.executemany('''
+                INSERT INTO tests 
+                (user_id, test_type, score, total_questions, correct_answers,
+                 time_spent, taken_at, weak_areas)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                (r['user_id'], r['test_type'], r['score'], r['total_questions'],
+                 r['correct_answers'], r['time_spent'], r.get('taken_at') or now,
+                 json.dumps(r['weak_areas']))
+                for r in results
+            ))
+            
+            # Lo mismo que save_test_results, sumado por usuario
+            cursor.executemany('''
+                UPDATE users 
+                SET total_points = total_points + ?,
+                    overall_progress = overall_progress + ?
+                WHERE id = ?
+            ''', ((points, amount, user_id) for user_id, (points, amount) in progress.items()))
+            
+            cursor.executemany('''
+                UPDATE offline_answers SET graded_at = ?
+                WHERE session_id = ? AND graded_at IS NULL
+            ''', ((now, session_id) for session_id in graded_sessions))
+        return len(results)
+    
+    def save_offline_answers(self, records: Iterable[Tuple]) -> int:
+        """Registrar respuestas sin calificar: (session_id, user_id, test_type,
+        item_id, answer, time_spent, taken_at)"""
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT INTO offline_answers
+                (session_id, user_id, test_type, item_id, answer, time_spent, taken_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', records)
+            return cursor.rowcount
     
     def get_pending_notifications(self, user_id: int) -> List[Dict]:
         """Obtener notificaciones pendientes"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT * FROM notifications 
-            WHERE user_id = ? AND read = 0
-            ORDER BY created_at DESC
-            LIMIT 10
-        ''', (user_id,))
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM notifications 
+                WHERE user_id = ? AND read = 0
+                ORDER BY created_at DESC
+                LIMIT 10
+            ''', (user_id,))
         
-        return [dict(row) for row in cursor.fetchall()]
+            return [dict(row) for row in cursor.fetchall()]
     
     def save_user_state(self, user_id: int, state: Dict):
         """Guardar estado del usuario"""
-        cursor = self.conn.cursor()
-        
-        # Convertir estado a JSON
-        state_json = json.dumps(state)
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('''
-            INSERT OR REPLACE INTO app_settings (key, value, updated_at)
-            VALUES (?, ?, ?)
-        ''', (f'user_state_{user_id}', state_json, datetime.now().isoformat()))
+            # Convertir estado a JSON
+            state_json = json.dumps(state)
         
-        self.conn.commit()
+            cursor.execute('''
+                INSERT OR REPLACE INTO app_settings (key, value, updated_at)
+                VALUES (?, ?, ?)
+            ''', (f'user_state_{user_id}', state_json, datetime.now().isoformat()))
     
     def has_saved_user(self) -> bool:
         """Verificar si hay usuario guardado"""
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT COUNT(*) as count FROM users WHERE is_active = 1')
-        return cursor.fetchone()['count'] > 0
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) as count FROM users WHERE is_active = 1')
+            return cursor.fetchone()['count'] > 0
     
     def get_last_user(self) -> Dict:
         """Obtener último usuario activo"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT * FROM users 
-            WHERE is_active = 1 
-            ORDER BY last_login DESC 
-            LIMIT 1
-        ''')
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM users 
+                WHERE is_active = 1 
+                ORDER BY last_login DESC 
+                LIMIT 1
+            ''')
         
-        user_data = cursor.fetchone()
-        return dict(user_data) if user_data else {}
+            user_data = cursor.fetchone()
+            return dict(user_data) if user_data else {}
     
     def _hash_password(self, password: str, salt: str) -> str:
         """Generar hash seguro de contraseña"""
-        return hashlib.pbkdf2_hmac(
-            'sha256',
-            password.encode('utf-8'),
-            salt.encode('utf-8'),
-            100000
-        ).hex()
+        return hash_password(password, salt)
     
     def close(self):
-        """Cerrar conexión a la base de datos"""
-        if self.conn:
-            self.conn.close()
\ No newline at end of file
+        """Cerrar conexiones a la base de datos"""
+        try:
+            # Un lote que no se pudo escribir no impide cerrar las conexiones
+            if self.write_queue:
+                queue, self.write_queue = self.write_queue, None
+                queue.close()
+        finally:
+            self.hasher.shutdown()
+            
+            if self.pool:
+                self.pool.close()
+                self.pool = None
+                self.conn = None
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Herramientas de mantenimiento de la base de datos ASMET')
+    parser.add_argument('command', choices=['migrate', 'rebuild-stats', 'calibrate', 'import-questions'])
+    parser.add_argument('--db', default='asmet_data.db', help='Ruta de la base de datos')
+    parser.add_argument('--full', action='store_true',
+                        help='calibrate: recalibrar con todo el historial')
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    try:
+        if args.command == 'migrate':
+            for version, description in db.applied_migrations:
+                print(f"Migración {version} aplicada: {description}")
+            print(f"Esquema en versión {db.get_schema_version()}")
+        elif args.command == 'rebuild-stats':
+            rebuilt = db.rebuild_user_stats()
+            print(f"Estadísticas reconstruidas para {rebuilt} usuarios")
+        elif args.command == 'calibrate':
+            # NumPy sólo hace falta para este trabajo fuera de línea
+            from calibration import ItemCalibrator
+            report = ItemCalibrator(db).run(full=args.full)
+            print(f"Calibración: {report['responses']} respuestas, "
+                  f"{report['items_updated']} ítems actualizados "
+                  f"en {report['seconds']:.1f} s")
+        elif args.command == 'import-questions':
+            # Copiar content/questions a la tabla questions (bancos grandes)
+            from question_bank import JsonQuestionSource
+            source = JsonQuestionSource()
+            for topic in source.topics():
+                saved = db.save_questions(topic, source.rows(topic))
+                print(f"{topic}: {saved} preguntas")
+    finally:
+        db.close()
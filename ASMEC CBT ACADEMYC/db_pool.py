@@ -0,0 +1,116 @@
+import sqlite3
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Pragmas por defecto, pensados para un dispositivo móvil con poca memoria
+DEFAULT_PRAGMAS = {
+    'synchronous': 'NORMAL',      # Seguro en WAL: sólo fsync en checkpoints
+    'cache_size': -8000,          # ~8 MB de caché de páginas por conexión
+    'mmap_size': 64 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+class ConnectionPool:
+    """Pool de conexiones SQLite: un escritor y N lectores en modo WAL
+
+    Con read_only=True ninguna conexión escribe (tampoco se cambia el modo
+    de journal del archivo).
+    """
+
+    def __init__(self, db_path: str, readers: int = 3,
+                 pragmas: Optional[Dict] = None,
+                 row_factory=sqlite3.Row, read_only: bool = False):
+        self.db_path = db_path
+        self.row_factory = row_factory
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        self.pragmas.update(pragmas or {})
+
+        # Una base de datos en memoria no se puede compartir entre conexiones
+        self.in_memory = db_path == ':memory:'
+
+        self._write_lock = threading.RLock()
+        # Contador de transacciones confirmadas por el escritor
+        self.write_version = 0
+        # Sentencias ejecutadas en el hilo principal (ver track_main_thread)
+        self.main_thread_queries = 0
+        self._writer = self._open_connection(read_only=read_only)
+        self.journal_mode = self._writer.execute(
+            'PRAGMA journal_mode' if read_only else 'PRAGMA journal_mode = WAL'
+        ).fetchone()[0]
+
+        self._readers = queue.Queue()
+        self._all_readers = []
+        if not self.in_memory:
+            for _ in range(max(1, readers)):
+                conn = self._open_connection(read_only=True)
+                self._all_readers.append(conn)
+                self._readers.put(conn)
+
+    def _open_connection(self, read_only: bool = False) -> sqlite3.Connection:
+        """Abrir una conexión y aplicar los pragmas configurados"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = self.row_factory
+
+        for name, value in self.pragmas.items():
+            # Los pragmas no admiten parámetros; los valores vienen de la configuración
+            conn.execute(f'PRAGMA {name} = {value}')
+
+        if read_only:
+            conn.execute('PRAGMA query_only = ON')
+
+        return conn
+
+    def track_main_thread(self, warn: bool = True):
+        """Contar las sentencias que se ejecutan en el hilo principal (UI)"""
+        main_thread = threading.main_thread()
+        
+        def trace(statement: str):
+            if threading.current_thread() is main_thread:
+                self.main_thread_queries += 1
+                if warn:
+                    print(f"[DB] Consulta en el hilo principal: {' '.join(statement.split())[:80]}")
+        
+        for conn in [self._writer] + self._all_readers:
+            conn.set_trace_callback(trace)
+    
+    @property
+    def writer_connection(self) -> sqlite3.Connection:
+        """Conexión de escritura (usar bajo writer() si hay otros hilos)"""
+        return self._writer
+
+    @contextmanager
+    def writer(self):
+        """Obtener la conexión de escritura en exclusiva; commit al salir"""
+        with self._write_lock:
+            try:
+                yield self._writer
+                self._writer.commit()
+                self.write_version += 1
+            except Exception:
+                self._writer.rollback()
+                raise
+
+    @contextmanager
+    def reader(self):
+        """Obtener una conexión de lectura; en WAL nunca espera al escritor"""
+        if self.in_memory:
+            with self._write_lock:
+                yield self._writer
+            return
+
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def close(self):
+        """Cerrar todas las conexiones del pool"""
+        for conn in self._all_readers:
+            conn.close()
+        self._all_readers = []
+
+        with self._write_lock:
+            self._writer.close()
@@ -0,0 +1,81 @@
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+class DatabaseWorker:
+    """Hilo dedicado a la base de datos con una cola de peticiones
+
+    Las peticiones se ejecutan una a una, en el orden en que llegan, fuera
+    del hilo de la UI. Cada resultado se entrega a su callback a través de
+    `dispatch`; en la app es Clock.schedule_once, así el callback corre en
+    el hilo principal y puede tocar widgets. Si la petición falla se
+    entrega la excepción a su errback, por el mismo camino.
+    """
+
+    def __init__(self, dispatch: Optional[Callable[[Callable[[], None]], None]] = None):
+        self.dispatch = dispatch or (lambda fn: fn())
+        self._requests = queue.Queue()
+        self._closed = False
+
+        self.requests_done = 0
+
+        self._thread = threading.Thread(target=self._run, name='db-worker', daemon=True)
+        self._thread.start()
+
+    def submit(self, fn: Callable, *args,
+               callback: Optional[Callable] = None,
+               errback: Optional[Callable[[Exception], None]] = None) -> Future:
+        """Encolar fn(*args); callback(resultado) o errback(excepción) se entrega con dispatch"""
+        if self._closed:
+            raise RuntimeError('El hilo de base de datos está cerrado')
+
+        future = Future()
+        self._requests.put((future, fn, args, callback, errback))
+        return future
+
+    def pending_count(self) -> int:
+        """Número de peticiones en cola"""
+        return self._requests.qsize()
+
+    def _run(self):
+        """Bucle del hilo: ejecutar peticiones hasta recibir la señal de cierre"""
+        while True:
+            request = self._requests.get()
+            if request is None:
+                break
+
+            future, fn, args, callback, errback = request
+            try:
+                result = fn(*args)
+            except Exception as e:
+                print(f"Error en tarea de base de datos: {e}")
+                future.set_exception(e)
+                if errback:
+                    self.dispatch(self._deliver(errback, e))
+                continue
+            finally:
+                self.requests_done += 1
+
+            future.set_result(result)
+            if callback:
+                self.dispatch(self._deliver(callback, result))
+
+    @staticmethod
+    def _deliver(callback: Callable, result) -> Callable[[], None]:
+        """Envolver la entrega del resultado (fija callback y resultado)"""
+        def deliver():
+            try:
+                callback(result)
+            except Exception as e:
+                print(f"Error en callback de base de datos: {e}")
+        return deliver
+
+    def close(self, timeout: Optional[float] = None):
+        """Terminar las peticiones pendientes y detener el hilo"""
+        if self._closed:
+            return
+
+        self._closed = True
+        self._requests.put(None)
+        self._thread.join(timeout=timeout)
@@ -0,0 +1,156 @@
+import csv
+from typing import Dict, Iterator, List, Optional, TextIO
+
+import numpy as np
+
+from exercise_templates import TEMPLATES, ExerciseTemplate
+
+# Columnas de la exportación, en orden
+EXPORT_COLUMNS = ('id', 'topic', 'difficulty', 'points', 'template', 'problem', 'solution')
+
+def new_seed() -> int:
+    """Semilla aleatoria para una secuencia de ejercicios (y sus ids)
+
+    Se conservan los 128 bits de entropía del sistema: con menos, dos
+    procesos que generan en lote podrían repetir semilla y, con ella, ids.
+    """
+    return int(np.random.SeedSequence().entropy)
+
+def id_prefix(topic: str, difficulty: int, seed: int) -> str:
+    """Prefijo de los ids de una secuencia: '<tema>-<nivel>-<semilla>-'"""
+    return f"{topic}-{difficulty}-{seed}-"
+
+class ExerciseBatch:
+    """Lote de ejercicios en columnas (arreglos de NumPy del mismo largo)
+
+    Pensado para volcarse directamente: question_rows() alimenta
+    DatabaseManager.save_questions y write_csv() un archivo de exportación.
+    """
+
+    def __init__(self, topic: str, difficulty: int, points: int, ids: np.ndarray,
+                 templates: np.ndarray, problems: np.ndarray, solutions: np.ndarray):
+        self.topic = topic
+        self.difficulty = difficulty
+        self.points = points
+        self.ids = ids
+        self.templates = templates
+        self.problems = problems
+        self.solutions = solutions
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def question_rows(self) -> Iterator[Dict]:
+        """Filas con el formato del banco de preguntas (tabla questions)"""
+        for exercise_id, problem, solution in zip(self.ids.tolist(), self.problems.tolist(),
+                                                  self.solutions.tolist()):
+            yield {
+                'id': exercise_id,
+                'type': 'calculation',
+                'text': problem,
+                'correct_answer': solution,
+                'points': self.points,
+                'difficulty': self.difficulty,
+                'topic': self.topic,
+            }
+
+    def write_csv(self, file: TextIO, header: bool = True):
+        """Escribir el lote como CSV (EXPORT_COLUMNS)"""
+        writer = csv.writer(file)
+        if header:
+            writer.writerow(EXPORT_COLUMNS)
+        n = len(self)
+        writer.writerows(zip(
+            self.ids.tolist(), [self.topic] * n, [self.difficulty] * n, [self.points] * n,
+            self.templates.tolist(), self.problems.tolist(), self.solutions.tolist()
+        ))
+
+class ExerciseBatchGenerator:
+    """Generador de lotes para un tema y una dificultad
+
+    Sortea todas las variables de un lote como columnas y resuelve cada
+    plantilla de forma vectorizada. Con la misma semilla se obtienen los
+    mismos ejercicios y los mismos ids ('<tema>-<nivel>-<semilla>-<n>'),
+    únicos dentro de la secuencia del generador.
+    """
+
+    def __init__(self, topic: str, difficulty: int, seed: Optional[int] = None,
+                 templates: Optional[List[ExerciseTemplate]] = None):
+        # Sin plantillas para el nivel pedido se baja de nivel, como
+        # AdaptiveExerciseGenerator
+        if templates is None:
+            levels = TEMPLATES.get(topic, {})
+            while not levels.get(difficulty) and difficulty > 1:
+                difficulty -= 1
+            templates = levels.get(difficulty, [])
+        if not templates:
+            raise ValueError(f"No hay plantillas para el tema '{topic}'")
+
+        self.topic = topic
+        self.difficulty = difficulty
+        self.templates = templates
+        self.seed = seed if seed is not None else new_seed()
+        self.rng = np.random.default_rng(self.seed)
+        self.prefix = id_prefix(topic, difficulty, self.seed)
+        self.generated = 0
+
+    def generate(self, n: int) -> ExerciseBatch:
+        """Siguiente lote de `n` ejercicios"""
+        choice = self.rng.integers(0, len(self.templates), size=n)
+        problems = np.empty(n, dtype=object)
+        solutions = np.empty(n, dtype=object)
+
+        for index, template in enumerate(self.templates):
+            rows = np.flatnonzero(choice == index)
+            if not len(rows):
+                continue
+            values = template.sample_batch(len(rows), self.rng)
+            problems[rows] = template.render_batch(values)
+            solutions[rows] = template.solve_batch(values)
+
+        numbers = np.arange(self.generated + 1, self.generated + n + 1)
+        ids = np.char.add(self.prefix, numbers.astype(str))
+        self.generated += n
+        return ExerciseBatch(self.topic, self.difficulty, self.difficulty * 10,
+                             ids, choice, problems, solutions)
+
+    def stream(self, total: int, chunk_size: int = 5000) -> Iterator[ExerciseBatch]:
+        """`total` ejercicios en lotes de `chunk_size` (memoria acotada)"""
+        remaining = total
+        while remaining > 0:
+            size = min(chunk_size, remaining)
+            remaining -= size
+            yield self.generate(size)
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='Generar ejercicios en lote (simulacros, hojas de trabajo)')
+    parser.add_argument('topic', choices=sorted(TEMPLATES))
+    parser.add_argument('--difficulty', type=int, default=1, help='Nivel 1-4')
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=None, help='Semilla (reproduce ejercicios e ids)')
+    parser.add_argument('--csv', help='Archivo CSV de salida (por defecto, la salida estándar)')
+    parser.add_argument('--db', help='Guardar en la tabla questions de esta base de datos')
+    args = parser.parse_args()
+
+    generator = ExerciseBatchGenerator(args.topic, args.difficulty, args.seed)
+    if args.db:
+        from database import DatabaseManager
+        db = DatabaseManager(args.db)
+        try:
+            saved = sum(db.save_questions(args.topic, batch.question_rows())
+                        for batch in generator.stream(args.count))
+        finally:
+            db.close()
+        print(f"{saved} ejercicios guardados (semilla {generator.seed})", file=sys.stderr)
+    else:
+        out = open(args.csv, 'w', newline='', encoding='utf-8') if args.csv else sys.stdout
+        try:
+            for number, batch in enumerate(generator.stream(args.count)):
+                batch.write_csv(out, header=number == 0)
+        finally:
+            if args.csv:
+                out.close()
+        print(f"{args.count} ejercicios generados (semilla {generator.seed})", file=sys.stderr)
@@ -0,0 +1,118 @@
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable
+
+# generador(tipo_de_ejercicio, dificultad) -> problema
+ProblemGenerator = Callable[[str, int], Dict]
+
+class ExerciseBuffer:
+    """Búfer circular de problemas pre-generados por tipo de ejercicio
+
+    Un hilo de fondo mantiene `size` problemas listos para cada tipo pedido,
+    así "Siguiente" no espera al generador. Cambiar la dificultad vacía los
+    búferes y descarta lo que se estuviera generando con la anterior.
+    """
+
+    def __init__(self, generator: ProblemGenerator, size: int = 5,
+                 difficulty: int = 1):
+        self.generator = generator
+        self.size = max(1, size)
+        self.difficulty = difficulty
+
+        self._buffers: Dict[str, Deque[Dict]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        # Cambia al invalidar; un problema de otra generación se descarta
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+
+        self._thread = threading.Thread(target=self._run, name='exercise-buffer', daemon=True)
+        self._thread.start()
+
+    def prefetch(self, exercise_types: Iterable[str]):
+        """Empezar a llenar los búferes de estos tipos"""
+        with self._lock:
+            for exercise_type in exercise_types:
+                self._buffers.setdefault(exercise_type, deque(maxlen=self.size))
+        self._wakeup.set()
+
+    def take(self, exercise_type: str) -> Dict:
+        """Sacar el siguiente problema; si el búfer está vacío se genera aquí"""
+        with self._lock:
+            buffer = self._buffers.setdefault(exercise_type, deque(maxlen=self.size))
+            problem = buffer.popleft() if buffer else None
+            difficulty = self.difficulty
+
+        if problem is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            problem = self.generator(exercise_type, difficulty)
+
+        # Reponer el hueco mientras el usuario responde
+        self._wakeup.set()
+        return problem
+
+    def set_difficulty(self, difficulty: int):
+        """Cambiar la dificultad e invalidar los problemas ya generados"""
+        with self._lock:
+            if difficulty == self.difficulty:
+                return
+            self.difficulty = difficulty
+            self._generation += 1
+            for buffer in self._buffers.values():
+                buffer.clear()
+        self._wakeup.set()
+
+    def set_size(self, size: int):
+        """Cambiar el tamaño de los búferes (conserva los problemas que quepan)"""
+        with self._lock:
+            self.size = max(1, size)
+            for exercise_type, buffer in self._buffers.items():
+                self._buffers[exercise_type] = deque(buffer, maxlen=self.size)
+        self._wakeup.set()
+
+    def buffered_count(self, exercise_type: str) -> int:
+        """Problemas listos para un tipo"""
+        with self._lock:
+            return len(self._buffers.get(exercise_type, ()))
+
+    def _next_missing(self):
+        """Tipo con hueco libre y la dificultad/generación vigentes, o None"""
+        with self._lock:
+            for exercise_type, buffer in self._buffers.items():
+                if len(buffer) < self.size:
+                    return exercise_type, self.difficulty, self._generation
+        return None
+
+    def _run(self):
+        """Hilo de fondo: generar hasta llenar todos los búferes"""
+        while not self._closed:
+            self._wakeup.wait()
+            self._wakeup.clear()
+
+            while not self._closed:
+                missing = self._next_missing()
+                if missing is None:
+                    break
+
+                exercise_type, difficulty, generation = missing
+                try:
+                    problem = self.generator(exercise_type, difficulty)
+                except Exception as e:
+                    print(f"Error al pre-generar ejercicio: {e}")
+                    break
+
+                with self._lock:
+                    buffer = self._buffers[exercise_type]
+                    if generation == self._generation and len(buffer) < self.size:
+                        buffer.append(problem)
+
+    def close(self):
+        """Detener el hilo de fondo"""
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=1)
@@ -0,0 +1,348 @@
+import math
+import random
+import string
+from fractions import Fraction
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Rangos por defecto de cada variable (inclusive)
+DEFAULT_RANGES = {
+    'a': (1, 20), 'b': (1, 20), 'c': (1, 20), 'd': (1, 20),
+    'p': (5, 50),      # Porcentaje
+    'n': (50, 500),
+}
+OTHER_RANGE = (1, 100)
+LIST_SIZE = 5
+
+# Especificación de una variable: rango (min, max) o función (valores, rng) -> valor,
+# que puede depender de las variables anteriores. En los lotes la función
+# recibe columnas de NumPy: las derivadas (v['r'] + v['s']) sirven tal cual y
+# las que sortean implementan además batch(valores, rng, n)
+SlotSpec = Union[Tuple[int, int], Callable[[Dict, random.Random], object]]
+
+class Above:
+    """Variable mayor que otra: `name` + sorteo en [low, high]"""
+
+    __slots__ = ('name', 'low', 'high')
+
+    def __init__(self, name: str, low: int = 1, high: int = 9):
+        self.name, self.low, self.high = name, low, high
+
+    def __call__(self, values: Dict, rng: random.Random) -> int:
+        return values[self.name] + rng.randint(self.low, self.high)
+
+    def batch(self, values: Dict, rng: np.random.Generator, n: int) -> np.ndarray:
+        return values[self.name] + rng.integers(self.low, self.high + 1, size=n)
+
+class IntList:
+    """Lista de `size` enteros en [low, high]; en lotes, matriz (n x size)"""
+
+    __slots__ = ('size', 'low', 'high')
+
+    def __init__(self, size: int, low: int, high: int):
+        self.size, self.low, self.high = size, low, high
+
+    def __call__(self, values: Dict, rng: random.Random) -> List[int]:
+        return [rng.randint(self.low, self.high) for _ in range(self.size)]
+
+    def batch(self, values: Dict, rng: np.random.Generator, n: int) -> np.ndarray:
+        return rng.integers(self.low, self.high + 1, size=(n, self.size))
+
+def format_number(value) -> str:
+    """Número sin decimales innecesarios (6.0 -> '6', 2.5 -> '2.5')"""
+    # Caso más frecuente primero: isinstance con Fraction pasa por el ABC de numbers
+    if type(value) is int:
+        return str(value)
+    if isinstance(value, Fraction):
+        return str(value.numerator) if value.denominator == 1 else f"{value.numerator}/{value.denominator}"
+    if isinstance(value, float):
+        value = round(value, 2)
+        return str(int(value)) if value.is_integer() else str(value)
+    return str(value)
+
+def format_value(value) -> str:
+    """Valor tal como aparece en el enunciado"""
+    if type(value) is int:
+        return str(value)
+    if isinstance(value, list):
+        return ', '.join(format_number(v) for v in value)
+    return format_number(value)
+
+def format_column(column) -> List[str]:
+    """format_value aplicado a una columna (matriz: una lista por fila)"""
+    column = np.asarray(column)
+    if column.dtype.kind in 'US':
+        return column.tolist()
+    if column.ndim == 2:
+        return [', '.join(row) for row in np.asarray(column, dtype=str).tolist()]
+    if column.dtype.kind == 'f':
+        column = np.round(column, 2)
+        whole = column == np.floor(column)
+        text = column.astype(str).astype(object)
+        text[whole] = column[whole].astype(np.int64).astype(str)
+        return text.tolist()
+    return column.astype(str).tolist()
+
+def format_rows(pattern: str, *columns) -> List[str]:
+    """Una cadena por fila: `pattern` con '{}' para cada columna"""
+    return list(map(pattern.format, *(format_column(c) for c in columns)))
+
+def format_fractions(numerator, denominator) -> np.ndarray:
+    """Fracciones irreducibles como texto ('3/4', '-2', ...), vectorizado"""
+    numerator, denominator = np.asarray(numerator), np.asarray(denominator)
+    sign = np.where(denominator < 0, -1, 1)
+    divisor = np.gcd(numerator, denominator)
+    numerator = sign * numerator // divisor
+    denominator = sign * denominator // divisor
+    text = np.array(format_rows('{}/{}', numerator, denominator), dtype=object)
+    whole = denominator == 1
+    text[whole] = numerator[whole].astype(str)
+    return text
+
+class ExerciseTemplate:
+    """Plantilla compilada: fragmentos del texto, variables y solucionador
+
+    El texto se analiza una sola vez; generar un ejercicio sólo sortea los
+    valores, une los fragmentos y llama al solucionador. `batch_solver`
+    resuelve un lote entero sobre columnas de NumPy (vectorized=True indica
+    que `solver` ya funciona con columnas); sin él, los lotes se resuelven
+    fila a fila.
+    """
+
+    __slots__ = ('text', 'parts', 'slots', 'solver', 'batch_solver', 'pattern')
+
+    def __init__(self, text: str, solver: Callable[[Dict], object],
+                 ranges: Optional[Dict[str, SlotSpec]] = None,
+                 batch_solver: Optional[Callable[[Dict], Sequence]] = None,
+                 vectorized: bool = False):
+        self.text = text
+        self.solver = solver
+        self.batch_solver = solver if vectorized else batch_solver
+        ranges = ranges or {}
+
+        # (literal, variable o None) en el orden del texto
+        self.parts: List[Tuple[str, Optional[str]]] = [
+            (literal, field) for literal, field, _, _ in string.Formatter().parse(text)
+        ]
+        fields = [field for _, field in self.parts if field]
+        # Mismo texto con '{}' posicionales, para format_rows
+        self.pattern = ''.join(
+            literal.replace('{', '{{').replace('}', '}}') + ('{}' if field else '')
+            for literal, field in self.parts
+        )
+
+        # Variables en orden de sorteo: primero las de `ranges` (pueden ser
+        # auxiliares que no salen en el texto), luego las del texto
+        names = list(ranges) + [f for f in dict.fromkeys(fields) if f not in ranges]
+        # Los rangos quedan como (mínimo, cantidad de valores) para sortear
+        # con random() sin pasar por randint
+        self.slots: List[Tuple[str, SlotSpec]] = []
+        for name in names:
+            spec = ranges.get(name) or self.default_spec(name)
+            if isinstance(spec, tuple):
+                spec = (spec[0], spec[1] - spec[0] + 1)
+            self.slots.append((name, spec))
+
+    @staticmethod
+    def default_spec(name: str) -> SlotSpec:
+        """Rango por defecto de una variable sin especificación propia"""
+        if name == 'lista':
+            return IntList(LIST_SIZE, 1, 100)
+        return DEFAULT_RANGES.get(name, OTHER_RANGE)
+
+    def sample(self, rng: random.Random = random) -> Dict:
+        """Sortear los valores de todas las variables"""
+        values = {}
+        uniform = rng.random
+        for name, spec in self.slots:
+            if type(spec) is tuple:
+                values[name] = spec[0] + int(uniform() * spec[1])
+            else:
+                values[name] = spec(values, rng)
+        return values
+
+    def render(self, values: Dict) -> str:
+        """Enunciado con los valores"""
+        return ''.join([
+            literal + format_value(values[field]) if field else literal
+            for literal, field in self.parts
+        ])
+
+    def solve(self, values: Dict) -> str:
+        """Solución como texto"""
+        return format_value(self.solver(values))
+
+    def sample_batch(self, n: int, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+        """Sortear `n` ejercicios: una columna por variable"""
+        values = {}
+        for name, spec in self.slots:
+            if type(spec) is tuple:
+                values[name] = rng.integers(spec[0], spec[0] + spec[1], size=n)
+            elif hasattr(spec, 'batch'):
+                values[name] = spec.batch(values, rng, n)
+            else:
+                values[name] = spec(values, rng)
+        return values
+
+    def render_batch(self, values: Dict[str, np.ndarray]) -> List[str]:
+        """Enunciados de un lote"""
+        return format_rows(self.pattern, *(values[field] for _, field in self.parts if field))
+
+    def solve_batch(self, values: Dict[str, np.ndarray]) -> List[str]:
+        """Soluciones de un lote como texto"""
+        if self.batch_solver is None:
+            n = len(next(iter(values.values())))
+            rows = ({name: column[i].tolist() for name, column in values.items()} for i in range(n))
+            return [self.solve(row) for row in rows]
+        return format_column(self.batch_solver(values))
+
+# Soluciones con varias partes
+
+def solve_complex_product(v) -> str:
+    """(a + bi)(c - di)"""
+    real = v['a'] * v['c'] + v['b'] * v['d']
+    imaginary = v['b'] * v['c'] - v['a'] * v['d']
+    sign = '+' if imaginary >= 0 else '-'
+    return f"{real}{sign}{abs(imaginary)}i"
+
+def solve_complex_product_batch(v) -> List[str]:
+    """solve_complex_product sobre columnas"""
+    real = v['a'] * v['c'] + v['b'] * v['d']
+    imaginary = v['b'] * v['c'] - v['a'] * v['d']
+    return format_rows('{}{}{}i', real, np.where(imaginary >= 0, '+', '-'), np.abs(imaginary))
+
+def solve_inverse(v) -> str:
+    """Inversa de [[a, b], [c, d]] con fracciones exactas"""
+    det = v['a'] * v['d'] - v['b'] * v['c']
+    if det == 0:
+        return "No tiene inversa"
+    rows = [[Fraction(v['d'], det), Fraction(-v['b'], det)],
+            [Fraction(-v['c'], det), Fraction(v['a'], det)]]
+    return '[' + ','.join('[' + ','.join(format_number(x) for x in row) + ']' for row in rows) + ']'
+
+def solve_inverse_batch(v) -> np.ndarray:
+    """solve_inverse sobre columnas"""
+    det = v['a'] * v['d'] - v['b'] * v['c']
+    singular = det == 0
+    det = np.where(singular, 1, det)
+    text = np.array(format_rows(
+        '[[{},{}],[{},{}]]',
+        format_fractions(v['d'], det), format_fractions(-v['b'], det),
+        format_fractions(-v['c'], det), format_fractions(v['a'], det)
+    ), dtype=object)
+    text[singular] = "No tiene inversa"
+    return text
+
+# Plantillas por tema y nivel de Difficulty (1-4)
+TEMPLATES: Dict[str, Dict[int, List[ExerciseTemplate]]] = {
+    'aritmetica': {
+        1: [
+            ExerciseTemplate("¿Cuánto es {a} + {b}?", lambda v: v['a'] + v['b'], vectorized=True),
+            ExerciseTemplate("Calcula: {a} - {b}", lambda v: v['a'] - v['b'], vectorized=True),
+            ExerciseTemplate("{a} × {b} = ?", lambda v: v['a'] * v['b'], vectorized=True),
+            ExerciseTemplate("{a} ÷ {b} = ?", lambda v: v['a'] / v['b'], vectorized=True),
+        ],
+        2: [
+            ExerciseTemplate("Calcula: ({a} + {b}) × {c}", lambda v: (v['a'] + v['b']) * v['c'],
+                             vectorized=True),
+            ExerciseTemplate("¿Cuál es el {p}% de {n}?", lambda v: v['n'] * v['p'] / 100,
+                             vectorized=True),
+            ExerciseTemplate("Simplifica: {a}/{b} + {c}/{d}",
+                             lambda v: Fraction(v['a'], v['b']) + Fraction(v['c'], v['d']),
+                             batch_solver=lambda v: format_fractions(v['a'] * v['d'] + v['c'] * v['b'],
+                                                                     v['b'] * v['d'])),
+            ExerciseTemplate("Resuelve: {a}² - {b}²", lambda v: v['a'] ** 2 - v['b'] ** 2,
+                             vectorized=True),
+        ],
+        3: [
+            ExerciseTemplate("Calcula: √({a} × {b} + {c})",
+                             lambda v: math.sqrt(v['a'] * v['b'] + v['c']),
+                             batch_solver=lambda v: np.sqrt(v['a'] * v['b'] + v['c'])),
+            ExerciseTemplate("Resuelve: ({a} + {b}i)({c} - {d}i)", solve_complex_product,
+                             batch_solver=solve_complex_product_batch),
+            ExerciseTemplate("Encuentra el MCD de {a}, {b} y {c}",
+                             lambda v: math.gcd(v['a'], v['b'], v['c']),
+                             batch_solver=lambda v: np.gcd(np.gcd(v['a'], v['b']), v['c'])),
+            ExerciseTemplate("Calcula la media de: {lista}",
+                             lambda v: sum(v['lista']) / len(v['lista']),
+                             batch_solver=lambda v: v['lista'].mean(axis=1)),
+        ],
+    },
+    'algebra': {
+        1: [
+            ExerciseTemplate("Resuelve: {a}x + {b} = {c}", lambda v: (v['c'] - v['b']) / v['a'],
+                             vectorized=True),
+            ExerciseTemplate("Simplifica: {a}x + {b}x", lambda v: f"{v['a'] + v['b']}x",
+                             batch_solver=lambda v: format_rows('{}x', v['a'] + v['b'])),
+            ExerciseTemplate("Evalúa: {a}x² cuando x = {b}", lambda v: v['a'] * v['b'] ** 2,
+                             vectorized=True),
+            ExerciseTemplate("¿Cuál es el coeficiente de x en {a}x + {b}?", lambda v: v['a'],
+                             vectorized=True),
+        ],
+        2: [
+            ExerciseTemplate(
+                "Resuelve el sistema: x + y = {a}, x - y = {b}",
+                lambda v: f"x={format_number((v['a'] + v['b']) / 2)}, "
+                          f"y={format_number((v['a'] - v['b']) / 2)}",
+                batch_solver=lambda v: format_rows('x={}, y={}', (v['a'] + v['b']) / 2,
+                                                   (v['a'] - v['b']) / 2)
+            ),
+            # Se sortean las raíces para que siempre factorice en los enteros
+            ExerciseTemplate(
+                "Factoriza: x² + {a}x + {b}",
+                lambda v: f"(x+{v['r']})(x+{v['s']})",
+                ranges={'r': (1, 9), 's': Above('r', 0),
+                        'a': lambda v, rng: v['r'] + v['s'],
+                        'b': lambda v, rng: v['r'] * v['s']},
+                batch_solver=lambda v: format_rows('(x+{})(x+{})', v['r'], v['s'])
+            ),
+            ExerciseTemplate("Grafica: y = {a}x + {b}",
+                             lambda v: f"Recta de pendiente {v['a']} que corta el eje y en {v['b']}",
+                             batch_solver=lambda v: format_rows(
+                                 'Recta de pendiente {} que corta el eje y en {}', v['a'], v['b'])),
+            ExerciseTemplate("Resuelve: |x - {a}| = {b}",
+                             lambda v: f"x={v['a'] - v['b']}, x={v['a'] + v['b']}",
+                             batch_solver=lambda v: format_rows('x={}, x={}', v['a'] - v['b'],
+                                                                v['a'] + v['b'])),
+        ],
+        3: [
+            # a(x + r)(x + s)(x + t): coeficientes positivos y raíces -r, -s, -t
+            ExerciseTemplate(
+                "Resuelve: {a}x³ + {b}x² + {c}x + {d} = 0",
+                lambda v: f"x={-v['t']}, x={-v['s']}, x={-v['r']}",
+                ranges={'k': (1, 3), 'r': (1, 4), 's': Above('r', 1, 3),
+                        't': Above('s', 1, 3),
+                        'a': lambda v, rng: v['k'],
+                        'b': lambda v, rng: v['k'] * (v['r'] + v['s'] + v['t']),
+                        'c': lambda v, rng: v['k'] * (v['r'] * v['s'] + v['r'] * v['t'] + v['s'] * v['t']),
+                        'd': lambda v, rng: v['k'] * v['r'] * v['s'] * v['t']},
+                batch_solver=lambda v: format_rows('x={}, x={}, x={}', -v['t'], -v['s'], -v['r'])
+            ),
+            ExerciseTemplate("Encuentra la inversa de la matriz [[{a},{b}],[{c},{d}]]",
+                             solve_inverse, batch_solver=solve_inverse_batch),
+            ExerciseTemplate(
+                "Demuestra que ({a}+{b}i)² = {c}+{d}i",
+                lambda v: f"({v['a']}+{v['b']}i)² = {v['a'] ** 2} + {2 * v['a'] * v['b']}i "
+                          f"- {v['b'] ** 2} = {v['c']}+{v['d']}i",
+                ranges={'b': (1, 9), 'a': Above('b'),
+                        'c': lambda v, rng: v['a'] ** 2 - v['b'] ** 2,
+                        'd': lambda v, rng: 2 * v['a'] * v['b']},
+                batch_solver=lambda v: format_rows('({}+{}i)² = {} + {}i - {} = {}+{}i',
+                                                   v['a'], v['b'], v['a'] ** 2, 2 * v['a'] * v['b'],
+                                                   v['b'] ** 2, v['c'], v['d'])
+            ),
+            # a(x + r)(x + s) > 0 con r < s
+            ExerciseTemplate(
+                "Resuelve la desigualdad: {a}x² + {b}x + {c} > 0",
+                lambda v: f"x < {-v['s']} o x > {-v['r']}",
+                ranges={'k': (1, 5), 'r': (1, 9), 's': Above('r'),
+                        'a': lambda v, rng: v['k'],
+                        'b': lambda v, rng: v['k'] * (v['r'] + v['s']),
+                        'c': lambda v, rng: v['k'] * v['r'] * v['s']},
+                batch_solver=lambda v: format_rows('x < {} o x > {}', -v['s'], -v['r'])
+            ),
+        ],
+    },
+    # Agregar más temas...
+}
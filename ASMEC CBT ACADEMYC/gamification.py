@@ -1,7 +1,10 @@
 import json
-from datetime import datetime, timedelta
+import bisect
+import itertools
+from collections import deque
+from datetime import date, datetime, timedelta
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import Deque, List, Dict, Optional, Tuple
 import random
 
 @dataclass
@@ -413,47 +416,274 @@ class GamificationSystem:
         return []
 # Añade esto al final del archivo gamification.py (antes del último cierre)
 
+class RankedBoard:
+    """Tabla de clasificación ordenada y acotada
+
+    Las claves (-puntuación, orden de llegada, user_id) se guardan en una
+    lista ordenada con bisect, y un índice user_id -> entrada permite
+    actualizar o consultar la posición de un usuario sin recorrer la tabla.
+    """
+    
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self._keys: List[Tuple[int, int, int]] = []
+        self._entries: Dict[int, Dict] = {}
+        self._key_by_user: Dict[int, Tuple[int, int, int]] = {}
+        self._counter = itertools.count()
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+    
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._entries
+    
+    def get(self, user_id: int) -> Optional[Dict]:
+        """Obtener la entrada de un usuario"""
+        return self._entries.get(user_id)
+    
+    def set_score(self, user_id: int, username: str, score: int,
+                  timestamp: Optional[datetime] = None) -> int:
+        """Fijar la puntuación de un usuario; devuelve su posición (o -1)"""
+        self._remove_key(user_id)
+        
+        # A igual puntuación queda delante quien la alcanzó primero
+        key = (-score, next(self._counter), user_id)
+        position = bisect.bisect_left(self._keys, key)
+        if position >= self.capacity:
+            self._entries.pop(user_id, None)
+            return -1
+        
+        self._keys.insert(position, key)
+        self._key_by_user[user_id] = key
+        self._entries[user_id] = {
+            'user_id': user_id,
+            'username': username,
+            'score': score,
+            'timestamp': timestamp or datetime.now()
+        }
+        
+        # Mantener sólo las top `capacity` posiciones
+        if len(self._keys) > self.capacity:
+            evicted = self._keys.pop()
+            del self._key_by_user[evicted[2]]
+            del self._entries[evicted[2]]
+        
+        return position + 1
+    
+    def add_score(self, user_id: int, username: str, score: int,
+                  timestamp: Optional[datetime] = None) -> int:
+        """Sumar puntos a la entrada de un usuario (o crearla)"""
+        entry = self._entries.get(user_id)
+        total = score + (entry['score'] if entry else 0)
+        return self.set_score(user_id, username, total, timestamp)
+    
+    def remove(self, user_id: int):
+        """Quitar a un usuario de la tabla"""
+        self._remove_key(user_id)
+        self._entries.pop(user_id, None)
+    
+    def position(self, user_id: int) -> int:
+        """Posición del usuario (1-indexed) o -1 si no está en la tabla"""
+        key = self._key_by_user.get(user_id)
+        if key is None:
+            return -1
+        return bisect.bisect_left(self._keys, key) + 1
+    
+    def top(self, limit: int) -> List[Dict]:
+        """Primeras `limit` entradas de mayor a menor puntuación"""
+        return [self._entries[key[2]] for key in self._keys[:limit]]
+    
+    def entries(self) -> List[Dict]:
+        """Todas las entradas en orden de clasificación"""
+        return self.top(len(self._keys))
+    
+    def replace(self, entries: List[Dict]):
+        """Reemplazar el contenido; las entradas repetidas de un usuario se suman"""
+        self.clear()
+        for entry in entries:
+            self.add_score(entry['user_id'], entry['username'], entry['score'],
+                           entry.get('timestamp'))
+    
+    def clear(self):
+        """Vaciar la tabla"""
+        self._keys = []
+        self._entries = {}
+        self._key_by_user = {}
+    
+    def _remove_key(self, user_id: int):
+        """Quitar la clave ordenada de un usuario, si la tiene"""
+        key = self._key_by_user.pop(user_id, None)
+        if key is not None:
+            del self._keys[bisect.bisect_left(self._keys, key)]
+
 class Leaderboard:
-    """Sistema de tablas de clasificación"""
+    """Sistema de tablas de clasificación
+
+    Las puntuaciones diarias se agregan en un cubo por día. Las ventanas
+    semanal y mensual mantienen sus totales sumando el cubo del día y
+    restando el que sale de la ventana; el histórico es una suma continua
+    que no depende del recorte a las top 100.
+    """
+    
+    LEADERBOARD_TYPES = ('daily', 'weekly', 'monthly', 'all_time')
     
-    def __init__(self):
+    # Días que abarca cada ventana, contando el día actual
+    WINDOW_DAYS = {'weekly': 7, 'monthly': 30}
+    
+    def __init__(self, capacity: int = 100):
         self.leaderboards = {
-            'daily': [],
-            'weekly': [],
-            'monthly': [],
-            'all_time': []
+            leaderboard_type: RankedBoard(capacity)
+            for leaderboard_type in self.LEADERBOARD_TYPES
+        }
+        
+        # día -> {user_id: puntos de ese día}
+        self._day_buckets: Dict[date, Dict[int, int]] = {}
+        self._usernames: Dict[int, str] = {}
+        self._current_day: Optional[date] = None
+        
+        # Por ventana: días incluidos (del más antiguo al más reciente) y totales
+        self._window_days: Dict[str, Deque[date]] = {
+            window: deque() for window in self.WINDOW_DAYS
+        }
+        self._window_totals: Dict[str, Dict[int, int]] = {
+            window: {} for window in self.WINDOW_DAYS
         }
+        self._all_time_totals: Dict[int, int] = {}
     
-    def add_score(self, user_id: int, username: str, score: int, 
-                  leaderboard_type: str = 'daily'):
-        """Agregar puntuación a la tabla de clasificación"""
+    def _board(self, leaderboard_type: str) -> RankedBoard:
+        """Obtener la tabla de un tipo o fallar si no existe"""
         if leaderboard_type not in self.leaderboards:
             raise ValueError(f"Tipo de leaderboard no válido: {leaderboard_type}")
+        return self.leaderboards[leaderboard_type]
+    
+    def add_score(self, user_id: int, username: str, score: int, 
+                  leaderboard_type: str = 'daily') -> int:
+        """Agregar puntuación a la tabla de clasificación"""
+        if leaderboard_type == 'daily':
+            return self.record_score(user_id, username, score)
+        
+        # Ajuste de una sola tabla: pasa por sus totales, así record_score
+        # no lo pisa al volver a publicar el total del usuario
+        totals = self._totals(leaderboard_type)
+        self._usernames[user_id] = username
+        totals[user_id] = totals.get(user_id, 0) + score
+        return self.leaderboards[leaderboard_type].set_score(user_id, username, totals[user_id])
+    
+    def _totals(self, leaderboard_type: str) -> Dict[int, int]:
+        """Totales que respaldan una tabla semanal, mensual o histórica"""
+        self._board(leaderboard_type)
+        self._advance_to(self._today())
+        if leaderboard_type == 'all_time':
+            return self._all_time_totals
+        return self._window_totals[leaderboard_type]
+    
+    def record_score(self, user_id: int, username: str, score: int) -> int:
+        """Registrar puntos del día en todas las tablas; devuelve la posición diaria"""
+        today = self._today()
+        self._advance_to(today)
+        self._usernames[user_id] = username
+        
+        bucket = self._day_buckets.get(today)
+        if bucket is None:
+            bucket = self._day_buckets[today] = {}
+            for days in self._window_days.values():
+                days.append(today)
+        bucket[user_id] = bucket.get(user_id, 0) + score
+        
+        for window, totals in self._window_totals.items():
+            totals[user_id] = totals.get(user_id, 0) + score
+            self.leaderboards[window].set_score(user_id, username, totals[user_id])
+        
+        self._all_time_totals[user_id] = self._all_time_totals.get(user_id, 0) + score
+        self.leaderboards['all_time'].set_score(
+            user_id, username, self._all_time_totals[user_id]
+        )
         
-        entry = {
-            'user_id': user_id,
-            'username': username,
-            'score': score,
-            'timestamp': datetime.now()
-        }
-        
-        self.leaderboards[leaderboard_type].append(entry)
-        # Ordenar de mayor a menor puntuación
-        self.leaderboards[leaderboard_type].sort(
-            key=lambda x: x['score'], 
-            reverse=True
+        return self.leaderboards['daily'].set_score(user_id, username, bucket[user_id])
+    
+    def get_total_score(self, user_id: int, leaderboard_type: str = 'all_time') -> int:
+        """Total acumulado del usuario, aunque haya salido de las top 100"""
+        self._advance_to(self._today())
+        if leaderboard_type == 'all_time':
+            return self._all_time_totals.get(user_id, 0)
+        if leaderboard_type == 'daily':
+            return self._day_buckets.get(self._current_day, {}).get(user_id, 0)
+        if leaderboard_type in self._window_totals:
+            return self._window_totals[leaderboard_type].get(user_id, 0)
+        raise ValueError(f"Tipo de leaderboard no válido: {leaderboard_type}")
+    
+    def _today(self) -> date:
+        """Día actual (punto único para cambiar el reloj)"""
+        return datetime.now().date()
+    
+    def _advance_to(self, today: date):
+        """Cerrar los días vencidos: reiniciar la diaria y expirar cubos viejos"""
+        if self._current_day is not None and today <= self._current_day:
+            return
+        
+        first_advance = self._current_day is None
+        self._current_day = today
+        if first_advance:
+            return
+        
+        self.leaderboards['daily'].replace(
+            self._bucket_entries(self._day_buckets.get(today, {}))
         )
         
-        # Mantener solo las top 100 posiciones
-        self.leaderboards[leaderboard_type] = self.leaderboards[leaderboard_type][:100]
+        for window, window_days in self.WINDOW_DAYS.items():
+            oldest = today - timedelta(days=window_days - 1)
+            days = self._window_days[window]
+            totals = self._window_totals[window]
+            
+            expired = False
+            while days and days[0] < oldest:
+                # Tras load_from_json o un ajuste directo los totales no
+                # tienen por qué contener a todos los usuarios del cubo
+                for user_id, score in self._day_buckets[days.popleft()].items():
+                    if user_id not in totals:
+                        continue
+                    remaining = totals[user_id] - score
+                    if remaining > 0:
+                        totals[user_id] = remaining
+                    else:
+                        del totals[user_id]
+                expired = True
+            
+            # Al bajar puntuaciones pueden entrar usuarios que estaban
+            # fuera de las top 100: se reconstruye una vez por día
+            if expired:
+                self.leaderboards[window].replace(self._bucket_entries(totals))
+        
+        # Los cubos fuera de la ventana más larga ya no se necesitan
+        oldest_kept = today - timedelta(days=max(self.WINDOW_DAYS.values()) - 1)
+        for day in [day for day in self._day_buckets if day < oldest_kept]:
+            del self._day_buckets[day]
+    
+    def _bucket_entries(self, scores: Dict[int, int]) -> List[Dict]:
+        """Convertir {user_id: puntos} en entradas de tabla"""
+        return [
+            {'user_id': user_id, 'username': self._usernames.get(user_id, ''), 'score': score}
+            for user_id, score in scores.items()
+        ]
+    
+    def update_score(self, user_id: int, username: str, score: int,
+                     leaderboard_type: str = 'daily') -> int:
+        """Reemplazar la puntuación de un usuario en la tabla"""
+        if leaderboard_type == 'daily':
+            # La diferencia se registra como puntos del día en todas las tablas
+            self._advance_to(self._today())
+            current = self._day_buckets.get(self._current_day, {}).get(user_id, 0)
+            return self.record_score(user_id, username, score - current)
+        
+        totals = self._totals(leaderboard_type)
+        self._usernames[user_id] = username
+        totals[user_id] = score
+        return self.leaderboards[leaderboard_type].set_score(user_id, username, score)
     
     def get_leaderboard(self, leaderboard_type: str = 'daily', 
                        limit: int = 10) -> List[Dict]:
         """Obtener tabla de clasificación"""
-        if leaderboard_type not in self.leaderboards:
-            raise ValueError(f"Tipo de leaderboard no válido: {leaderboard_type}")
-        
-        return self.leaderboards[leaderboard_type][:limit]
+        return self._board(leaderboard_type).top(limit)
     
     def get_user_position(self, user_id: int, 
                          leaderboard_type: str = 'daily') -> int:
@@ -461,80 +691,58 @@ class Leaderboard:
         if leaderboard_type not in self.leaderboards:
             return -1
         
-        for i, entry in enumerate(self.leaderboards[leaderboard_type]):
-            if entry['user_id'] == user_id:
-                return i + 1  # Posición (1-indexed)
-        
-        return -1  # Usuario no encontrado
+        return self.leaderboards[leaderboard_type].position(user_id)
     
     def clear_leaderboard(self, leaderboard_type: str):
         """Limpiar tabla de clasificación"""
         if leaderboard_type in self.leaderboards:
-            self.leaderboards[leaderboard_type] = []
+            self.leaderboards[leaderboard_type].clear()
     
     def update_weekly_leaderboard(self):
         """Actualizar leaderboard semanal"""
-        # Combinar puntuaciones diarias en semanales
-        self.leaderboards['weekly'] = self.aggregate_scores('daily', days=7)
+        # La ventana se mantiene al registrar puntos; sólo falta expirar días
+        self._advance_to(self._today())
     
     def update_monthly_leaderboard(self):
         """Actualizar leaderboard mensual"""
-        self.leaderboards['monthly'] = self.aggregate_scores('daily', days=30)
+        self._advance_to(self._today())
     
     def update_all_time_leaderboard(self):
         """Actualizar leaderboard histórico"""
-        # Combinar todas las puntuaciones
-        all_scores = {}
-        for entry in self.leaderboards['daily']:
-            user_id = entry['user_id']
-            if user_id not in all_scores:
-                all_scores[user_id] = {
-                    'user_id': user_id,
-                    'username': entry['username'],
-                    'score': 0
-                }
-            all_scores[user_id]['score'] += entry['score']
-        
-        self.leaderboards['all_time'] = sorted(
-            all_scores.values(), 
-            key=lambda x: x['score'], 
-            reverse=True
-        )[:100]
+        # Reconstruir desde la suma continua, que no pierde a quien salió del top
+        self.leaderboards['all_time'].replace(self._bucket_entries(self._all_time_totals))
     
-    def aggregate_scores(self, source_type: str, days: int = 7) -> List[Dict]:
+    def aggregate_scores(self, source_type: str = 'daily', days: int = 7) -> List[Dict]:
         """Agregar puntuaciones de múltiples días"""
-        aggregated = {}
+        # Sólo los cubos diarios guardan el detalle por día
+        if source_type != 'daily':
+            raise ValueError(f"Sólo se agregan puntuaciones diarias: {source_type}")
         
-        for entry in self.leaderboards[source_type]:
-            user_id = entry['user_id']
-            
-            # Verificar si la entrada es reciente
-            entry_date = entry['timestamp']
-            days_diff = (datetime.now() - entry_date).days
-            
-            if days_diff <= days:
-                if user_id not in aggregated:
-                    aggregated[user_id] = {
-                        'user_id': user_id,
-                        'username': entry['username'],
-                        'score': 0
-                    }
-                aggregated[user_id]['score'] += entry['score']
+        today = self._today()
+        self._advance_to(today)
+        oldest = today - timedelta(days=days - 1)
+        
+        aggregated: Dict[int, int] = {}
+        for day, bucket in self._day_buckets.items():
+            if day >= oldest:
+                for user_id, score in bucket.items():
+                    aggregated[user_id] = aggregated.get(user_id, 0) + score
         
         return sorted(
-            aggregated.values(), 
-            key=lambda x: x['score'], 
+            self._bucket_entries(aggregated),
+            key=lambda x: x['score'],
             reverse=True
-        )[:100]
+        )
     
     def get_top_players(self, limit: int = 5) -> List[Dict]:
         """Obtener mejores jugadores de todos los tiempos"""
-        return self.leaderboards['all_time'][:limit]
+        return self.leaderboards['all_time'].top(limit)
     
     def export_leaderboard(self, leaderboard_type: str = 'daily') -> str:
         """Exportar leaderboard como JSON"""
         import json
-        return json.dumps(self.leaderboards.get(leaderboard_type, []), 
+        board = self.leaderboards.get(leaderboard_type)
+        return json.dumps(board.entries() if board else [], 
                          default=str, 
                          indent=2)
     
@@ -548,4 +756,21 @@ class Leaderboard:
             if 'timestamp' in entry and isinstance(entry['timestamp'], str):
                 entry['timestamp'] = datetime.fromisoformat(entry['timestamp'])
         
-        self.leaderboards[leaderboard_type] = data
\ No newline at end of file
+        # Los totales (o el cubo del día) pasan a ser los cargados, para
+        # que record_score siga desde ellos
+        scores = {entry['user_id']: entry['score'] for entry in data}
+        for entry in data:
+            self._usernames[entry['user_id']] = entry.get('username', '')
+        if leaderboard_type == 'daily':
+            self._board(leaderboard_type)
+            self._advance_to(self._today())
+            if self._current_day not in self._day_buckets:
+                for days in self._window_days.values():
+                    days.append(self._current_day)
+            self._day_buckets[self._current_day] = scores
+        else:
+            totals = self._totals(leaderboard_type)
+            totals.clear()
+            totals.update(scores)
+        
+        self._board(leaderboard_type).replace(data)
@@ -0,0 +1,383 @@
+import re
+import threading
+from fractions import Fraction
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Forma canónica de una respuesta: tupla que empieza por su tipo
+#   ('number', Fraction, decimales escritos o None)
+#   ('percent', Fraction, decimales)    '15%': el número antes del signo
+#   ('poly', variable, coeficientes de grado 0..n)
+#   ('factored', variable, coeficientes, factores mónicos ordenados)
+#                               productos como (x-2)(x-3): conservan sus factores
+#   ('relations', ((variable, operador, Fraction), ...) ordenadas)
+#   ('tuple', (forma, ...))     pares ordenados, listas y matrices
+#   ('bool', bool)
+#   ('text', texto normalizado)
+Canonical = Tuple
+
+# Margen de la comparación numérica (el mismo que usaba check_answer)
+TOLERANCE = 0.001
+MAX_ANSWER_LENGTH = 200
+MAX_EXPONENT = 10
+
+TRUE_WORDS = {'verdadero', 'v', 'true', 't', 'sí', 'si', 'cierto'}
+FALSE_WORDS = {'falso', 'f', 'false', 'no'}
+
+# Caracteres equivalentes que llegan desde teclados y plantillas
+REPLACEMENTS = str.maketrans({
+    '−': '-', '–': '-', '×': '*', '·': '*', '÷': '/', '²': '^2', '³': '^3',
+})
+RELATION = re.compile(r'\s*(<=|>=|≤|≥|=|<|>)\s*')
+FLIP = {'<': '>', '>': '<', '<=': '>=', '>=': '<=', '=': '='}
+OPERATOR_ALIASES = {'≤': '<=', '≥': '>='}
+DECIMAL_COMMA = re.compile(r'[+-]?\d+,\d+')
+# '1,000' y '12,345,678' agrupan miles: no son comas decimales
+THOUSANDS = re.compile(r'[+-]?[1-9]\d{0,2}(?:,\d{3})+')
+PLAIN_NUMBER = re.compile(r'[+-]?\d+(?:\.(\d+))?')
+TOKEN = re.compile(r'\s*(?:(\d+(?:\.\d+)?)|([a-z]+)|(\S))')
+WORD_SEPARATOR = re.compile(r'\s+(?:o|y|or|and)\s+')
+
+class ParseError(ValueError):
+    """La respuesta no es una expresión reconocible"""
+
+# Polinomios en una variable: {exponente: coeficiente}
+
+def _poly_mul(p: Dict[int, Fraction], q: Dict[int, Fraction]) -> Dict[int, Fraction]:
+    result: Dict[int, Fraction] = {}
+    for i, a in p.items():
+        for j, b in q.items():
+            result[i + j] = result.get(i + j, 0) + a * b
+    if result and max(result) > MAX_EXPONENT:
+        raise ParseError("grado demasiado alto")
+    return result
+
+def _poly_add(p: Dict[int, Fraction], q: Dict[int, Fraction], sign: int = 1) -> Dict[int, Fraction]:
+    result = dict(p)
+    for i, b in q.items():
+        result[i] = result.get(i, 0) + sign * b
+    return result
+
+class _ExpressionParser:
+    """Descenso recursivo: + - * / ^, paréntesis y multiplicación implícita (2x, (x-2)(x-3))"""
+
+    def __init__(self, text: str):
+        self.tokens: List[Tuple[str, str]] = []
+        for number, letter, symbol in TOKEN.findall(text):
+            if number:
+                self.tokens.append(('num', number))
+            elif letter:
+                # Una sola letra: las palabras no son expresiones
+                if len(letter) > 1:
+                    raise ParseError(f"palabra: {letter}")
+                self.tokens.append(('var', letter))
+            elif symbol:
+                if symbol not in '+-*/^()':
+                    raise ParseError(f"símbolo inesperado: {symbol}")
+                self.tokens.append(('op', symbol))
+        self.position = 0
+        self.variable: Optional[str] = None
+        # Factores del último término leído y, tras parse(), los de la
+        # expresión completa si es un solo producto (si no, None)
+        self.last_factors: List[Dict[int, Fraction]] = []
+        self.term_factors: List[Dict[int, Fraction]] = []
+        self.factors: Optional[List[Dict[int, Fraction]]] = None
+
+    def peek(self) -> Tuple[str, str]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else ('end', '')
+
+    def take(self) -> Tuple[str, str]:
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self) -> Dict[int, Fraction]:
+        if not self.tokens:
+            raise ParseError("respuesta vacía")
+        poly = self.expression()
+        if self.peek()[0] != 'end':
+            raise ParseError("sobran símbolos")
+        return poly
+
+    def expression(self) -> Dict[int, Fraction]:
+        poly = self.term()
+        factors = self.term_factors
+        while self.peek() in (('op', '+'), ('op', '-')):
+            sign = 1 if self.take()[1] == '+' else -1
+            poly = _poly_add(poly, self.term(), sign)
+            factors = None
+        self.factors = factors
+        return poly
+
+    def term(self) -> Dict[int, Fraction]:
+        poly = self.unary()
+        factors = list(self.last_factors)
+        while True:
+            kind, value = self.peek()
+            if (kind, value) == ('op', '*'):
+                self.take()
+                poly = _poly_mul(poly, self.unary())
+                factors.extend(self.last_factors)
+            elif (kind, value) == ('op', '/'):
+                self.take()
+                divisor = self.unary()
+                if set(divisor) - {0} or not divisor.get(0):
+                    raise ParseError("sólo se divide entre constantes")
+                poly = {i: a / divisor[0] for i, a in poly.items()}
+            elif kind in ('num', 'var') or (kind, value) == ('op', '('):
+                # Multiplicación implícita
+                poly = _poly_mul(poly, self.power())
+                factors.extend(self.last_factors)
+            else:
+                self.term_factors = factors
+                return poly
+
+    def unary(self) -> Dict[int, Fraction]:
+        if self.peek() in (('op', '-'), ('op', '+')):
+            sign = -1 if self.take()[1] == '-' else 1
+            return {i: sign * a for i, a in self.unary().items()}
+        return self.power()
+
+    def power(self) -> Dict[int, Fraction]:
+        base = self.atom()
+        if self.peek() == ('op', '^'):
+            self.take()
+            kind, value = self.take()
+            if kind != 'num' or not value.isdigit() or int(value) > MAX_EXPONENT:
+                raise ParseError("exponente no válido")
+            result = {0: Fraction(1)}
+            for _ in range(int(value)):
+                result = _poly_mul(result, base)
+            self.last_factors = [base] * int(value)
+            return result
+        self.last_factors = [base]
+        return base
+
+    def atom(self) -> Dict[int, Fraction]:
+        kind, value = self.take()
+        if kind == 'num':
+            return {0: Fraction(value)}
+        if kind == 'var':
+            if self.variable not in (None, value):
+                raise ParseError("más de una variable")
+            self.variable = value
+            return {1: Fraction(1)}
+        if (kind, value) == ('op', '('):
+            poly = self.expression()
+            if self.take() != ('op', ')'):
+                raise ParseError("falta ')'")
+            return poly
+        raise ParseError("se esperaba un número o una variable")
+
+def _split_top_level(text: str, separators=(',', ';')) -> List[str]:
+    """Partir por comas fuera de paréntesis y corchetes"""
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(text):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif depth == 0 and char in separators:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+def _monic(poly: Dict[int, Fraction]) -> Tuple[Fraction, ...]:
+    """Coeficientes de un factor divididos por el principal"""
+    degree = max(poly)
+    return tuple(poly.get(i, Fraction(0)) / poly[degree] for i in range(degree + 1))
+
+def _expression(text: str) -> Canonical:
+    """Número, polinomio o producto de factores"""
+    parser = _ExpressionParser(text)
+    poly = {i: a for i, a in parser.parse().items() if a}
+    if not poly or set(poly) == {0}:
+        match = PLAIN_NUMBER.fullmatch(text.replace(' ', ''))
+        decimals = len(match.group(1)) if match and match.group(1) else None
+        return ('number', poly.get(0, Fraction(0)), decimals)
+    degree = max(poly)
+    coefficients = tuple(poly.get(i, Fraction(0)) for i in range(degree + 1))
+
+    # Un producto con algún factor que no sea x (no un monomio como 3x^2)
+    # guarda sus factores: '(x-2)(x-3)' no equivale a 'x^2 - 5x + 6'
+    factors = [
+        _monic(factor) for factor in
+        ({i: a for i, a in factor.items() if a} for factor in parser.factors or ())
+        if factor and set(factor) != {0}
+    ]
+    if len(factors) > 1 and any(factor != (0, 1) for factor in factors):
+        return ('factored', parser.variable, coefficients, tuple(sorted(factors)))
+    return ('poly', parser.variable, coefficients)
+
+def _relation(text: str) -> Optional[Tuple[str, str, Fraction]]:
+    """'x = 6', 'x < -4' o '-4 > x' como (variable, operador, valor)"""
+    pieces = RELATION.split(text)
+    if len(pieces) != 3:
+        return None
+    left, operator, right = pieces
+    operator = OPERATOR_ALIASES.get(operator, operator)
+    if re.fullmatch(r'[a-z]', right) and not re.fullmatch(r'[a-z]', left):
+        left, right, operator = right, left, FLIP[operator]
+    if not re.fullmatch(r'[a-z]', left):
+        return None
+    try:
+        value = _expression(right)
+    except (ParseError, ZeroDivisionError):
+        return None
+    if value[0] != 'number':
+        return None
+    return left, operator, value[1]
+
+def _parse(text: str) -> Canonical:
+    if text in TRUE_WORDS:
+        return ('bool', True)
+    if text in FALSE_WORDS:
+        return ('bool', False)
+    if text.endswith('%'):
+        value = _parse(text[:-1].rstrip())
+        if value[0] != 'number':
+            raise ParseError("porcentaje no numérico")
+        return ('percent', value[1], value[2])
+    if THOUSANDS.fullmatch(text):
+        text = text.replace(',', '')
+    elif DECIMAL_COMMA.fullmatch(text):
+        text = text.replace(',', '.')
+
+    parts = []
+    for part in _split_top_level(text):
+        # 'x < -4 o x > -2': las conjunciones separan sólo relaciones
+        words = WORD_SEPARATOR.split(part)
+        parts.extend(words if len(words) > 1 and all(map(_relation, words)) else [part])
+
+    if len(parts) == 1 and len(text) > 1 and text[0] + text[-1] in ('()', '[]'):
+        inner = _split_top_level(text[1:-1])
+        # '(6, 4)' y '[[1,2],[3,4]]' son tuplas; '(x-2)' es una expresión
+        if len(inner) > 1 or text[0] == '[':
+            return ('tuple', tuple(_parse(p) for p in inner))
+
+    if len(parts) > 1:
+        relations = [_relation(p) for p in parts]
+        if all(relations):
+            return ('relations', tuple(sorted(relations)))
+        return ('tuple', tuple(_parse(p) for p in parts))
+
+    relation = _relation(text)
+    if relation:
+        return ('relations', (relation,))
+    return _expression(text)
+
+@lru_cache(maxsize=65536)
+def canonicalize(answer: str) -> Canonical:
+    """Forma canónica de una respuesta (en caché: las esperadas se repiten)"""
+    text = ' '.join(str(answer).translate(REPLACEMENTS).casefold().split()).rstrip('.')
+    if len(text) <= MAX_ANSWER_LENGTH:
+        try:
+            return _parse(text)
+        except (ParseError, ZeroDivisionError, ValueError):
+            pass
+    return ('text', text)
+
+def _numbers_match(expected: Fraction, answer: Fraction, decimals: Optional[int] = None) -> bool:
+    if expected == answer or abs(expected - answer) < TOLERANCE:
+        return True
+    # Esperada redondeada ('1.36'): vale la respuesta exacta ('19/14')
+    return decimals is not None and round(float(answer), decimals) == float(expected)
+
+def _values(form: Canonical) -> Optional[List]:
+    """Valores de una tupla de números o de relaciones '=' (o None)"""
+    if form[0] == 'tuple' and all(f[0] == 'number' for f in form[1]):
+        return [f[1] for f in form[1]]
+    if form[0] == 'relations' and all(op == '=' for _, op, _ in form[1]):
+        return [value for _, _, value in form[1]]
+    return None
+
+def equivalent(expected: Canonical, answer: Canonical) -> bool:
+    """¿La respuesta equivale a la esperada?"""
+    kind = expected[0]
+    if kind == 'percent':
+        # '15%', '15' o la fracción '0.15'
+        if answer[0] in ('percent', 'number'):
+            return _numbers_match(expected[1], answer[1], expected[2]) or (
+                answer[0] == 'number' and _numbers_match(expected[1] / 100, answer[1]))
+        return False
+
+    if kind == 'number':
+        if answer[0] == 'percent':
+            # Esperada '15' (por ciento) o '0.15': vale '15%'
+            return _numbers_match(expected[1], answer[1], expected[2]) or \
+                _numbers_match(expected[1], answer[1] / 100, expected[2])
+        if answer[0] == 'number':
+            return _numbers_match(expected[1], answer[1], expected[2])
+        # 'x = -0.18' para una respuesta numérica
+        values = _values(answer)
+        return values is not None and len(values) == 1 and _numbers_match(expected[1], values[0], expected[2])
+
+    if kind == 'relations':
+        if answer[0] == 'relations':
+            return len(expected[1]) == len(answer[1]) and all(
+                e[0] == a[0] and e[1] == a[1] and _numbers_match(e[2], a[2])
+                for e, a in zip(expected[1], answer[1])
+            )
+        # Sin variables: '(6, 4)' para 'x=6, y=4' (orden de las variables) o
+        # '28, -2' para 'x=-2, x=28' (raíces, en cualquier orden)
+        values = [answer[1]] if answer[0] == 'number' else _values(answer)
+        if values is None or len(values) != len(expected[1]) or \
+                any(op != '=' for _, op, _ in expected[1]):
+            return False
+        names = [name for name, _, _ in expected[1]]
+        if len(set(names)) == 1:
+            values = sorted(values)
+        return all(_numbers_match(e[2], v) for e, v in zip(expected[1], values))
+
+    if kind == 'tuple':
+        if answer[0] == 'relations':
+            values = _values(answer)
+            return values is not None and len(values) == len(expected[1]) and all(
+                e[0] == 'number' and _numbers_match(e[1], v) for e, v in zip(expected[1], values)
+            )
+        return answer[0] == 'tuple' and len(answer[1]) == len(expected[1]) and all(
+            equivalent(e, a) for e, a in zip(expected[1], answer[1])
+        )
+
+    if kind == 'poly' and answer[0] == 'factored':
+        # Un producto vale si la esperada está desarrollada (no al revés)
+        return expected[1:] == answer[1:3]
+
+    return expected == answer
+
+def grade(expected: str, answer: str) -> bool:
+    """Comparar dos respuestas escritas"""
+    return equivalent(canonicalize(expected), canonicalize(answer))
+
+class AnswerKeys:
+    """Formas canónicas de las respuestas esperadas, por ítem
+
+    Se calculan la primera vez que se califica el ítem (o todas juntas con
+    precompute) y se comparten entre los exámenes que usan el mismo banco.
+    """
+
+    def __init__(self):
+        self._keys: Dict[str, Canonical] = {}
+        self._lock = threading.Lock()
+
+    def key(self, item_id: str, expected: str) -> Canonical:
+        """Forma canónica de la respuesta esperada de un ítem"""
+        key = self._keys.get(item_id)
+        if key is None:
+            key = canonicalize(expected)
+            with self._lock:
+                self._keys[item_id] = key
+        return key
+
+    def precompute(self, items: Iterable) -> int:
+        """Calcular las claves de todos los ítems (objetos con id y correct_answer)"""
+        count = 0
+        for item in items:
+            self.key(item.id, item.correct_answer)
+            count += 1
+        return count
+
+    def check(self, item_id: str, expected: str, answer: str) -> bool:
+        """Calificar una respuesta de un ítem"""
+        return equivalent(self.key(item_id, expected), canonicalize(answer))
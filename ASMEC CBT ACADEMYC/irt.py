@@ -0,0 +1,263 @@
+import math
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Malla de cuadratura para la habilidad (theta) y prior normal estándar
+THETA_GRID = np.linspace(-4.0, 4.0, 81)
+
+# Dificultad IRT (b) por nivel de Difficulty, mientras no haya calibración
+DEFAULT_B_BY_LEVEL = {1: -1.5, 2: -0.5, 3: 0.5, 4: 1.5}
+
+# Escala 1-10 que usa AdaptiveTest para 'estimated_ability'
+ABILITY_SCALE_MIN, ABILITY_SCALE_MAX = 1.0, 10.0
+
+# Desplazamiento máximo del prior según el nivel del usuario
+PRIOR_SHIFT = 1.0
+
+# Parámetros de un ítem: (discriminación a, dificultad b, adivinación c)
+ItemParams = Tuple[float, float, float]
+
+def probability(theta, a, b, c):
+    """P(respuesta correcta) del modelo 3PL (2PL si c = 0), vectorizada"""
+    return c + (1.0 - c) / (1.0 + np.exp(-a * (theta - b)))
+
+def fisher_information(theta, a, b, c):
+    """Información de Fisher de cada ítem en theta (3PL), vectorizada"""
+    p = probability(theta, a, b, c)
+    p = np.clip(p, 1e-9, 1 - 1e-9)
+    return a ** 2 * ((p - c) / (1.0 - c)) ** 2 * (1.0 - p) / p
+
+def theta_to_ability(theta: float) -> float:
+    """Convertir theta (-4..4) a la escala de habilidad 1-10"""
+    span = ABILITY_SCALE_MAX - ABILITY_SCALE_MIN
+    ability = ABILITY_SCALE_MIN + (theta - THETA_GRID[0]) / (THETA_GRID[-1] - THETA_GRID[0]) * span
+    return float(min(max(ability, ABILITY_SCALE_MIN), ABILITY_SCALE_MAX))
+
+def ability_to_theta(ability: float) -> float:
+    """Convertir la escala de habilidad 1-10 a theta"""
+    span = ABILITY_SCALE_MAX - ABILITY_SCALE_MIN
+    fraction = (ability - ABILITY_SCALE_MIN) / span
+    return float(THETA_GRID[0] + fraction * (THETA_GRID[-1] - THETA_GRID[0]))
+
+def prior_mean_for_ability(ability: float) -> float:
+    """Centro del prior de un examen según el nivel 1-10 del usuario
+
+    El nivel sólo desplaza el prior hasta ±PRIOR_SHIFT alrededor de 0: con
+    la conversión lineal el nivel 1 quedaba en el borde de la malla (-4) y
+    la estimación apenas subía aunque acertara todo.
+    """
+    return ability_to_theta(ability) / THETA_GRID[-1] * PRIOR_SHIFT
+
+def performance_to_theta(performance: float, b: float, a: float = 1.0) -> float:
+    """Theta con la que un ítem (a, b) se acierta con la proporción dada"""
+    p = min(max(performance, 0.05), 0.95)
+    return b + math.log(p / (1.0 - p)) / a
+
+def estimate_eap(a, b, c, responses, prior_mean: float = 0.0,
+                 prior_sd: float = 1.0, grid=THETA_GRID) -> Tuple[np.ndarray, np.ndarray]:
+    """EAP de muchos examinados a la vez
+
+    responses: matriz (examinados x ítems) con 1/0 y NaN donde no hubo
+    respuesta. Devuelve (theta, error estándar) por examinado.
+    """
+    responses = np.atleast_2d(np.asarray(responses, dtype=float))
+    answered = ~np.isnan(responses)
+    correct = np.where(answered, responses, 0.0)
+    wrong = answered & (correct == 0)
+
+    # (ítems x malla): log P y log Q de cada ítem en cada punto
+    p = np.clip(probability(grid[None, :], np.asarray(a)[:, None],
+                            np.asarray(b)[:, None], np.asarray(c)[:, None]), 1e-9, 1 - 1e-9)
+    log_likelihood = correct @ np.log(p) + wrong.astype(float) @ np.log1p(-p)
+
+    log_posterior = log_likelihood - 0.5 * ((grid - prior_mean) / prior_sd) ** 2
+    log_posterior -= log_posterior.max(axis=1, keepdims=True)
+    posterior = np.exp(log_posterior)
+    posterior /= posterior.sum(axis=1, keepdims=True)
+
+    theta = posterior @ grid
+    se = np.sqrt(np.maximum(posterior @ grid ** 2 - theta ** 2, 0.0))
+    return theta, se
+
+class AbilityEstimator:
+    """Estimación de habilidad de un examinado sobre la malla de cuadratura
+
+    Mantiene el log-posterior en la malla y lo actualiza en O(malla) por
+    respuesta; eap() y mle() se calculan a partir de él. Las respuestas se
+    guardan en arreglos preasignados de `capacity` filas (crecen si hace falta).
+    """
+
+    def __init__(self, prior_mean: float = 0.0, prior_sd: float = 1.0,
+                 grid: np.ndarray = THETA_GRID, capacity: int = 20):
+        self.grid = grid
+        self.log_posterior = -0.5 * ((grid - prior_mean) / prior_sd) ** 2
+        # Fila i: (a, b, c) del i-ésimo ítem respondido y si acertó
+        self._params = np.empty((max(1, capacity), 3))
+        self._correct = np.empty(max(1, capacity), dtype=bool)
+        self.count = 0
+
+    def update(self, params: ItemParams, correct: bool):
+        """Incorporar una respuesta"""
+        a, b, c = params
+        p = np.clip(probability(self.grid, a, b, c), 1e-9, 1 - 1e-9)
+        self.log_posterior += np.log(p) if correct else np.log1p(-p)
+
+        if self.count == len(self._correct):
+            self._params = np.concatenate([self._params, np.empty_like(self._params)])
+            self._correct = np.concatenate([self._correct, np.empty_like(self._correct)])
+        self._params[self.count] = params
+        self._correct[self.count] = correct
+        self.count += 1
+
+    def posterior(self) -> np.ndarray:
+        """Posterior normalizado en la malla"""
+        weights = np.exp(self.log_posterior - self.log_posterior.max())
+        return weights / weights.sum()
+
+    def eap(self) -> Tuple[float, float]:
+        """Estimación EAP: (theta, error estándar)"""
+        posterior = self.posterior()
+        theta = float(posterior @ self.grid)
+        se = math.sqrt(max(float(posterior @ self.grid ** 2) - theta ** 2, 0.0))
+        return theta, se
+
+    def mle(self, max_iter: int = 20, tol: float = 1e-4) -> float:
+        """Estimación de máxima verosimilitud (Newton-Raphson desde la EAP)
+
+        Con todas las respuestas correctas (o todas incorrectas) la MLE no
+        es finita; se devuelve el extremo de la malla.
+        """
+        if not self.count:
+            return self.eap()[0]
+
+        u = self._correct[:self.count].astype(float)
+        if u.all():
+            return float(self.grid[-1])
+        if not u.any():
+            return float(self.grid[0])
+
+        a, b, c = self._params[:self.count].T
+        theta = self.eap()[0]
+        for _ in range(max_iter):
+            p = np.clip(probability(theta, a, b, c), 1e-9, 1 - 1e-9)
+            # Derivadas de la log-verosimilitud 3PL
+            w = (p - c) / (p * (1.0 - c))
+            gradient = np.sum(a * w * (u - p))
+            information = np.sum(fisher_information(theta, a, b, c))
+            if information <= 0:
+                break
+            step = gradient / information
+            theta = float(np.clip(theta + step, self.grid[0], self.grid[-1]))
+            if abs(step) < tol:
+                break
+        return theta
+
+class ItemPool:
+    """Parámetros IRT del banco completo en arreglos de NumPy
+
+    La información de todos los ítems se calcula en una sola operación
+    vectorizada; la selección enmascara tema e ítems ya administrados.
+    """
+
+    def __init__(self, ids: Sequence[str], a, b, c, topics: Sequence[str],
+                 levels=None, points=None):
+        self.ids = list(ids)
+        self.a = np.asarray(a, dtype=float)
+        self.b = np.asarray(b, dtype=float)
+        self.c = np.asarray(c, dtype=float)
+        # Columnas compactas del banco: nivel de Difficulty y puntos
+        self.levels = np.asarray(levels if levels is not None else np.zeros(len(self.ids)), dtype=np.int8)
+        self.points = np.asarray(points if points is not None else np.zeros(len(self.ids)), dtype=np.int32)
+
+        self.topic_names = sorted(set(topics))
+        topic_code = {name: code for code, name in enumerate(self.topic_names)}
+        self.topic_codes = np.array([topic_code[t] for t in topics], dtype=np.int32)
+        # Índices de los ítems de cada tema, para no evaluar el banco entero
+        self.topic_items = {
+            name: np.flatnonzero(self.topic_codes == code)
+            for name, code in topic_code.items()
+        }
+        self.position = {item_id: i for i, item_id in enumerate(self.ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def default_params(question) -> ItemParams:
+        """Parámetros iniciales a partir de la dificultad y el tipo de pregunta"""
+        b = DEFAULT_B_BY_LEVEL.get(question.difficulty.value, 0.0)
+        question_type = getattr(question.type, 'value', question.type)
+        if question_type == 'multiple_choice' and question.options:
+            c = 1.0 / len(question.options)
+        elif question_type == 'true_false':
+            c = 0.5
+        else:
+            c = 0.0
+        return 1.0, b, c
+
+    @classmethod
+    def from_question_bank(cls, question_bank: Dict[str, Iterable],
+                           parameters: Optional[Dict[str, ItemParams]] = None) -> 'ItemPool':
+        """Crear el pool; `parameters` (id -> a, b, c) sustituye los valores por defecto"""
+        parameters = parameters or {}
+        ids, a, b, c, topics, levels, points = [], [], [], [], [], [], []
+        for topic, questions in question_bank.items():
+            for question in questions:
+                item_a, item_b, item_c = parameters.get(question.id) or cls.default_params(question)
+                ids.append(question.id)
+                a.append(item_a)
+                b.append(item_b)
+                c.append(item_c)
+                topics.append(topic)
+                levels.append(question.difficulty.value)
+                points.append(question.points)
+        return cls(ids, a, b, c, topics, levels, points)
+
+    def params(self, item_id: str) -> ItemParams:
+        """Parámetros (a, b, c) de un ítem"""
+        i = self.position[item_id]
+        return float(self.a[i]), float(self.b[i]), float(self.c[i])
+
+    def set_params(self, parameters: Dict[str, ItemParams]):
+        """Actualizar parámetros (p. ej. tras una calibración)"""
+        for item_id, (a, b, c) in parameters.items():
+            i = self.position.get(item_id)
+            if i is not None:
+                self.a[i], self.b[i], self.c[i] = a, b, c
+
+    def information(self, theta: float) -> np.ndarray:
+        """Información de Fisher de todos los ítems en theta"""
+        return fisher_information(theta, self.a, self.b, self.c)
+
+    def select_max_info(self, theta: float, administered: np.ndarray,
+                        topic: Optional[str] = None) -> Optional[int]:
+        """Índice del ítem de máxima información, o None si el pool está vacío
+
+        `administered` son las posiciones ya usadas en la sesión (pocas), así
+        cada sesión no necesita una máscara del tamaño del banco. Se busca
+        primero en el tema pedido, luego en todo el banco; si ya se
+        administró todo, se permite repetir.
+        """
+        if not self.ids:
+            return None
+
+        if topic in self.topic_items:
+            items = self.topic_items[topic]
+            information = fisher_information(theta, self.a[items], self.b[items], self.c[items])
+            # topic_items está ordenado: ubicar las administradas por bisección
+            slots = np.searchsorted(items, administered)
+            inside = slots < len(items)
+            slots = slots[inside][items[slots[inside]] == administered[inside]]
+            information[slots] = -np.inf
+            best = int(np.argmax(information))
+            if information[best] > -np.inf:
+                return int(items[best])
+
+        information = self.information(theta)
+        masked = information.copy()
+        masked[administered] = -np.inf
+        best = int(np.argmax(masked))
+        if masked[best] > -np.inf:
+            return best
+        return int(np.argmax(information))
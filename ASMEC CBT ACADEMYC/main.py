@@ -11,11 +11,13 @@ os.environ['KIVY_WINDOW'] = 'sdl2'
 os.environ['KIVY_TEXT'] = 'sdl2'
 os.environ['KIVY_VIDEO'] = 'ffpyplayer'
 
-import json
+# Informe de arranque opcional (ASMET_STARTUP_REPORT=1); va antes de Kivy
+# para medir también sus imports
+from startup_profile import StartupProfiler
+startup = StartupProfiler.from_env()
+
 import random
-import math
-import sqlite3
-import hashlib
+from dataclasses import asdict
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 
@@ -24,231 +26,33 @@ from kivy.app import App
 from kivy.uix.screenmanager import ScreenManager, Screen, FadeTransition
 from kivy.core.window import Window
 from kivy.clock import Clock
-from kivy.properties import StringProperty, NumericProperty, ListProperty, BooleanProperty
+from kivy.properties import StringProperty, NumericProperty, ListProperty
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.floatlayout import FloatLayout
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.scrollview import ScrollView
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.uix.textinput import TextInput
 from kivy.uix.modalview import ModalView
-from kivy.uix.widget import Widget
 from kivy.graphics import Color, Rectangle, RoundedRectangle
 from kivy.animation import Animation
 
+# Motor de almacenamiento único de la aplicación
+from database import DatabaseManager
+from db_worker import DatabaseWorker
+from exercise_buffer import ExerciseBuffer
+from particles import ParticleSystem
+
+if startup:
+    startup.mark('imports')
+
 # Configuración de ventana
 Window.size = (360, 640)
 Window.minimum_width, Window.minimum_height = 360, 640
 
-# ============================================
-# BASE DE DATOS - VERSIÓN CORREGIDA
-# ============================================
-
-class DatabaseManager:
-    """Gestor de base de datos SQLite - Versión Estable"""
-    
-    def __init__(self, db_path='asmet_data.db'):
-        self.db_path = db_path
-        self.conn = None
-        self.connect()
-    
-    def connect(self):
-        """Conectar a la base de datos"""
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
-        self.initialize_database()
-    
-    def initialize_database(self):
-        """Inicializar base de datos - MÉTODO CORREGIDO"""
-        cursor = self.conn.cursor()
-        
-        # Tabla de usuarios
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                email TEXT UNIQUE,
-                password_hash TEXT NOT NULL,
-                salt TEXT NOT NULL,
-                level INTEGER DEFAULT 1,
-                total_points INTEGER DEFAULT 0,
-                coins INTEGER DEFAULT 0,
-                overall_progress REAL DEFAULT 0.0,
-                created_at TEXT NOT NULL,
-                last_login TEXT
-            )
-        ''')
-        
-        # Tabla de progreso por materia
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS subject_progress (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                subject TEXT NOT NULL,
-                progress REAL DEFAULT 0.0,
-                last_updated TEXT,
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                UNIQUE(user_id, subject)
-            )
-        ''')
-        
-        # Tabla de logros
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS achievements (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                name TEXT NOT NULL,
-                description TEXT,
-                icon TEXT,
-                points INTEGER DEFAULT 0,
-                unlocked BOOLEAN DEFAULT 0,
-                unlocked_at TEXT,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Tabla de ejercicios
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS exercises (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                exercise_type TEXT NOT NULL,
-                correct BOOLEAN,
-                points_earned INTEGER,
-                time_spent INTEGER,
-                timestamp TEXT,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        self.conn.commit()
-        print("✅ Base de datos inicializada correctamente")
-    
-    def register_user(self, username: str, password: str, email: str = "") -> Tuple[bool, str]:
-        """Registrar nuevo usuario"""
-        try:
-            cursor = self.conn.cursor()
-            
-            # Verificar si usuario existe
-            cursor.execute('SELECT id FROM users WHERE username = ?', (username,))
-            if cursor.fetchone():
-                return False, "El usuario ya existe"
-            
-            # Generar hash de contraseña
-            salt = os.urandom(16).hex()
-            password_hash = hashlib.pbkdf2_hmac(
-                'sha256', 
-                password.encode(), 
-                salt.encode(), 
-                100000
-            ).hex()
-            
-            # Insertar usuario
-            created_at = datetime.now().isoformat()
-            cursor.execute('''
-                INSERT INTO users (username, email, password_hash, salt, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (username, email, password_hash, salt, created_at))
-            
-            user_id = cursor.lastrowid
-            
-            # Inicializar materias
-            subjects = ['Aritmética', 'Álgebra', 'Geometría', 'Cálculo', 'Estadística']
-            for subject in subjects:
-                cursor.execute('''
-                    INSERT INTO subject_progress (user_id, subject, last_updated)
-                    VALUES (?, ?, ?)
-                ''', (user_id, subject, created_at))
-            
-            self.conn.commit()
-            return True, "Usuario registrado exitosamente"
-            
-        except Exception as e:
-            return False, f"Error: {str(e)}"
-    
-    def authenticate_user(self, username: str, password: str) -> Optional[Dict]:
-        """Autenticar usuario"""
-        try:
-            cursor = self.conn.cursor()
-            
-            # Buscar usuario
-            cursor.execute('SELECT * FROM users WHERE username = ?', (username,))
-            user = cursor.fetchone()
-            
-            if not user:
-                return None
-            
-            # Verificar contraseña
-            salt = user['salt']
-            stored_hash = user['password_hash']
-            input_hash = hashlib.pbkdf2_hmac(
-                'sha256', 
-                password.encode(), 
-                salt.encode(), 
-                100000
-            ).hex()
-            
-            if stored_hash != input_hash:
-                return None
-            
-            # Actualizar último login
-            cursor.execute('UPDATE users SET last_login = ? WHERE id = ?',
-                          (datetime.now().isoformat(), user['id']))
-            self.conn.commit()
-            
-            return dict(user)
-            
-        except Exception as e:
-            print(f"Error en autenticación: {e}")
-            return None
-    
-    def get_user_stats(self, user_id: int) -> Dict:
-        """Obtener estadísticas del usuario"""
-        cursor = self.conn.cursor()
-        
-        # Ejercicios completados
-        cursor.execute('SELECT COUNT(*) FROM exercises WHERE user_id = ?', (user_id,))
-        exercises_done = cursor.fetchone()[0] or 0
-        
-        # Precisión
-        cursor.execute('SELECT COUNT(*), SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) FROM exercises WHERE user_id = ?', (user_id,))
-        total, correct = cursor.fetchone()
-        accuracy = (correct / total * 100) if total > 0 else 0
-        
-        # Puntos totales
-        cursor.execute('SELECT total_points FROM users WHERE id = ?', (user_id,))
-        total_points = cursor.fetchone()[0] or 0
-        
-        return {
-            'exercises_done': exercises_done,
-            'accuracy': round(accuracy, 1),
-            'total_points': total_points,
-            'level': 1 + (total_points // 100)  # 1 nivel cada 100 puntos
-        }
-    
-    def save_exercise_result(self, user_id: int, exercise_type: str, 
-                           correct: bool, points: int, time_spent: int):
-        """Guardar resultado de ejercicio"""
-        cursor = self.conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO exercises (user_id, exercise_type, correct, points_earned, time_spent, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (user_id, exercise_type, correct, points, time_spent, datetime.now().isoformat()))
-        
-        # Actualizar puntos del usuario
-        if correct:
-            cursor.execute('UPDATE users SET total_points = total_points + ? WHERE id = ?',
-                          (points, user_id))
-        
-        self.conn.commit()
-    
-    def close(self):
-        """Cerrar conexión"""
-        if self.conn:
-            self.conn.close()
-
 # ============================================
 # SISTEMA DE GAMIFICACIÓN
 # ============================================
@@ -266,9 +70,12 @@ class Achievement:
 class GamificationSystem:
     """Sistema de gamificación simplificado"""
     
-    def __init__(self, user_id: int, db: DatabaseManager):
+    def __init__(self, user_id: int, db: DatabaseManager,
+                 worker: Optional[DatabaseWorker] = None):
         self.user_id = user_id
         self.db = db
+        # Con worker, el guardado y la consulta de estadísticas salen de la UI
+        self.worker = worker
         self.achievements = self.load_achievements()
     
     def load_achievements(self) -> List[Achievement]:
@@ -284,15 +91,34 @@ class GamificationSystem:
     def record_exercise_completion(self, exercise_type: str, correct: bool, 
                                  points: int, time_spent: int):
         """Registrar ejercicio completado"""
-        # Guardar en base de datos
-        self.db.save_exercise_result(self.user_id, exercise_type, correct, points, time_spent)
+        if self.worker:
+            # Guardar en el hilo de base de datos; los logros se revisan al volver
+            self.worker.submit(
+                self.save_and_get_stats, exercise_type, correct, points, time_spent,
+                callback=self.check_achievements,
+                errback=self.on_save_error
+            )
+            return
         
-        # Verificar logros
-        self.check_achievements()
+        self.check_achievements(
+            self.save_and_get_stats(exercise_type, correct, points, time_spent)
+        )
+    
+    def save_and_get_stats(self, exercise_type: str, correct: bool,
+                           points: int, time_spent: int) -> Dict:
+        """Guardar el resultado y devolver las estadísticas actualizadas"""
+        self.db.save_exercise_result(self.user_id, exercise_type, correct, points, time_spent)
+        # Con escritura diferida el resultado puede seguir en la cola
+        self.db.flush()
+        return self.db.get_user_stats(self.user_id)
+    
+    def on_save_error(self, error: Exception):
+        """Si el guardado falla, revisar los logros con las estadísticas guardadas"""
+        self.worker.submit(self.db.get_user_stats, self.user_id,
+                           callback=self.check_achievements)
     
-    def check_achievements(self):
+    def check_achievements(self, stats: Dict):
         """Verificar y desbloquear logros"""
-        stats = self.db.get_user_stats(self.user_id)
         
         # Verificar cada logro
         for achievement in self.achievements:
@@ -334,24 +160,11 @@ class Leaderboard:
     
     def get_rankings(self, limit: int = 10) -> List[Dict]:
         """Obtener ranking general"""
-        cursor = self.db.conn.cursor()
-        cursor.execute('''
-            SELECT username, total_points, level 
-            FROM users 
-            ORDER BY total_points DESC 
-            LIMIT ?
-        ''', (limit,))
-        
-        rankings = []
-        for i, row in enumerate(cursor.fetchall(), 1):
-            rankings.append({
-                'position': i,
-                'username': row['username'],
-                'points': row['total_points'],
-                'level': row['level']
-            })
-        
-        return rankings
+        return self.db.get_rankings(limit)
+    
+    def get_user_rank(self, user_id: int) -> Optional[int]:
+        """Obtener la posición de un usuario en el ranking"""
+        return self.db.get_user_rank(user_id)
 
 # ============================================
 # COMPONENTES DE INTERFAZ
@@ -453,6 +266,7 @@ class LoginScreen(BaseScreen):
         self.password_input = EnhancedTextInput(hint_text='Contraseña', password=True)
         login_btn = RoundedButton(text='Iniciar Sesión')
         login_btn.bind(on_press=self.do_login)
+        self.login_btn = login_btn
         
         self.login_form.add_widget(self.username_input)
         self.login_form.add_widget(self.password_input)
@@ -466,6 +280,7 @@ class LoginScreen(BaseScreen):
         self.reg_confirm = EnhancedTextInput(hint_text='Confirmar contraseña', password=True)
         register_btn = RoundedButton(text='Crear Cuenta')
         register_btn.bind(on_press=self.do_register)
+        self.register_btn = register_btn
         
         self.register_form.add_widget(self.reg_username)
         self.register_form.add_widget(self.reg_email)
@@ -497,6 +312,11 @@ class LoginScreen(BaseScreen):
         Animation(opacity=1, duration=0.3).start(self.register_form)
         Animation(opacity=0, duration=0.3).start(self.login_form)
     
+    def set_busy(self, busy: bool):
+        """Evitar envíos repetidos mientras se verifica la contraseña"""
+        self.login_btn.disabled = busy
+        self.register_btn.disabled = busy
+    
     def do_login(self, instance):
         """Procesar login"""
         username = self.username_input.text.strip()
@@ -506,11 +326,25 @@ class LoginScreen(BaseScreen):
             self.show_message('Completa todos los campos', 'warning')
             return
         
-        user_data = self.app.db.authenticate_user(username, password)
+        # PBKDF2 corre en el pool; el resultado vuelve al hilo de Kivy
+        self.set_busy(True)
+        self.app.db.authenticate_user_async(
+            username, password,
+            callback=lambda user_data: Clock.schedule_once(
+                lambda dt: self.on_login_result(user_data)
+            )
+        )
+    
+    def on_login_result(self, user):
+        """Procesar resultado del login (hilo principal)"""
+        self.set_busy(False)
         
-        if user_data:
+        if user:
+            user_data = asdict(user)
             self.app.current_user = user_data
-            self.app.gamification = GamificationSystem(user_data['id'], self.app.db)
+            self.app.gamification = GamificationSystem(
+                user_data['id'], self.app.db, self.app.db_worker
+            )
             self.app.leaderboard = Leaderboard(self.app.db)
             
             self.manager.current = 'dashboard'
@@ -533,7 +367,17 @@ class LoginScreen(BaseScreen):
             self.show_message('Las contraseñas no coinciden', 'error')
             return
         
-        success, message = self.app.db.register_user(username, password, email)
+        self.set_busy(True)
+        self.app.db.register_user_async(
+            username, email, password,
+            callback=lambda result: Clock.schedule_once(
+                lambda dt: self.on_register_result(username, *result)
+            )
+        )
+    
+    def on_register_result(self, username: str, success: bool, message: str):
+        """Procesar resultado del registro (hilo principal)"""
+        self.set_busy(False)
         
         if success:
             self.show_message('¡Cuenta creada! Ahora inicia sesión', 'success')
@@ -577,12 +421,63 @@ class LoginScreen(BaseScreen):
         popup.add_widget(content)
         popup.open()
 
+class RankingRow(BoxLayout):
+    """Fila reciclable del ranking (vista de RecycleView)"""
+    position_text = StringProperty('')
+    username = StringProperty('')
+    points_text = StringProperty('')
+    position_color = ListProperty([0.6, 0.6, 0.6, 1])
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.orientation = 'horizontal'
+        
+        # Posición
+        pos_label = Label(font_size=14, bold=True, size_hint_x=0.2)
+        self.bind(
+            position_text=pos_label.setter('text'),
+            position_color=pos_label.setter('color')
+        )
+        
+        # Nombre
+        name_label = Label(font_size=14, halign='left', size_hint_x=0.5)
+        self.bind(username=name_label.setter('text'))
+        
+        # Puntos
+        points_label = Label(
+            font_size=14,
+            color=[0.2, 0.6, 0.9, 1],
+            size_hint_x=0.3
+        )
+        self.bind(points_text=points_label.setter('text'))
+        
+        self.add_widget(pos_label)
+        self.add_widget(name_label)
+        self.add_widget(points_label)
+
 class DashboardScreen(BaseScreen):
-    """Pantalla principal del dashboard"""
+    """Pantalla principal del dashboard
+    
+    Las tarjetas se construyen una sola vez y sus etiquetas están ligadas a
+    propiedades de la pantalla; al volver de un ejercicio sólo se consultan
+    los datos si la base de datos cambió desde el último refresco.
+    """
+    
+    # Espera antes de reintentar una carga de datos fallida
+    CONTENT_RETRY_SECONDS = 3
+    
+    username = StringProperty('')
+    level = NumericProperty(1)
+    total_points = NumericProperty(0)
+    exercises_done = NumericProperty(0)
+    accuracy = NumericProperty(0)
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         
+        # (usuario, versión de datos) del último refresco
+        self._shown_version = None
+        
         # Layout principal
         main_layout = BoxLayout(orientation='vertical')
         
@@ -599,11 +494,30 @@ class DashboardScreen(BaseScreen):
         )
         self.content.bind(minimum_height=self.content.setter('height'))
         
+        # Tarjetas (se crean una vez y se actualizan en su sitio)
+        self.no_user_label = Label(
+            text="No hay usuario activo",
+            font_size=18,
+            color=[0.5, 0.5, 0.5, 1]
+        )
+        self.progress_card = self.create_progress_card()
+        self.quick_exercises_card = self.create_quick_exercises()
+        self.achievements_card = self.create_achievements_card()
+        self.ranking_card = self.create_ranking_card()
+        self.content.add_widget(self.no_user_label)
+        
         scroll.add_widget(self.content)
         main_layout.add_widget(self.header)
         main_layout.add_widget(scroll)
         self.add_widget(main_layout)
     
+    def bind_text(self, label: Label, prop: str, template: str):
+        """Ligar el texto de una etiqueta a una propiedad de la pantalla"""
+        def update(instance, value):
+            label.text = template.format(value)
+        self.bind(**{prop: update})
+        update(self, getattr(self, prop))
+    
     def create_header(self):
         """Crear encabezado del dashboard"""
         header = BoxLayout(
@@ -622,22 +536,23 @@ class DashboardScreen(BaseScreen):
             halign='left'
         )
         self.level_label = Label(
-            text='Nivel: 1',
             font_size=14,
             color=[0.6, 0.6, 0.6, 1],
             halign='left'
         )
+        self.bind_text(self.welcome_label, 'username', 'Hola, {}')
+        self.bind_text(self.level_label, 'level', 'Nivel: {}')
         user_box.add_widget(self.welcome_label)
         user_box.add_widget(self.level_label)
         
         # Puntos
         points_box = BoxLayout(orientation='vertical')
         self.points_label = Label(
-            text='0 pts',
             font_size=18,
             color=[0.2, 0.6, 0.9, 1],
             halign='right'
         )
+        self.bind_text(self.points_label, 'total_points', '{} pts')
         points_box.add_widget(self.points_label)
         
         header.add_widget(user_box)
@@ -649,38 +564,86 @@ class DashboardScreen(BaseScreen):
         super().on_pre_enter()
         self.update_content()
     
-    def update_content(self):
-        """Actualizar contenido del dashboard"""
-        self.content.clear_widgets()
+    def update_content(self, force: bool = False):
+        """Pedir los datos del dashboard al hilo de base de datos"""
+        user = self.app.current_user
+        self.show_cards(user is not None)
+        if not user:
+            self._shown_version = None
+            return
         
-        if self.app.current_user:
-            stats = self.app.db.get_user_stats(self.app.current_user['id'])
-            
-            # Actualizar header
-            self.welcome_label.text = f"Hola, {self.app.current_user['username']}"
-            self.level_label.text = f"Nivel: {stats['level']}"
-            self.points_label.text = f"{stats['total_points']} pts"
-            
-            # 1. Progreso
-            self.add_progress_card(stats)
-            
-            # 2. Ejercicios rápidos
-            self.add_quick_exercises()
-            
-            # 3. Logros
-            self.add_achievements_card()
-            
-            # 4. Ranking
-            self.add_ranking_card()
+        shown_version = None if force else self._shown_version
+        self.app.db_worker.submit(
+            self.load_content, user['id'], shown_version,
+            callback=lambda content: self.apply_content(user, content),
+            errback=self.on_content_error
+        )
+    
+    def on_content_error(self, error: Exception):
+        """Reintentar la carga mientras el dashboard siga a la vista"""
+        self._shown_version = None
+        Clock.schedule_once(self.retry_content, self.CONTENT_RETRY_SECONDS)
+    
+    def retry_content(self, dt):
+        """Volver a pedir los datos si el dashboard sigue a la vista"""
+        if self.manager and self.manager.current == self.name:
+            self.update_content(force=True)
+    
+    def load_content(self, user_id: int, shown_version) -> Optional[Dict]:
+        """Leer estadísticas y ranking (hilo de base de datos)"""
+        # Las estadísticas deben incluir las respuestas aún en la cola diferida
+        self.app.db.flush()
+        
+        version = (user_id, self.app.db.data_version)
+        if version == shown_version:
+            return None
+        
+        leaderboard = getattr(self.app, 'leaderboard', None)
+        return {
+            'version': version,
+            'stats': self.app.db.get_user_stats(user_id),
+            'rankings': leaderboard.get_rankings(5) if leaderboard else None
+        }
+    
+    def apply_content(self, user: Dict, content: Optional[Dict]):
+        """Volcar los datos en las tarjetas (hilo principal)"""
+        # Sin cambios, o la sesión cambió mientras se leían los datos
+        if content is None or user is not self.app.current_user:
+            return
+        self._shown_version = content['version']
+        
+        # Las etiquetas ligadas se actualizan solas
+        stats = content['stats']
+        self.username = user['username']
+        self.level = stats['level']
+        self.total_points = stats['total_points']
+        self.exercises_done = stats['exercises_done']
+        self.accuracy = stats['accuracy']
+        
+        self.update_achievements()
+        self.update_rankings(content['rankings'])
+    
+    def show_cards(self, has_user: bool):
+        """Mostrar las tarjetas o el aviso de usuario inactivo"""
+        if has_user == (self.no_user_label.parent is None):
+            return
+        
+        self.content.clear_widgets()
+        if has_user:
+            for card in (self.progress_card, self.quick_exercises_card,
+                         self.achievements_card, self.ranking_card):
+                self.content.add_widget(card)
         else:
-            self.content.add_widget(Label(
-                text="No hay usuario activo",
-                font_size=18,
-                color=[0.5, 0.5, 0.5, 1]
-            ))
+            self.content.add_widget(self.no_user_label)
     
-    def add_progress_card(self, stats: Dict):
-        """Agregar tarjeta de progreso"""
+    def set_card_visible(self, card: Card, visible: bool):
+        """Ocultar una tarjeta sin sacarla del árbol de widgets"""
+        card.height = card.full_height if visible else 0
+        card.opacity = 1 if visible else 0
+        card.disabled = not visible
+    
+    def create_progress_card(self) -> Card:
+        """Crear tarjeta de progreso"""
         card = Card(height=150)
         
         # Título
@@ -695,32 +658,30 @@ class DashboardScreen(BaseScreen):
         stats_grid = GridLayout(cols=2, spacing=10, size_hint_y=0.6)
         
         stat_items = [
-            ('Ejercicios', f"{stats['exercises_done']}"),
-            ('Precisión', f"{stats['accuracy']}%"),
-            ('Nivel', f"{stats['level']}"),
-            ('Puntos', f"{stats['total_points']}")
+            ('Ejercicios', 'exercises_done', '{}'),
+            ('Precisión', 'accuracy', '{}%'),
+            ('Nivel', 'level', '{}'),
+            ('Puntos', 'total_points', '{}')
         ]
         
-        for label, value in stat_items:
+        for label, prop, template in stat_items:
             stat_box = BoxLayout(orientation='vertical')
             stat_box.add_widget(Label(
                 text=label,
                 font_size=12,
                 color=[0.5, 0.5, 0.5, 1]
             ))
-            stat_box.add_widget(Label(
-                text=value,
-                font_size=16,
-                bold=True
-            ))
+            value_label = Label(font_size=16, bold=True)
+            self.bind_text(value_label, prop, template)
+            stat_box.add_widget(value_label)
             stats_grid.add_widget(stat_box)
         
         card.add_widget(title)
         card.add_widget(stats_grid)
-        self.content.add_widget(card)
+        return card
     
-    def add_quick_exercises(self):
-        """Agregar ejercicios rápidos"""
+    def create_quick_exercises(self) -> Card:
+        """Crear tarjeta de ejercicios rápidos"""
         card = Card(height=180)
         
         title = Label(
@@ -756,20 +717,17 @@ class DashboardScreen(BaseScreen):
             
             exercises_grid.add_widget(ex_card)
         
+        # Tener problemas listos antes de que el usuario elija un tipo
+        self.app.exercise_buffer.prefetch(ex_type for _, _, ex_type in exercises)
+        
         card.add_widget(title)
         card.add_widget(exercises_grid)
-        self.content.add_widget(card)
+        return card
     
-    def add_achievements_card(self):
-        """Agregar tarjeta de logros"""
-        if not hasattr(self.app, 'gamification'):
-            return
-        
-        achievements = self.app.gamification.get_recent_achievements(3)
-        if not achievements:
-            return
-        
+    def create_achievements_card(self) -> Card:
+        """Crear tarjeta de logros con tres espacios reutilizables"""
         card = Card(height=120)
+        card.full_height = card.height
         
         title = Label(
             text='🏆 Logros Recientes',
@@ -780,28 +738,36 @@ class DashboardScreen(BaseScreen):
         
         ach_box = BoxLayout(spacing=10)
         
-        for ach in achievements:
+        self.achievement_slots = []
+        for _ in range(3):
             ach_item = BoxLayout(orientation='vertical')
-            ach_item.add_widget(Label(text=ach.icon, font_size=24))
-            ach_item.add_widget(Label(
-                text=ach.name[:10],
-                font_size=10,
-                halign='center'
-            ))
+            icon_label = Label(font_size=24)
+            name_label = Label(font_size=10, halign='center')
+            ach_item.add_widget(icon_label)
+            ach_item.add_widget(name_label)
             ach_box.add_widget(ach_item)
+            self.achievement_slots.append((icon_label, name_label))
         
         card.add_widget(title)
         card.add_widget(ach_box)
-        self.content.add_widget(card)
+        return card
     
-    def add_ranking_card(self):
-        """Agregar tarjeta de ranking"""
-        if not hasattr(self.app, 'leaderboard'):
-            return
-        
-        rankings = self.app.leaderboard.get_rankings(5)
-        
+    def update_achievements(self):
+        """Actualizar la tarjeta de logros"""
+        achievements = []
+        if getattr(self.app, 'gamification', None):
+            achievements = self.app.gamification.get_recent_achievements(3)
+        
+        self.set_card_visible(self.achievements_card, bool(achievements))
+        for i, (icon_label, name_label) in enumerate(self.achievement_slots):
+            ach = achievements[i] if i < len(achievements) else None
+            icon_label.text = ach.icon if ach else ''
+            name_label.text = ach.name[:10] if ach else ''
+    
+    def create_ranking_card(self) -> Card:
+        """Crear tarjeta de ranking"""
         card = Card(height=180)
+        card.full_height = card.height
         
         title = Label(
             text='🏅 Ranking Top 5',
@@ -810,56 +776,89 @@ class DashboardScreen(BaseScreen):
             halign='left'
         )
         
-        # Lista de rankings
-        ranking_list = BoxLayout(orientation='vertical', spacing=5)
-        
-        for rank in rankings:
-            rank_item = BoxLayout(
-                orientation='horizontal',
-                size_hint_y=None,
-                height=30
-            )
-            
-            # Posición
-            pos_color = [0.96, 0.77, 0.23, 1] if rank['position'] <= 3 else [0.6, 0.6, 0.6, 1]
-            pos_label = Label(
-                text=f"{rank['position']}°",
-                font_size=14,
-                bold=True,
-                color=pos_color,
-                size_hint_x=0.2
-            )
-            
-            # Nombre
-            name_label = Label(
-                text=rank['username'][:12],
-                font_size=14,
-                halign='left',
-                size_hint_x=0.5
-            )
-            
-            # Puntos
-            points_label = Label(
-                text=str(rank['points']),
-                font_size=14,
-                color=[0.2, 0.6, 0.9, 1],
-                size_hint_x=0.3
-            )
-            
-            rank_item.add_widget(pos_label)
-            rank_item.add_widget(name_label)
-            rank_item.add_widget(points_label)
-            ranking_list.add_widget(rank_item)
+        # Lista de rankings: filas recicladas en lugar de widgets nuevos
+        self.ranking_view = RecycleView(viewclass=RankingRow, do_scroll_x=False)
+        ranking_layout = RecycleBoxLayout(
+            orientation='vertical',
+            spacing=5,
+            default_size=(None, 30),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        ranking_layout.bind(minimum_height=ranking_layout.setter('height'))
+        self.ranking_view.add_widget(ranking_layout)
         
         card.add_widget(title)
-        card.add_widget(ranking_list)
-        self.content.add_widget(card)
+        card.add_widget(self.ranking_view)
+        return card
+    
+    def update_rankings(self, rankings: Optional[List[Dict]]):
+        """Actualizar los datos de la lista de ranking"""
+        self.set_card_visible(self.ranking_card, rankings is not None)
+        if rankings is None:
+            return
+        
+        self.ranking_view.data = [
+            {
+                'position_text': f"{rank['position']}°",
+                'username': rank['username'][:12],
+                'points_text': str(rank['points']),
+                'position_color': [0.96, 0.77, 0.23, 1] if rank['position'] <= 3 else [0.6, 0.6, 0.6, 1]
+            }
+            for rank in rankings
+        ]
     
     def start_exercise(self, exercise_type: str):
         """Iniciar ejercicio"""
         self.app.current_exercise = exercise_type
         self.manager.current = 'exercise'
 
+def make_problem(exercise_type: str, difficulty: int = 1) -> Dict:
+    """Generar un problema matemático (los rangos crecen con la dificultad)"""
+    scale = max(1, difficulty)
+    
+    if exercise_type == 'arithmetic':
+        # Suma
+        a, b = random.randint(1, 50 * scale), random.randint(1, 50 * scale)
+        return {
+            'text': f'{a} + {b} = ?',
+            'answer': a + b,
+            'points': 10
+        }
+    elif exercise_type == 'subtraction':
+        # Resta
+        a, b = random.randint(20, 100 * scale), random.randint(1, 20 * scale)
+        return {
+            'text': f'{a} - {b} = ?',
+            'answer': a - b,
+            'points': 10
+        }
+    elif exercise_type == 'multiplication':
+        # Multiplicación
+        a, b = random.randint(2, 12 * scale), random.randint(2, 12)
+        return {
+            'text': f'{a} × {b} = ?',
+            'answer': a * b,
+            'points': 15
+        }
+    elif exercise_type == 'division':
+        # División
+        b = random.randint(2, 10 * scale)
+        a = b * random.randint(2, 10)
+        return {
+            'text': f'{a} ÷ {b} = ?',
+            'answer': a // b,
+            'points': 15
+        }
+    else:
+        # Problema genérico
+        a, b = random.randint(1, 100 * scale), random.randint(1, 100 * scale)
+        return {
+            'text': f'{a} + {b} = ?',
+            'answer': a + b,
+            'points': 10
+        }
+
 class ExerciseScreen(BaseScreen):
     """Pantalla de ejercicios"""
     
@@ -927,57 +926,25 @@ class ExerciseScreen(BaseScreen):
         main_layout.add_widget(self.result_label)
         
         self.add_widget(main_layout)
+        
+        # Partículas de celebración: pool fijo dibujado sobre el contenido
+        self.particles = ParticleSystem(max_particles=30)
+        self.add_widget(self.particles)
     
     def on_pre_enter(self):
         """Generar nuevo problema al entrar"""
         super().on_pre_enter()
         self.generate_problem()
     
+    def on_leave(self):
+        """Detener la celebración al salir de la pantalla"""
+        super().on_leave()
+        self.particles.stop()
+    
     def generate_problem(self):
-        """Generar un problema matemático"""
-        ex_type = getattr(self.app, 'current_exercise', 'arithmetic')
-        
-        if ex_type == 'arithmetic':
-            # Suma
-            a, b = random.randint(1, 50), random.randint(1, 50)
-            self.current_problem = {
-                'text': f'{a} + {b} = ?',
-                'answer': a + b,
-                'points': 10
-            }
-        elif ex_type == 'subtraction':
-            # Resta
-            a, b = random.randint(20, 100), random.randint(1, 20)
-            self.current_problem = {
-                'text': f'{a} - {b} = ?',
-                'answer': a - b,
-                'points': 10
-            }
-        elif ex_type == 'multiplication':
-            # Multiplicación
-            a, b = random.randint(2, 12), random.randint(2, 12)
-            self.current_problem = {
-                'text': f'{a} × {b} = ?',
-                'answer': a * b,
-                'points': 15
-            }
-        elif ex_type == 'division':
-            # División
-            b = random.randint(2, 10)
-            a = b * random.randint(2, 10)
-            self.current_problem = {
-                'text': f'{a} ÷ {b} = ?',
-                'answer': a // b,
-                'points': 15
-            }
-        else:
-            # Problema genérico
-            a, b = random.randint(1, 100), random.randint(1, 100)
-            self.current_problem = {
-                'text': f'{a} + {b} = ?',
-                'answer': a + b,
-                'points': 10
-            }
+        """Mostrar el siguiente problema (ya pre-generado en el búfer)"""
+        ex_type = getattr(self.app, 'current_exercise', None) or 'arithmetic'
+        self.current_problem = self.app.exercise_buffer.take(ex_type)
         
         # Actualizar interfaz
         self.problem_label.text = f"Ejercicio: {ex_type.capitalize()}"
@@ -1076,31 +1043,31 @@ class ExerciseScreen(BaseScreen):
     
     def celebrate(self):
         """Animación de celebración"""
-        particles = ['🎉', '✨', '🌟', '⭐', '🎊']
-        
-        for _ in range(10):
-            particle = Label(
-                text=random.choice(particles),
-                font_size=random.randint(20, 40),
-                pos=(random.randint(50, 300), random.randint(100, 500))
-            )
-            
-            self.add_widget(particle)
-            
-            anim = Animation(
-                y=600, 
-                opacity=0,
-                duration=random.uniform(1, 2)
-            )
-            anim.start(particle)
-            
-            # Remover después de animación
-            Clock.schedule_once(lambda dt, p=particle: self.remove_widget(p), 2)
+        # Reutiliza partículas del pool; si están todas en uso no se lanzan más
+        self.particles.emit(10)
 
 # ============================================
 # APLICACIÓN PRINCIPAL
 # ============================================
 
+class LazyScreenManager(ScreenManager):
+    """Gestor de pantallas que construye cada pantalla en su primera visita"""
+    
+    def __init__(self, screen_factories: Dict[str, type], **kwargs):
+        # nombre -> clase de la pantalla, aún sin construir
+        self.screen_factories = dict(screen_factories)
+        super().__init__(**kwargs)
+    
+    def get_screen(self, name):
+        if name in self.screen_factories:
+            self.add_widget(self.screen_factories.pop(name)(name=name))
+            if startup:
+                startup.mark(f'pantalla {name}')
+        return super().get_screen(name)
+    
+    def has_screen(self, name):
+        return name in self.screen_factories or super().has_screen(name)
+
 class ASMETApp(App):
     """Aplicación principal"""
     
@@ -1108,34 +1075,79 @@ class ASMETApp(App):
         super().__init__(**kwargs)
         self.title = "ASMET CBT ACADEMYC"
         self.db = None
+        self.db_worker = None
         self.current_user = None
         self.gamification = None
         self.leaderboard = None
+        self.exercise_buffer = None
         self.current_exercise = None
     
     def build(self):
         """Construir aplicación"""
-        # Inicializar base de datos
-        self.db = DatabaseManager()
+        # Inicializar base de datos (ASMET_WRITE_BEHIND=1 agrupa las escrituras)
+        self.db = DatabaseManager(
+            write_behind=os.environ.get('ASMET_WRITE_BEHIND') == '1',
+            track_main_thread=True
+        )
+        if startup:
+            startup.mark('base de datos')
+        # Todas las consultas de la UI pasan por este hilo; los resultados
+        # vuelven al hilo principal en el siguiente frame
+        self.db_worker = DatabaseWorker(
+            dispatch=lambda fn: Clock.schedule_once(lambda dt: fn())
+        )
         
-        # Crear gestor de pantallas
-        sm = ScreenManager(transition=FadeTransition())
+        # Problemas pre-generados en segundo plano (ASMET_EXERCISE_BUFFER = tamaño)
+        self.exercise_buffer = ExerciseBuffer(
+            make_problem,
+            size=int(os.environ.get('ASMET_EXERCISE_BUFFER', 5))
+        )
         
-        # Registrar pantallas
-        sm.add_widget(LoginScreen(name='login'))
-        sm.add_widget(DashboardScreen(name='dashboard'))
-        sm.add_widget(ExerciseScreen(name='exercise'))
+        # Crear gestor de pantallas; sólo el login se construye ahora,
+        # el resto al navegar a ellas por primera vez
+        sm = LazyScreenManager(
+            {
+                'login': LoginScreen,
+                'dashboard': DashboardScreen,
+                'exercise': ExerciseScreen,
+            },
+            transition=FadeTransition()
+        )
+        sm.current = 'login'
         
         return sm
     
+    def set_difficulty(self, difficulty: int):
+        """Cambiar la dificultad; descarta los problemas pre-generados"""
+        self.exercise_buffer.set_difficulty(difficulty)
+    
     def on_start(self):
         """Ejecutar al iniciar la aplicación"""
         print("🚀 ASMET App iniciada correctamente")
+        if startup:
+            Clock.schedule_once(self.report_startup, 0)
+    
+    def report_startup(self, dt):
+        """Imprimir el informe de arranque tras el primer frame"""
+        startup.mark('primer frame')
+        startup.uninstall()
+        print(startup.report())
+    
+    def on_pause(self):
+        """Ejecutar al pasar a segundo plano (Android puede cerrar la app)"""
+        if self.db:
+            self.db_worker.submit(self.db.flush)
+        return True
     
     def on_stop(self):
         """Ejecutar al cerrar la aplicación"""
+        if self.exercise_buffer:
+            self.exercise_buffer.close()
         if self.db:
-            self.db.close()
+            print(f"Consultas en el hilo principal: {self.db.main_thread_queries}")
+            # close() vacía la cola diferida; el hilo termina lo pendiente antes
+            self.db_worker.submit(self.db.close)
+            self.db_worker.close()
         print("👋 ASMET App finalizada")
 
 # ============================================
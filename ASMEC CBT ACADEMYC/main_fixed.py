@@ -2,7 +2,6 @@
 ASMET CBT ACADEMYC - Versión Simplificada y Estable
 """
 
-import sqlite3
 from datetime import datetime
 
 from kivy.app import App
@@ -20,56 +19,12 @@ from kivy.clock import Clock
 from kivy.graphics import Color, Rectangle
 from kivy.properties import ListProperty
 
+# Motor de almacenamiento único de la aplicación
+from database import DatabaseManager
+
 # Configuración
 Window.size = (360, 640)
 
-# Base de datos simple
-class DatabaseManager:
-    def __init__(self, db_path='asmet_simple.db'):
-        self.db_path = db_path
-        self.conn = None
-        
-    def initialize_database(self):
-        """Inicializar base de datos simple"""
-        self.conn = sqlite3.connect(self.db_path)
-        cursor = self.conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE,
-                password TEXT,
-                level INTEGER DEFAULT 1,
-                points INTEGER DEFAULT 0
-            )
-        ''')
-        
-        self.conn.commit()
-        print("Base de datos simple inicializada")
-        
-    def register_user(self, username, password):
-        """Registrar usuario simple"""
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute(
-                'INSERT INTO users (username, password) VALUES (?, ?)',
-                (username, password)
-            )
-            self.conn.commit()
-            return True, "Usuario registrado"
-        except:
-            return False, "Usuario ya existe"
-            
-    def authenticate_user(self, username, password):
-        """Autenticar usuario simple"""
-        cursor = self.conn.cursor()
-        cursor.execute(
-            'SELECT id, username, level, points FROM users WHERE username = ? AND password = ?',
-            (username, password)
-        )
-        user = cursor.fetchone()
-        return user
-
 class SimpleScreen(Screen):
     """Pantalla simple sin canvas complejo"""
     background_color = ListProperty([0.97, 0.97, 0.97, 1])
@@ -166,13 +121,13 @@ class LoginScreen(SimpleScreen):
         
         if user:
             self.app.current_user = {
-                'id': user[0],
-                'username': user[1],
-                'level': user[2],
-                'points': user[3]
+                'id': user.id,
+                'username': user.username,
+                'level': user.level,
+                'points': user.total_points
             }
             self.manager.current = 'dashboard'
-            self.show_message(f'¡Bienvenido {user[1]}!', 'success')
+            self.show_message(f'¡Bienvenido {user.username}!', 'success')
         else:
             self.show_message('Credenciales incorrectas', 'error')
     
@@ -185,7 +140,7 @@ class LoginScreen(SimpleScreen):
             self.show_message('Completa todos los campos', 'warning')
             return
         
-        success, message = self.app.db.register_user(username, password)
+        success, message = self.app.db.register_user(username, None, password)
         
         if success:
             self.show_message('¡Cuenta creada! Ahora inicia sesión', 'success')
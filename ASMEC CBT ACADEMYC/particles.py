@@ -0,0 +1,135 @@
+import random
+from typing import Dict, List, Optional, Sequence
+
+from kivy.clock import Clock
+from kivy.core.text import Label as CoreLabel
+from kivy.graphics import Color, Rectangle
+from kivy.uix.widget import Widget
+
+# Tamaño al que se rasteriza cada emoji; las partículas escalan la textura
+TEXTURE_FONT_SIZE = 40
+
+class Particle:
+    """Estado de una partícula del pool (sin widgets propios)"""
+    __slots__ = ('color', 'rect', 'active', 'x', 'y', 'start_y', 'size',
+                 'age', 'duration')
+
+    def __init__(self, color: Color, rect: Rectangle):
+        self.color = color
+        self.rect = rect
+        self.active = False
+        self.x = self.y = self.start_y = 0.0
+        self.size = (0, 0)
+        self.age = 0.0
+        self.duration = 1.0
+
+class ParticleSystem(Widget):
+    """Sistema de partículas con pool fijo y un único callback de reloj
+
+    Las instrucciones Color/Rectangle se crean una vez (max_particles) y se
+    reutilizan; los emojis se rasterizan una sola vez por símbolo. Si todas
+    las partículas están en uso, las nuevas se descartan.
+    """
+
+    # Texturas compartidas entre instancias: símbolo -> textura
+    _textures: Dict[str, object] = {}
+
+    def __init__(self, symbols: Sequence[str] = ('🎉', '✨', '🌟', '⭐', '🎊'),
+                 max_particles: int = 30, target_y: float = 600, **kwargs):
+        super().__init__(**kwargs)
+        self.symbols = list(symbols)
+        self.max_particles = max_particles
+        self.target_y = target_y
+
+        self._particles: List[Particle] = []
+        self._active = 0
+        self._event = None
+
+        with self.canvas:
+            for _ in range(max_particles):
+                color = Color(1, 1, 1, 0)
+                rect = Rectangle(size=(0, 0))
+                self._particles.append(Particle(color, rect))
+
+    @classmethod
+    def texture_for(cls, symbol: str):
+        """Textura del símbolo, rasterizada en el primer uso"""
+        texture = cls._textures.get(symbol)
+        if texture is None:
+            label = CoreLabel(text=symbol, font_size=TEXTURE_FONT_SIZE)
+            label.refresh()
+            texture = cls._textures[symbol] = label.texture
+        return texture
+
+    @property
+    def active_count(self) -> int:
+        """Partículas visibles en este momento"""
+        return self._active
+
+    def emit(self, count: int = 10, area: Optional[Sequence[float]] = None) -> int:
+        """Lanzar hasta `count` partículas; devuelve cuántas se lanzaron"""
+        x_min, x_max, y_min, y_max = area or (50, 300, 100, 500)
+        launched = 0
+
+        for particle in self._particles:
+            if launched == count:
+                break
+            if particle.active:
+                continue
+
+            texture = self.texture_for(random.choice(self.symbols))
+            scale = random.randint(20, 40) / TEXTURE_FONT_SIZE
+
+            particle.active = True
+            particle.x = self.x + random.randint(x_min, x_max)
+            particle.y = particle.start_y = self.y + random.randint(y_min, y_max)
+            particle.size = (texture.width * scale, texture.height * scale)
+            particle.age = 0.0
+            particle.duration = random.uniform(1, 2)
+
+            particle.rect.texture = texture
+            particle.rect.size = particle.size
+            particle.rect.pos = (particle.x, particle.y)
+            particle.color.a = 1
+
+            launched += 1
+
+        self._active += launched
+        if self._active and self._event is None:
+            self._event = Clock.schedule_interval(self.update, 0)
+        return launched
+
+    def update(self, dt: float):
+        """Avanzar todas las partículas (un solo callback por frame)"""
+        target_y = self.y + self.target_y
+
+        for particle in self._particles:
+            if not particle.active:
+                continue
+
+            particle.age += dt
+            progress = particle.age / particle.duration
+            if progress >= 1:
+                particle.active = False
+                particle.color.a = 0
+                self._active -= 1
+                continue
+
+            # Igual que la animación anterior: subir hasta target_y y desvanecerse
+            particle.y = particle.start_y + (target_y - particle.start_y) * progress
+            particle.rect.pos = (particle.x, particle.y)
+            particle.color.a = 1 - progress
+
+        if not self._active:
+            self.stop()
+
+    def stop(self):
+        """Ocultar las partículas y quitar el callback del reloj"""
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+
+        for particle in self._particles:
+            particle.active = False
+            particle.color.a = 0
+        self._active = 0
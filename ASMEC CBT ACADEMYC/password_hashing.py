@@ -0,0 +1,78 @@
+import hashlib
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Tuple
+
+PBKDF2_ITERATIONS = 100000
+
+def hash_password(password: str, salt: str) -> str:
+    """Generar hash seguro de contraseña (PBKDF2-SHA256)"""
+    return hashlib.pbkdf2_hmac(
+        'sha256',
+        password.encode('utf-8'),
+        salt.encode('utf-8'),
+        PBKDF2_ITERATIONS
+    ).hex()
+
+def _hash_pair(pair: Tuple[str, str]) -> str:
+    """Adaptador para map(): (contraseña, salt) -> hash"""
+    return hash_password(*pair)
+
+class PasswordHasher:
+    """Pool de trabajadores para calcular PBKDF2 fuera del hilo de la UI
+
+    hashlib libera el GIL durante PBKDF2, así que un pool de hilos ya usa
+    todos los núcleos; use_processes=True queda para entornos sin OpenSSL.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, use_processes: bool = False):
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        """Crear el pool en el primer uso"""
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='pbkdf2'
+                )
+        return self._executor
+
+    def submit(self, fn: Callable, *args,
+               callback: Optional[Callable] = None) -> Future:
+        """Ejecutar fn en el pool; callback(resultado) se llama al terminar"""
+        future = self.executor.submit(fn, *args)
+
+        if callback:
+            def deliver(done: Future):
+                try:
+                    callback(done.result())
+                except Exception as e:
+                    print(f"Error en tarea de autenticación: {e}")
+            future.add_done_callback(deliver)
+
+        return future
+
+    def hash_async(self, password: str, salt: str,
+                   callback: Optional[Callable[[str], None]] = None) -> Future:
+        """Calcular un hash en segundo plano"""
+        return self.submit(hash_password, password, salt, callback=callback)
+
+    def hash_many(self, pairs: Iterable[Tuple[str, str]]) -> List[str]:
+        """Calcular muchos hashes en paralelo, en el mismo orden de entrada"""
+        pairs = list(pairs)
+        if self.use_processes:
+            chunksize = max(1, len(pairs) // (self.max_workers * 4))
+            return list(self.executor.map(_hash_pair, pairs, chunksize=chunksize))
+        return list(self.executor.map(_hash_pair, pairs))
+
+    def shutdown(self, wait: bool = True):
+        """Detener el pool de trabajadores"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
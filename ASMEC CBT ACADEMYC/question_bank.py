@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Contenido incluido en la app: un JSON por tema con la lista de preguntas
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'content', 'questions')
+
+# Fila de contenido: id, text, type, correct_answer, points, difficulty,
+# topic (subtema) y, opcionalmente, options y hint
+QuestionRow = Dict[str, Any]
+
+class JsonQuestionSource:
+    """Preguntas en archivos JSON, uno por tema (<directorio>/<tema>.json)"""
+
+    def __init__(self, directory: str = CONTENT_DIR):
+        self.directory = directory
+
+    def path(self, topic: str) -> str:
+        """Archivo de un tema"""
+        return os.path.join(self.directory, f'{topic}.json')
+
+    def topics(self) -> List[str]:
+        """Temas disponibles (nombres de archivo)"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith('.json'))
+
+    def version(self, topic: str):
+        """Marca de cambio del tema: fecha de modificación y tamaño del archivo"""
+        try:
+            stat = os.stat(self.path(topic))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def rows(self, topic: str) -> Iterator[QuestionRow]:
+        """Filas del tema"""
+        with open(self.path(topic), encoding='utf-8') as f:
+            yield from json.load(f)
+
+class SqliteQuestionSource:
+    """Preguntas en la tabla questions, leídas por páginas de `page_size`
+
+    Para bancos grandes: sólo se lee el tema pedido y nunca se materializa
+    el resultado completo de la consulta. La versión es la del banco entero
+    (DatabaseManager.save_questions la incrementa).
+    """
+
+    def __init__(self, db, page_size: int = 500):
+        self.db = db
+        self.page_size = page_size
+
+    def topics(self) -> List[str]:
+        """Temas con alguna pregunta"""
+        return self.db.get_question_topics()
+
+    def version(self, topic: str):
+        """Versión del banco (igual para todos los temas)"""
+        return self.db.get_question_bank_version()
+
+    def rows(self, topic: str) -> Iterator[QuestionRow]:
+        """Filas del tema, página a página por id"""
+        after_id = ''
+        while True:
+            page = self.db.get_questions_page(topic, after_id, self.page_size)
+            yield from page
+            if len(page) < self.page_size:
+                return
+            after_id = page[-1]['id']
+
+class QuestionBank:
+    """Banco de preguntas compartido, cargado por tema bajo demanda
+
+    Cada tema se construye (con `factory`) la primera vez que se pide.
+    reload_if_changed() consulta la versión de los temas cargados, como
+    mucho cada `check_interval` segundos, y descarta los que cambiaron;
+    `version` aumenta con cada cambio para que los motores se reconstruyan.
+    """
+
+    def __init__(self, source, factory: Callable[[QuestionRow], Any],
+                 check_interval: float = 2.0):
+        self.source = source
+        self.factory = factory
+        self.check_interval = check_interval
+        self.version = 0
+
+        # tema -> (versión en la fuente, preguntas)
+        self._loaded: Dict[str, tuple] = {}
+        self._topics: Optional[List[str]] = None
+        self._lock = threading.RLock()
+        self._last_check = time.monotonic()
+
+    def topics(self) -> List[str]:
+        """Temas del banco"""
+        with self._lock:
+            if self._topics is None:
+                self._topics = self.source.topics()
+            return list(self._topics)
+
+    def questions(self, topic: str) -> List:
+        """Preguntas de un tema (se cargan en el primer uso)"""
+        with self._lock:
+            loaded = self._loaded.get(topic)
+            if loaded is None:
+                version = self.source.version(topic)
+                questions = [self.factory(row) for row in self.source.rows(topic)]
+                loaded = self._loaded[topic] = (version, questions)
+            return loaded[1]
+
+    def load_all(self) -> Dict[str, List]:
+        """Todas las preguntas, por tema"""
+        return {topic: self.questions(topic) for topic in self.topics()}
+
+    def reload_if_changed(self, force: bool = False) -> bool:
+        """Descartar los temas que cambiaron en la fuente; True si hubo cambios"""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return False
+
+        with self._lock:
+            self._last_check = now
+            changed = self._topics is not None and self.source.topics() != self._topics
+            if changed:
+                self._topics = None
+
+            for topic, (version, _) in list(self._loaded.items()):
+                if self.source.version(topic) != version:
+                    del self._loaded[topic]
+                    changed = True
+
+            if changed:
+                self.version += 1
+            return changed
@@ -0,0 +1,84 @@
+import json
+import os
+from typing import Dict, List, Tuple
+
+class SessionLog:
+    """Registro de solo anexado de los exámenes en curso, un archivo por sesión
+
+    La primera línea es la cabecera del examen (JSON); cada evento posterior
+    es una línea corta que se agrega al final, así un punto de control cuesta
+    una escritura de pocas decenas de bytes y nunca se reescribe el archivo.
+    Si la app muere a mitad de una escritura, read() descarta la línea
+    incompleta. Con `durable` cada punto de control hace además fsync.
+    """
+
+    SUFFIX = '.log'
+
+    def __init__(self, directory: str = 'sessions', durable: bool = False):
+        self.directory = directory
+        self.durable = durable
+        self._files = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, session_id: str) -> str:
+        """Archivo de una sesión"""
+        return os.path.join(self.directory, session_id + self.SUFFIX)
+
+    def start(self, session_id: str, header: Dict, *records: list):
+        """Crear el registro de una sesión nueva"""
+        self._files[session_id] = open(self.path(session_id), 'w', encoding='utf-8')
+        self._write(session_id, [header, *records])
+
+    def append(self, session_id: str, *records: list):
+        """Agregar eventos al final del registro"""
+        if session_id not in self._files:
+            self._files[session_id] = open(self.path(session_id), 'a', encoding='utf-8')
+        self._write(session_id, records)
+
+    def _write(self, session_id: str, records):
+        f = self._files[session_id]
+        # Una sola escritura por punto de control
+        f.write(''.join(json.dumps(r, ensure_ascii=False, separators=(',', ':')) + '\n'
+                        for r in records))
+        f.flush()
+        if self.durable:
+            os.fsync(f.fileno())
+
+    def read(self, session_id: str) -> Tuple[Dict, List[list]]:
+        """Cabecera y eventos de una sesión
+
+        Una última línea sin terminar (escritura interrumpida) se descarta y
+        se recorta del archivo, para que los siguientes eventos queden bien.
+        """
+        self.close(session_id)
+        with open(self.path(session_id), 'rb') as f:
+            data = f.read()
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            with open(self.path(session_id), 'r+b') as f:
+                f.truncate(complete)
+
+        lines = data[:complete].decode('utf-8').splitlines()
+        if not lines:
+            raise ValueError(f"Registro de sesión vacío: {session_id}")
+        return json.loads(lines[0]), [json.loads(line) for line in lines[1:]]
+
+    def pending(self) -> List[str]:
+        """Sesiones sin terminar, de la más antigua a la más reciente"""
+        names = [name for name in os.listdir(self.directory) if name.endswith(self.SUFFIX)]
+        names.sort(key=lambda name: os.path.getmtime(os.path.join(self.directory, name)))
+        return [name[:-len(self.SUFFIX)] for name in names]
+
+    def close(self, session_id: str):
+        """Cerrar el archivo de una sesión (se reabre al agregar)"""
+        f = self._files.pop(session_id, None)
+        if f is not None:
+            f.close()
+
+    def remove(self, session_id: str):
+        """Borrar el registro de una sesión terminada"""
+        self.close(session_id)
+        try:
+            os.remove(self.path(session_id))
+        except FileNotFoundError:
+            pass
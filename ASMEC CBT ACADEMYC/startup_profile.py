@@ -0,0 +1,89 @@
+import builtins
+import os
+import sys
+import threading
+import time
+from typing import List, Optional, Tuple
+
+class StartupProfiler:
+    """Medir el arranque en frío: imports nuevos y fases de la aplicación
+
+    Envuelve builtins.__import__ para registrar, como `-X importtime`, el
+    tiempo acumulado y propio de cada módulo que se carga por primera vez.
+    Las fases (build, primer frame...) se marcan con mark().
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        # (módulo, acumulado ms, propio ms, profundidad)
+        self.imports: List[Tuple[str, float, float, int]] = []
+        # (fase, ms desde el inicio)
+        self.phases: List[Tuple[str, float]] = []
+        # Pila de imports en curso, una por hilo: cualquier hilo puede importar
+        self._local = threading.local()
+        self._original_import = None
+
+    @classmethod
+    def from_env(cls) -> Optional['StartupProfiler']:
+        """Crear e instalar el perfilador si ASMET_STARTUP_REPORT=1"""
+        if os.environ.get('ASMET_STARTUP_REPORT') != '1':
+            return None
+        profiler = cls()
+        profiler.install()
+        return profiler
+
+    def install(self):
+        """Empezar a medir los imports"""
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._timed_import
+
+    def uninstall(self):
+        """Dejar de medir los imports"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        """__import__ que mide sólo los módulos absolutos aún no cargados"""
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        stack = self._stack()
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.imports.append(
+                (name, elapsed * 1000, (elapsed - children) * 1000, len(stack))
+            )
+
+    def _stack(self) -> List[float]:
+        """Pila de imports del hilo actual"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def mark(self, phase: str):
+        """Registrar que terminó una fase del arranque"""
+        self.phases.append((phase, (time.perf_counter() - self.start) * 1000))
+
+    def report(self, top: int = 15) -> str:
+        """Informe de fases y de los imports más lentos"""
+        lines = ['=== Arranque ===']
+        for phase, elapsed_ms in self.phases:
+            lines.append(f"{elapsed_ms:10.1f} ms  {phase}")
+
+        lines.append(f"\n=== Imports más lentos (de {len(self.imports)}) ===")
+        lines.append(f"{'acumulado':>10} {'propio':>10}  módulo")
+        slowest = sorted(self.imports, key=lambda item: item[1], reverse=True)[:top]
+        for name, cumulative_ms, self_ms, depth in slowest:
+            lines.append(f"{cumulative_ms:10.1f} {self_ms:10.1f}  {'  ' * depth}{name}")
+
+        return '\n'.join(lines)
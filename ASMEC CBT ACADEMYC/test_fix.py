@@ -3,7 +3,6 @@ ASMET - Versión Estable y Funcional
 Solución al error gráfico de Kivy en Windows
 """
 
-import sqlite3
 from kivy.app import App
 from kivy.uix.screenmanager import ScreenManager, Screen
 from kivy.core.window import Window
@@ -19,46 +18,9 @@ os.environ['KIVY_GL_BACKEND'] = 'angle_sdl2'
 os.environ['KIVY_WINDOW'] = 'sdl2'
 os.environ['KIVY_TEXT'] = 'sdl2'
 
-Window.size = (360, 600)
+from database import DatabaseManager
 
-class DatabaseManager:
-    def __init__(self):
-        self.conn = sqlite3.connect('asmet_fixed.db')
-        self.init_db()
-    
-    def init_db(self):
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE,
-                password TEXT,
-                level INTEGER DEFAULT 1,
-                points INTEGER DEFAULT 0
-            )
-        ''')
-        self.conn.commit()
-        print("Base de datos lista")
-    
-    def register(self, username, password):
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                'INSERT INTO users (username, password) VALUES (?, ?)',
-                (username, password)
-            )
-            self.conn.commit()
-            return True, "Registro exitoso"
-        except:
-            return False, "Usuario ya existe"
-    
-    def login(self, username, password):
-        cursor = self.conn.cursor()
-        cursor.execute(
-            'SELECT id, username, level, points FROM users WHERE username=? AND password=?',
-            (username, password)
-        )
-        return cursor.fetchone()
+Window.size = (360, 600)
 
 class LoginScreen(Screen):
     def __init__(self, **kwargs):
@@ -120,25 +82,26 @@ class LoginScreen(Screen):
         self.add_widget(layout)
     
     def do_login(self, instance):
-        user = self.manager.app.db.login(
+        user = self.manager.app.db.authenticate_user(
             self.username_input.text,
             self.password_input.text
         )
         
         if user:
             self.manager.app.user = {
-                'id': user[0],
-                'username': user[1],
-                'level': user[2],
-                'points': user[3]
+                'id': user.id,
+                'username': user.username,
+                'level': user.level,
+                'points': user.total_points
             }
             self.manager.current = 'dashboard'
         else:
             print("Login fallido")
     
     def do_register(self, instance):
-        success, msg = self.manager.app.db.register(
+        success, msg = self.manager.app.db.register_user(
             self.username_input.text,
+            None,
             self.password_input.text
         )
         print(msg)
@@ -0,0 +1,129 @@
+import atexit
+import threading
+import time
+from typing import Callable, List, Tuple
+
+# Operación pendiente: (sentencia SQL, parámetros)
+WriteOp = Tuple[str, tuple]
+
+class WriteBehindQueue:
+    """Cola de escritura diferida: agrupa escrituras en una sola transacción
+
+    Las operaciones se acumulan en memoria y se escriben juntas cuando hay
+    max_events pendientes o cuando pasan max_delay_ms desde la primera.
+    Ante un cierre inesperado sólo se pierde, como máximo, esa ventana.
+    Las escrituras ocurren siempre en el hilo de fondo (o en flush());
+    un lote que falla max_retries veces seguidas se descarta.
+    """
+
+    def __init__(self, write_batch: Callable[[List[WriteOp]], None],
+                 max_events: int = 20, max_delay_ms: int = 500,
+                 max_retries: int = 3):
+        self.write_batch = write_batch
+        self.max_events = max(1, max_events)
+        self.max_delay = max_delay_ms / 1000.0
+        self.max_retries = max(1, max_retries)
+
+        self._pending: List[WriteOp] = []
+        self._lock = threading.Lock()
+        # Avisa al hilo de fondo de un lote nuevo, lleno o del cierre
+        self._changed = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        # Momento de la primera operación del lote pendiente
+        self._first_at = 0.0
+        self._failures = 0
+        self._closed = False
+
+        self.flushes = 0
+        self.events_written = 0
+        self.events_dropped = 0
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def enqueue(self, sql: str, params: tuple = ()):
+        """Agregar una operación; se escribe al llenar el lote o vencer el plazo"""
+        if self._closed:
+            raise RuntimeError('La cola de escritura está cerrada')
+
+        with self._lock:
+            self._pending.append((sql, params))
+            pending = len(self._pending)
+            if pending == 1:
+                # Primera operación del lote: arranca la ventana
+                self._first_at = time.monotonic()
+                self._changed.notify()
+            elif pending == self.max_events:
+                # Lote lleno: lo escribe el hilo de fondo, no quien encola
+                self._changed.notify()
+
+    def pending_count(self) -> int:
+        """Número de operaciones aún no escritas"""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Escribir todas las operaciones pendientes en una transacción"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+
+            if not batch:
+                return 0
+
+            try:
+                self.write_batch(batch)
+            except Exception as e:
+                self._failures += 1
+                if self._failures >= self.max_retries:
+                    print(f"Lote diferido descartado tras {self._failures} intentos "
+                          f"({len(batch)} operaciones): {e}")
+                    self._failures = 0
+                    self.events_dropped += len(batch)
+                    raise
+                # Devolver el lote a la cola; se reintenta tras otra ventana
+                with self._lock:
+                    self._pending = batch + self._pending
+                    self._first_at = time.monotonic()
+                raise
+
+            self._failures = 0
+            self.flushes += 1
+            self.events_written += len(batch)
+            return len(batch)
+
+    def _run(self):
+        """Hilo de fondo: vaciar la cola como máximo max_delay después del primer evento"""
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._changed.wait()
+                # Esperar el resto de la ventana; encolar más operaciones no
+                # la acorta, sólo llenar el lote o cerrar la cola
+                while not self._closed and len(self._pending) < self.max_events:
+                    remaining = self._first_at + self.max_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._changed.wait(remaining)
+                if self._closed:
+                    break
+
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error al escribir lote diferido: {e}")
+
+    def close(self):
+        """Escribir lo pendiente y detener el hilo de fondo"""
+        if self._closed:
+            return
+
+        with self._lock:
+            self._closed = True
+            self._changed.notify()
+        self._thread.join(timeout=self.max_delay + 1)
+        try:
+            self.flush()
+        finally:
+            atexit.unregister(self.close)